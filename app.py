@@ -4,18 +4,43 @@ Simple REST API for iOS app integration
 """
 
 import os
+import sys
+import time
 import uuid
 import asyncio
+import itertools
+import json
 from datetime import datetime
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Request, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
-import aiofiles
+from starlette.requests import ClientDisconnect
+from typing import Dict, List, Optional
 
-from dogwhistle_ai_processor import DogWhistleProcessor
+from batch_upload import (BATCH_MAX_BYTES, BATCH_MAX_FILES, discard_uploads, extract_archive, stream_results_archive,
+                          summarize_batch)
+from dogwhistle_ai_processor import DogWhistleProcessor, report_path
+from job_store import JOB_TTL_SECONDS, create_job_store
+from live_transcription import LiveSession
+from meeting_group import GROUP_SETTLE_SECONDS, MAX_GROUP_RECORDINGS
+from pipeline_metrics import ALLOW_PROFILING, MeetingTrace, finish_meeting, profiled, render_metrics, traced
+from pipeline_scheduler import PipelineScheduler, QueueFull
+from progress_events import TERMINAL_STAGES, ProgressBroker, format_sse, stage_event, transcript_event
+from related_meetings import RelatedMeetingsIndex
+from report_renderers import RENDERERS, RenderCache
+from response_encoding import ResponseCache, etag_matches, negotiate_encoding, parse_fields, project, wants
+from resumable_upload import UPLOAD_IDLE_SECONDS, ResumableUpload, append_chunk, validate_filename
+from search_index import SearchIndex
+from upload_streaming import MAX_GROUP_UPLOAD_BYTES, MAX_UPLOAD_BYTES, UploadRejected, stream_upload_to_disk, stream_uploads_to_disk
+import openai_pool
+
+# Open connections to OpenAI in the background as soon as the server is up
+WARM_ON_STARTUP = os.getenv("DOGWHISTLE_WARM_ON_STARTUP", "1") == "1"
+
+# How long the startup phases took, for GET /api/startup (import time is measured by bench_startup.py)
+startup_report = {}
 
 # Initialize FastAPI app
 app = FastAPI(title="DogWhistle AI API", version="1.0.0")
@@ -29,8 +54,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for demo (use Redis/Database in production)
-meeting_status = {}
+# Meeting status and results (SQLite by default, shared by all workers); opened on startup
+job_store = None
+
+# Bounded queue and worker pool for the processing pipeline
+scheduler = PipelineScheduler()
+
+# Pushes stage transitions to /events listeners in this worker
+progress_broker = ProgressBroker()
+
+# Text reports rendered from stored results on first request
+render_cache = RenderCache()
+
+# Serialized, compressed /results bodies per meeting and projection
+response_cache = ResponseCache()
+
+# Full-text index of processed meetings (SQLite FTS5, shared by all workers); opened on startup
+search_index = None
+
+# Vectors of processed meetings for finding similar ones (memory-mapped, shared); opened on startup
+related_index = None
+
+# Fire-and-forget tasks, referenced until done so they aren't garbage-collected
+background_tasks = set()
+
+def run_in_background(coroutine) -> asyncio.Task:
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Seconds an event stream waits before re-checking the job store, which
+# catches updates made by other workers
+EVENT_REFRESH_SECONDS = 2.0
+
+# Answer unknown meeting IDs with canned demo data (hackathon deployments only)
+DEMO_MODE = os.getenv("DOGWHISTLE_DEMO_MODE") == "1"
+
+# How often expired meetings are purged from the job store
+EVICTION_INTERVAL_SECONDS = 600
+
+# Meeting groups collecting recordings in this worker: serializes each
+# group's uploads, and the timer that processes it once uploads stop
+group_locks: Dict[str, asyncio.Lock] = {}
+group_timers: Dict[str, asyncio.Task] = {}
+
+# Resumable uploads receiving chunks in this worker (a client's chunks must
+# all reach the same worker)
+resumable_uploads: Dict[str, ResumableUpload] = {}
+
+# Meetings being recorded over /api/meetings/live in this worker
+live_sessions: Dict[str, LiveSession] = {}
 
 # Response models
 class MeetingUploadResponse(BaseModel):
@@ -41,9 +115,81 @@ class MeetingUploadResponse(BaseModel):
 class MeetingStatusResponse(BaseModel):
     meeting_id: str
     status: str  # pending, processing, completed, failed
+    stage: Optional[str] = None  # recording, uploading, collecting, queued, aligning, transcribing, analyzing, formatting, completed, failed
+    progress: Optional[int] = None
+    message: Optional[str] = None
+    queue_position: Optional[int] = None
+    queue_depth: Optional[int] = None
+    queue_wait_seconds: Optional[float] = None
+    partial_analysis: Optional[Dict] = None  # Analysis fields finished so far, while analyzing
+    recordings: Optional[int] = None  # Recordings received, for meeting groups
+    timings: Optional[Dict] = None  # Seconds per stage so far, plus bytes, tokens and retries
+
+class MeetingGroupResponse(BaseModel):
+    meeting_id: str
+    status: str
+    stage: str
+    recordings: int
+    expected_recordings: Optional[int] = None
+    message: str
+
+class ResumableUploadResponse(BaseModel):
+    meeting_id: str
+    offset: int  # Bytes received; the next PATCH starts here
+    length: Optional[int] = None
+    pipelined: bool  # Windows are being transcribed while the upload arrives
+    message: str
+
+class BatchMeeting(BaseModel):
+    meeting_id: str
+    filename: str
+    status: Optional[str] = None
+    stage: Optional[str] = None
     progress: Optional[int] = None
     message: Optional[str] = None
 
+class BatchResponse(BaseModel):
+    batch_id: str
+    status: str  # processing until every meeting has completed or failed
+    total: int
+    finished: int = 0
+    progress: int = 0
+    counts: Dict[str, int] = {}  # Meetings per status
+    meetings: List[BatchMeeting]
+    skipped: List[str] = []  # Archive entries that weren't recordings
+    message: Optional[str] = None
+
+class RelatedMeeting(BaseModel):
+    meeting_id: str
+    score: float  # Cosine similarity of TF-IDF vectors, 0-1
+    processed_at: Optional[str] = None
+    meeting_type: Optional[str] = None
+    summary: Optional[str] = None  # The brief summary
+    shared_topics: List[str] = []
+
+class RelatedMeetingsResponse(BaseModel):
+    meeting_id: str
+    related: List[RelatedMeeting]
+
+class SearchActionItem(BaseModel):
+    task: str
+    owner: str
+    due_date: str
+    priority: str
+
+class SearchHit(BaseModel):
+    meeting_id: str
+    score: Optional[float] = None  # BM25, higher is better; None when only filtering
+    processed_at: Optional[str] = None
+    meeting_type: Optional[str] = None
+    summary: Optional[str] = None  # The brief summary
+    snippet: Optional[str] = None  # Best matching passage, matches wrapped in <mark>
+    action_items: Optional[List[SearchActionItem]] = None  # Items matching owner/due filters
+
+class SearchResponse(BaseModel):
+    results: List[SearchHit]
+    has_more: bool
+
 class ProcessingError(BaseModel):
     error: str
     details: str
@@ -70,53 +216,203 @@ async def api_root():
 
 @app.get("/wake")
 async def wake():
-    """Wake endpoint for Render free tier - prevents cold starts"""
+    """
+    Wake endpoint for Render free tier - prevents cold starts
+    Also primes the OpenAI connection pool, so the next upload doesn't pay for the handshakes
+    """
     return {
         "status": "awake",
         "message": "Server is ready",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "openai_pool": await openai_pool.warm_up(),
     }
 
+@app.get("/api/startup")
+async def startup_stats():
+    """How long the last cold start took, by phase, and the state of the OpenAI pool"""
+    deferred = {name: name in sys.modules for name in ("openai", "httpx")}
+    return dict(startup_report, openai_pool=openai_pool.stats(), loaded_modules=deferred)
+
 @app.get("/Sample meeting recording.m4a")
 async def get_sample_audio():
     """Serve the sample audio file"""
     return FileResponse("Sample meeting recording.m4a", media_type="audio/mp4")
 
-@app.post("/api/meetings/upload", response_model=MeetingUploadResponse)
-async def upload_meeting(
-    background_tasks: BackgroundTasks,
-    audio_file: UploadFile = File(...),
-):
+# The upload body is parsed by hand, so describe it for the OpenAPI docs
+AUDIO_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["audio_file"],
+                    "properties": {"audio_file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+@app.post("/api/meetings/upload", response_model=MeetingUploadResponse, openapi_extra=AUDIO_UPLOAD_BODY)
+async def upload_meeting(request: Request, profile: bool = False):
     """
     Upload audio file for processing
     iOS app sends audio file here
+    With profile=true (and DOGWHISTLE_ALLOW_PROFILING=1) the pipeline run is
+    profiled; the report is at /api/meetings/{meeting_id}/profile
     """
-    # Validate file
-    if not audio_file.filename.endswith(('.mp3', '.m4a', '.wav', '.ogg', '.webm')):
-        raise HTTPException(400, "Invalid audio format. Supported: mp3, m4a, wav, ogg, webm")
+    if profile and not ALLOW_PROFILING:
+        raise HTTPException(400, "Profiling is disabled on this server")
     
-    # Check file size (25MB limit for OpenAI)
-    contents = await audio_file.read()
-    if len(contents) > 25 * 1024 * 1024:
-        raise HTTPException(400, "File too large. Maximum size: 25MB")
+    # Refuse before receiving the body if there's no room to process it
+    try:
+        scheduler.ensure_capacity()
+    except QueueFull as e:
+        raise queue_full_error(e)
     
     # Generate meeting ID
     meeting_id = str(uuid.uuid4())
     
-    # Save file temporarily
-    temp_path = f"/tmp/{meeting_id}_{audio_file.filename}"
-    async with aiofiles.open(temp_path, 'wb') as f:
-        await f.write(contents)
+    # Stream the file to disk, validating size and format as it arrives
+    trace = MeetingTrace(meeting_id)
+    started = time.monotonic()
+    try:
+        upload = await stream_upload_to_disk(
+            request,
+            spool_path_for=lambda filename: f"/tmp/{meeting_id}_{filename}",
+        )
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    temp_path = upload.path
+    trace.observe("upload", time.monotonic() - started)
+    trace.add(upload_bytes=upload.size)
     
     # Update status
-    meeting_status[meeting_id] = {
-        "status": "pending",
-        "progress": 0,
-        "temp_path": temp_path
-    }
+    await job_store.create(
+        meeting_id,
+        status="pending",
+        stage="queued",
+        progress=0,
+        temp_path=temp_path
+    )
+    
+    # Queue for processing
+    try:
+        position = scheduler.submit(meeting_id, process_meeting_async, meeting_id, temp_path, upload.sha256,
+                                    trace=trace, profile=profile)
+    except QueueFull as e:
+        await job_store.delete(meeting_id)
+        os.remove(temp_path)
+        raise queue_full_error(e)
+    await job_store.update(meeting_id, queue_position=position)
+    
+    return MeetingUploadResponse(
+        meeting_id=meeting_id,
+        status="pending",
+        message="Audio file uploaded successfully. Processing started."
+    )
+
+@app.post("/api/uploads", response_model=ResumableUploadResponse, status_code=201)
+async def create_resumable_upload(request: Request, filename: str, length: Optional[int] = None):
+    """
+    Start a resumable upload for connections that may drop part way
+    PATCH the file to /api/uploads/{meeting_id} in pieces, each with an
+    Upload-Offset header; after a drop, HEAD the upload for the offset to resume
+    from. POST /finalize once every byte is in. WAV recordings are transcribed
+    a few minutes at a time while the rest is still uploading.
+    The total size can be given as `length` or an Upload-Length header.
+    """
+    try:
+        scheduler.ensure_capacity()
+        filename = validate_filename(filename)
+    except QueueFull as e:
+        raise queue_full_error(e)
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    if length is None and request.headers.get("upload-length", "").isdigit():
+        length = int(request.headers["upload-length"])
+    if length is not None and not 0 < length <= MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Upload-Length must be between 1 and {MAX_UPLOAD_BYTES} bytes")
     
-    # Process in background
-    background_tasks.add_task(process_meeting_async, meeting_id, temp_path)
+    meeting_id = str(uuid.uuid4())
+    upload = ResumableUpload(
+        meeting_id,
+        path=f"/tmp/{meeting_id}_{filename}",
+        filename=filename,
+        length=length,
+        transcribe=processor.transcribe_window_file,
+        trace=MeetingTrace(meeting_id),
+    )
+    resumable_uploads[meeting_id] = upload
+    await job_store.create(meeting_id, status="pending", stage="uploading", progress=0, temp_path=upload.path)
+    return JSONResponse(
+        upload_response(upload, "Upload created. PATCH the file's bytes to this upload.").dict(),
+        status_code=201,
+        headers={"Location": f"/api/uploads/{meeting_id}", **offset_headers(upload)},
+    )
+
+@app.head("/api/uploads/{meeting_id}")
+async def resumable_upload_offset(meeting_id: str):
+    """The offset to resume from, in the Upload-Offset header"""
+    return Response(headers=offset_headers(get_resumable_upload(meeting_id)))
+
+@app.get("/api/uploads/{meeting_id}", response_model=ResumableUploadResponse)
+async def get_resumable_upload_status(meeting_id: str):
+    upload = get_resumable_upload(meeting_id)
+    return JSONResponse(upload_response(upload, "Upload in progress.").dict(), headers=offset_headers(upload))
+
+@app.patch("/api/uploads/{meeting_id}", response_model=ResumableUploadResponse)
+async def append_resumable_upload(meeting_id: str, request: Request):
+    """
+    Append the request body at the Upload-Offset header's position
+    Bytes are kept as they arrive, so a dropped PATCH loses nothing received
+    """
+    upload = get_resumable_upload(meeting_id)
+    offset = request.headers.get("upload-offset", "")
+    if not offset.isdigit():
+        raise HTTPException(400, "Upload-Offset header is required")
+    if upload.lock.locked():
+        raise HTTPException(409, "Another request is already appending to this upload")
+    
+    async with upload.lock:
+        try:
+            with traced(upload.trace):  # Windows transcribed now count towards the meeting
+                await append_chunk(upload, request.stream(), int(offset))
+        except UploadRejected as e:
+            raise HTTPException(e.status_code, e.detail, headers=offset_headers(upload))
+        except ClientDisconnect:
+            print(f"Upload {meeting_id} interrupted at {upload.offset} bytes")
+    return JSONResponse(upload_response(upload, "Chunk received.").dict(), headers=offset_headers(upload))
+
+@app.post("/api/uploads/{meeting_id}/finalize", response_model=MeetingUploadResponse)
+async def finalize_resumable_upload(meeting_id: str, profile: bool = False):
+    """Queue a fully received upload for processing"""
+    if profile and not ALLOW_PROFILING:
+        raise HTTPException(400, "Profiling is disabled on this server")
+    upload = get_resumable_upload(meeting_id)
+    async with upload.lock:
+        if not upload.complete or upload.offset == 0:
+            raise HTTPException(409, f"Upload has {upload.offset} of {upload.length} bytes",
+                                headers=offset_headers(upload))
+        if upload.audio_format is None:
+            # Too short to have been sniffed; the streaming upload path rejects these too
+            abandon_upload(meeting_id)
+            error = "File content is not a supported audio format"
+            await report_progress(meeting_id, "failed", error=error)
+            raise HTTPException(400, error)
+        trace = upload.trace
+        trace.observe("upload", time.monotonic() - upload.created)
+        trace.add(upload_bytes=upload.offset)
+        try:
+            position = scheduler.submit(meeting_id, process_meeting_async, meeting_id, upload.path,
+                                        upload.digest.hexdigest(), trace=trace, profile=profile,
+                                        transcriber=upload.transcriber)
+        except QueueFull as e:
+            # Keep the upload so the client can finalize again later
+            raise queue_full_error(e)
+        resumable_uploads.pop(meeting_id, None)
+    await job_store.update(meeting_id, stage="queued", queue_position=position)
     
     return MeetingUploadResponse(
         meeting_id=meeting_id,
@@ -124,33 +420,590 @@ async def upload_meeting(
         message="Audio file uploaded successfully. Processing started."
     )
 
-async def process_meeting_async(meeting_id: str, audio_path: str):
+def get_resumable_upload(meeting_id: str) -> ResumableUpload:
+    upload = resumable_uploads.get(meeting_id)
+    if upload is None:
+        raise HTTPException(404, "Upload not found")
+    return upload
+
+def offset_headers(upload: ResumableUpload) -> Dict[str, str]:
+    headers = {"Upload-Offset": str(upload.offset), "Cache-Control": "no-store"}
+    if upload.length is not None:
+        headers["Upload-Length"] = str(upload.length)
+    return headers
+
+def upload_response(upload: ResumableUpload, message: str) -> ResumableUploadResponse:
+    return ResumableUploadResponse(
+        meeting_id=upload.upload_id,
+        offset=upload.offset,
+        length=upload.length,
+        pipelined=upload.transcriber is not None,
+        message=message
+    )
+
+def abandon_upload(meeting_id: str):
+    """Drop a resumable upload that is being deleted or has gone idle"""
+    upload = resumable_uploads.pop(meeting_id, None)
+    if upload is not None:
+        upload.discard()
+
+@app.websocket("/api/meetings/live")
+async def live_meeting(websocket: WebSocket, filename: str = "recording.webm"):
     """
-    Background task to process meeting
+    Record a meeting over a WebSocket, transcribing it as it happens
+    Send the recorder's chunks (e.g. MediaRecorder timeslices) as binary
+    messages and {"type": "stop"} when recording ends (other text frames are
+    ignored). The server replies with
+    {"type": "started", "meeting_id"}, {"type": "transcript", "text"} as the
+    running transcript grows, and {"type": "finalized", "meeting_id"} once the
+    meeting is queued; from then on it is watched like any other meeting.
+    A connection that drops without "stop" is processed with what arrived.
     """
+    await websocket.accept()
+    try:
+        scheduler.ensure_capacity()
+        filename = validate_filename(filename)
+    except QueueFull as e:
+        await websocket.close(code=1013, reason=f"Server is busy. Retry in {e.retry_after}s")
+        return
+    except UploadRejected as e:
+        await websocket.close(code=1003, reason=e.detail)
+        return
+    
+    meeting_id = str(uuid.uuid4())
+    trace = MeetingTrace(meeting_id)
+    started = time.monotonic()
+    in_order = asyncio.Lock()  # Pieces build on each other, so they're stored in the order made
+    session = LiveSession(
+        meeting_id,
+        f"/tmp/{meeting_id}_{filename}",
+        transcribe=processor.transcribe_window_file,
+        on_transcript=lambda offset, text: run_in_background(
+            report_live_transcript(websocket, meeting_id, offset, text, in_order)),
+    )
+    live_sessions[meeting_id] = session
+    await job_store.create(meeting_id, status="pending", stage="recording", progress=0, temp_path=session.path)
+    await websocket.send_json({"type": "started", "meeting_id": meeting_id})
+    
+    stopped = False
+    recorded = False
+    try:
+        with traced(trace):  # Windows transcribed now count towards the meeting
+            while True:
+                message = await websocket.receive()
+                if meeting_id not in live_sessions:
+                    break
+                if message["type"] == "websocket.disconnect":
+                    print(f"Live meeting {meeting_id} disconnected after {session.size} bytes")
+                    break
+                if message.get("bytes"):
+                    await session.add_chunk(message["bytes"])
+                elif message.get("text") and is_stop_message(message["text"]):
+                    stopped = True
+                    break
+        recorded = True
+    except UploadRejected as e:
+        await fail_live_meeting(websocket, meeting_id, e.detail, 1009 if e.status_code == 413 else 1003)
+        return
+    except Exception as e:
+        print(f"Live meeting {meeting_id} failed while recording: {type(e).__name__}: {e}")
+        await fail_live_meeting(websocket, meeting_id, f"Recording failed: {e}", 1011)
+        return
+    finally:
+        if not recorded:
+            # Errors and cancellation: don't leave the session, its file or ffmpeg behind
+            live_sessions.pop(meeting_id, None)
+            session.discard()
+    if live_sessions.pop(meeting_id, None) is None:
+        # Deleted while recording
+        if message["type"] != "websocket.disconnect":
+            await websocket.close(reason="Meeting deleted")
+        return
+    
+    transcriber = await session.stop()
+    trace.observe("recording", time.monotonic() - started)
+    trace.add(upload_bytes=session.size)
+    try:
+        if session.size == 0:
+            raise ValueError("Nothing was recorded")
+        if session.audio_format is None:
+            # Fewer bytes than it takes to recognise a format
+            raise ValueError("Recording is not a supported audio format")
+        position = scheduler.submit(meeting_id, process_live_meeting, session, trace=trace,
+                                    transcriber=transcriber)
+    except (QueueFull, ValueError) as e:
+        session.discard()
+        await report_progress(meeting_id, "failed", error=str(e))
+    else:
+        await job_store.update(meeting_id, stage="queued", queue_position=position)
+    if stopped:
+        await websocket.send_json({"type": "finalized", "meeting_id": meeting_id})
+        await websocket.close()
+
+def is_stop_message(text: str) -> bool:
+    """True for the recorder's {"type": "stop"} frame; other text frames are ignored"""
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("type") == "stop"
+
+async def fail_live_meeting(websocket: WebSocket, meeting_id: str, error: str, code: int):
+    await report_progress(meeting_id, "failed", error=error)
+    try:
+        await websocket.close(code=code, reason=error[:120])  # Close reasons are limited to 123 bytes
+    except Exception:
+        pass  # The recorder has already gone
+
+async def report_live_transcript(websocket: WebSocket, meeting_id: str, offset: int, text: str,
+                                 in_order: asyncio.Lock):
+    """Send a finished window's text to the recorder and anyone watching the meeting"""
+    # Only the new text is stored and sent, so each window costs the same however long the meeting
+    async with in_order:
+        await job_store.append_live_text(meeting_id, offset, text)
+        event = transcript_event(meeting_id, offset, text)
+        progress_broker.publish(meeting_id, event)
+        try:
+            await websocket.send_json(event)
+        except Exception:
+            pass  # The recorder has gone; the transcript is still in the job store
+
+async def process_live_meeting(session: LiveSession, queue_wait_seconds: Optional[float] = None,
+                               trace: Optional[MeetingTrace] = None, transcriber=None):
+    """
+    Scheduled task to finish a meeting recorded live
+    """
+    try:
+        await process_meeting_async(session.meeting_id, session.path, session.sha256, queue_wait_seconds, trace,
+                                    transcriber=transcriber)
+    finally:
+        session.discard()
+
+def abandon_live_session(meeting_id: str):
+    """Stop recording a meeting that is being deleted"""
+    session = live_sessions.pop(meeting_id, None)
+    if session is not None:
+        session.discard()
+
+def queue_full_error(error: QueueFull) -> HTTPException:
+    """503 telling the client when to try again"""
+    return HTTPException(
+        503,
+        "Server is busy processing other meetings. Please retry shortly.",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+async def report_progress(meeting_id: str, stage: str, progress: Optional[int] = None, **fields):
+    """Record a stage transition and push it to anyone listening"""
+    status = stage if stage in TERMINAL_STAGES else "processing"
+    if progress is not None:
+        fields["progress"] = progress
+    record = await job_store.update(meeting_id, status=status, stage=stage, **fields)
+    if record is not None:
+        progress_broker.publish(meeting_id, stage_event(meeting_id, record))
+
+async def process_meeting_async(meeting_id: str, audio_path: str, audio_sha256: Optional[str] = None,
+                                queue_wait_seconds: Optional[float] = None, trace: Optional[MeetingTrace] = None,
+                                profile: bool = False, transcriber=None):
+    """
+    Scheduled task to process meeting
+    """
+    try:
+        await run_pipeline(
+            meeting_id,
+            lambda on_progress: processor.process_meeting(
+                audio_path, meeting_id, audio_sha256=audio_sha256, on_progress=on_progress,
+                transcriber=transcriber),
+            queue_wait_seconds, trace, profile
+        )
+    finally:
+        if transcriber is not None:
+            transcriber.close()
+        # Clean up temp file
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+
+async def run_pipeline(meeting_id: str, run, queue_wait_seconds: Optional[float] = None,
+                       trace: Optional[MeetingTrace] = None, profile: bool = False):
+    """
+    Run `run(on_progress)` for a meeting, recording its progress, stage
+    timings and outcome
+    """
+    trace = trace or MeetingTrace(meeting_id)
+    trace.observe("queue", queue_wait_seconds or 0.0)
+    report = {}
     try:
         # Update status
-        meeting_status[meeting_id]["status"] = "processing"
-        meeting_status[meeting_id]["progress"] = 20
+        await job_store.update(meeting_id, queue_position=None, queue_wait_seconds=queue_wait_seconds)
+        
+        cache_keys = []
+        
+        async def on_progress(stage: str, progress: int, **details):
+            cache_keys.extend(details.get("cache_keys") or ())
+            await report_progress(meeting_id, stage, progress, timings=trace.breakdown(), **details)
         
         # Process with AI
-        results = await processor.process_meeting(audio_path, meeting_id)
+        with traced(trace), profiled(profile, report):
+            results = await run(on_progress)
         
-        # Store results
-        meeting_status[meeting_id]["status"] = "completed"
-        meeting_status[meeting_id]["progress"] = 100
-        meeting_status[meeting_id]["results"] = results
+        if await job_store.get(meeting_id) is None:
+            # Deleted while it was processing: keep nothing it produced
+            await forget_meeting(meeting_id, {"cache_keys": cache_keys})
+            finish_meeting(trace, "cancelled")
+            return
         
-        # Clean up temp file
-        os.remove(audio_path)
+        # Store results before flagging completion so readers never miss them
+        await job_store.set_results(meeting_id, results)
+        await index_meeting(meeting_id, results)
+        finish_meeting(trace, "completed")
+        await report_progress(meeting_id, "completed", 100, partial_analysis=None, timings=trace.breakdown(), **report)
         
     except Exception as e:
-        meeting_status[meeting_id]["status"] = "failed"
-        meeting_status[meeting_id]["error"] = str(e)
-        
-        # Clean up on error
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+        finish_meeting(trace, "failed")
+        await report_progress(meeting_id, "failed", error=str(e), timings=trace.breakdown(), **report)
+
+async def index_meeting(meeting_id: str, results: Dict):
+    """Add a processed meeting to the search and related-meetings indexes"""
+    for name, index in (("search", search_index), ("related meetings", related_index)):
+        try:
+            await index.add(meeting_id, results)
+        except Exception as e:
+            print(f"Warning: could not add meeting {meeting_id} to the {name} index: {e}")
+
+async def forget_meeting(meeting_id: str, record: Optional[Dict] = None):
+    """
+    Drop everything derived from a deleted meeting: cached renders and
+    responses, index entries, its cached transcript and analysis (keys from
+    its status `record`) and its report file
+    """
+    render_cache.invalidate(meeting_id)
+    response_cache.invalidate(meeting_id)
+    await search_index.remove(meeting_id)
+    await related_index.remove(meeting_id)
+    if processor is not None:
+        for key in (record or {}).get("cache_keys") or []:
+            await processor.cache.delete(key)
+    path = report_path(meeting_id)
+    if await asyncio.to_thread(os.path.exists, path):
+        await asyncio.to_thread(os.remove, path)
+
+@app.post("/api/groups", response_model=MeetingGroupResponse)
+async def create_group(code: Optional[str] = None, expected_recordings: Optional[int] = None):
+    """
+    Start a meeting recorded on several phones
+    Each phone uploads to /api/groups/{meeting_id}/recordings; the recordings are
+    merged and processed as one meeting once `expected_recordings` have arrived,
+    uploads stop for a while, or /process is called. Everyone watches the same
+    meeting_id. A session `code` gives the group a predictable ID (group-CODE).
+    """
+    if expected_recordings is not None and not 1 <= expected_recordings <= MAX_GROUP_RECORDINGS:
+        raise HTTPException(400, f"expected_recordings must be between 1 and {MAX_GROUP_RECORDINGS}")
+    if code is not None and not (code.isalnum() and len(code) <= 32):
+        raise HTTPException(400, "Session code must be letters and digits")
+    meeting_id = f"group-{code.upper()}" if code else f"group-{uuid.uuid4()}"
+    if await job_store.get(meeting_id) is not None:
+        raise HTTPException(409, "A group with this code already exists")
+    
+    await job_store.create(
+        meeting_id,
+        status="pending",
+        stage="collecting",
+        progress=0,
+        recordings=[],
+        expected_recordings=expected_recordings
+    )
+    return MeetingGroupResponse(
+        meeting_id=meeting_id,
+        status="pending",
+        stage="collecting",
+        recordings=0,
+        expected_recordings=expected_recordings,
+        message="Group created. Upload each phone's recording."
+    )
+
+@app.post("/api/groups/{meeting_id}/recordings", response_model=MeetingGroupResponse, openapi_extra=AUDIO_UPLOAD_BODY)
+async def upload_group_recording(meeting_id: str, request: Request):
+    """Add one phone's recording to a meeting group"""
+    try:
+        scheduler.ensure_capacity()
+    except QueueFull as e:
+        raise queue_full_error(e)
+    record = await collecting_group(meeting_id)
+    if len(record["recordings"]) >= MAX_GROUP_RECORDINGS:
+        raise HTTPException(409, f"Group already has {MAX_GROUP_RECORDINGS} recordings")
+    
+    index = uuid.uuid4().hex[:8]
+    try:
+        upload = await stream_upload_to_disk(
+            request,
+            spool_path_for=lambda filename: f"/tmp/{meeting_id}_{index}_{filename}",
+            max_bytes=MAX_GROUP_UPLOAD_BYTES,
+        )
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    
+    async with group_locks.setdefault(meeting_id, asyncio.Lock()):
+        # One atomic append, so uploads handled by other workers aren't lost; it
+        # fails if the group started processing or filled up meanwhile
+        record = await job_store.append(meeting_id, "recordings", upload.path, max_length=MAX_GROUP_RECORDINGS,
+                                        expected={"stage": "collecting"})
+        if record is None:
+            os.remove(upload.path)
+            await collecting_group(meeting_id)
+            raise HTTPException(409, f"Group already has {MAX_GROUP_RECORDINGS} recordings")
+        progress_broker.publish(meeting_id, stage_event(meeting_id, record))
+        expected = record.get("expected_recordings")
+        if expected and len(record["recordings"]) >= expected:
+            await submit_group(meeting_id)
+        else:
+            schedule_group(meeting_id)
+    
+    return group_response(meeting_id, await job_store.get(meeting_id))
+
+@app.post("/api/groups/{meeting_id}/process", response_model=MeetingGroupResponse)
+async def process_group_now(meeting_id: str):
+    """Process a group now with the recordings received so far"""
+    async with group_locks.setdefault(meeting_id, asyncio.Lock()):
+        record = await collecting_group(meeting_id)
+        if not record["recordings"]:
+            raise HTTPException(400, "No recordings have been uploaded to this group")
+        await submit_group(meeting_id)
+    return group_response(meeting_id, await job_store.get(meeting_id))
+
+async def collecting_group(meeting_id: str) -> Dict:
+    """The group's record, or an HTTP error if it isn't accepting recordings"""
+    record = await job_store.get(meeting_id)
+    if record is None or "recordings" not in record:
+        raise HTTPException(404, "Meeting group not found")
+    if record.get("stage") != "collecting":
+        raise HTTPException(409, "Meeting group is already being processed")
+    return record
+
+def schedule_group(meeting_id: str):
+    """(Re)start the countdown that processes a group once uploads stop"""
+    timer = group_timers.pop(meeting_id, None)
+    if timer is not None:
+        timer.cancel()
+    group_timers[meeting_id] = asyncio.create_task(process_group_when_settled(meeting_id))
+
+async def process_group_when_settled(meeting_id: str):
+    await asyncio.sleep(GROUP_SETTLE_SECONDS)
+    async with group_locks.setdefault(meeting_id, asyncio.Lock()):
+        group_timers.pop(meeting_id, None)
+        record = await job_store.get(meeting_id)
+        if record is not None and record.get("stage") == "collecting" and record["recordings"]:
+            await submit_group(meeting_id)
+
+async def submit_group(meeting_id: str):
+    """Queue a group's recordings for processing (call with the group's lock held)"""
+    timer = group_timers.pop(meeting_id, None)
+    if timer is not None and timer is not asyncio.current_task():
+        timer.cancel()
+    group_locks.pop(meeting_id, None)
+    
+    # Close the group first: appends from any worker fail from here on, and only
+    # one worker gets to submit it
+    record = await job_store.update_if(meeting_id, {"stage": "collecting"}, stage="queued")
+    if record is None:
+        return
+    try:
+        position = scheduler.submit(meeting_id, process_group_async, meeting_id, record["recordings"])
+    except QueueFull as e:
+        await report_progress(meeting_id, "failed", error=str(e))
+        discard_recordings(record)
+        return
+    record = await job_store.update(meeting_id, queue_position=position)
+    progress_broker.publish(meeting_id, stage_event(meeting_id, record))
+
+async def process_group_async(meeting_id: str, audio_paths, queue_wait_seconds: Optional[float] = None):
+    """
+    Scheduled task to merge and process a meeting group
+    """
+    try:
+        await run_pipeline(
+            meeting_id,
+            lambda on_progress: processor.process_group(audio_paths, meeting_id, on_progress=on_progress),
+            queue_wait_seconds
+        )
+    finally:
+        discard_recordings({"recordings": audio_paths})
+
+def group_response(meeting_id: str, record: Dict) -> MeetingGroupResponse:
+    collecting = record.get("stage") == "collecting"
+    return MeetingGroupResponse(
+        meeting_id=meeting_id,
+        status=record["status"],
+        stage=record.get("stage"),
+        recordings=len(record["recordings"]),
+        expected_recordings=record.get("expected_recordings"),
+        message="Waiting for more recordings." if collecting else "Recordings merged into one meeting for processing."
+    )
+
+async def abandon_group(meeting_id: str):
+    """Stop waiting on a group that is being deleted, dropping its uploads"""
+    timer = group_timers.pop(meeting_id, None)
+    if timer is not None:
+        timer.cancel()
+    record = await job_store.get(meeting_id)
+    if record is not None and record.get("stage") == "collecting":
+        # Once queued, the pipeline removes them itself
+        discard_recordings(record)
+
+def discard_recordings(record: Optional[Dict]):
+    """Remove a group's spooled uploads"""
+    for path in (record or {}).get("recordings") or []:
+        if os.path.exists(path):
+            os.remove(path)
+
+BATCH_UPLOAD_BODY = {
+    "requestBody": {
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "audio_files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "archive": {"type": "string", "format": "binary", "description": "A .zip of recordings"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+@app.post("/api/batches", response_model=BatchResponse, openapi_extra=BATCH_UPLOAD_BODY)
+async def upload_batch(request: Request):
+    """
+    Upload many recordings at once, as repeated `audio_files` parts or a zip `archive`
+    Each recording becomes a meeting, processed in the batch lane: batch
+    meetings share a few pipeline slots and only start when no interactive
+    upload is waiting. Follow them all at /api/batches/{batch_id} and download
+    every report in one zip from /api/batches/{batch_id}/download.
+    """
+    try:
+        scheduler.ensure_batch_capacity(1)
+    except QueueFull as e:
+        raise queue_full_error(e)
+    
+    batch_id = f"batch-{uuid.uuid4()}"
+    counter = itertools.count(1)
+    spool_path_for = lambda filename: f"/tmp/{batch_id}_{next(counter):03d}_{filename}"
+    recordings, skipped = [], []
+    try:
+        uploads = await stream_uploads_to_disk(
+            request,
+            spool_path_for,
+            field_names=("audio_files", "audio_file", "archive"),
+            max_files=BATCH_MAX_FILES,
+            max_total_bytes=BATCH_MAX_BYTES,
+            allow_archives=True,
+        )
+        for index, upload in enumerate(uploads):
+            if upload.audio_format != "zip":
+                recordings.append(upload)
+                continue
+            try:
+                extracted, skipped_here = await asyncio.to_thread(
+                    extract_archive, upload.path, spool_path_for, BATCH_MAX_FILES - len(recordings))
+            except UploadRejected:
+                discard_uploads(recordings + uploads[index:])
+                raise
+            os.remove(upload.path)
+            recordings += extracted
+            skipped += skipped_here
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    if not recordings:
+        raise HTTPException(400, "No recordings found in the upload")
+    try:
+        scheduler.ensure_batch_capacity(len(recordings))
+    except QueueFull as e:
+        discard_uploads(recordings)
+        raise queue_full_error(e)
+    
+    meetings = []
+    for recording in recordings:
+        meeting_id = str(uuid.uuid4())
+        await job_store.create(
+            meeting_id,
+            status="pending",
+            stage="queued",
+            progress=0,
+            temp_path=recording.path,
+            batch_id=batch_id
+        )
+        trace = MeetingTrace(meeting_id)
+        trace.add(upload_bytes=recording.size)
+        scheduler.submit_batch(batch_id, meeting_id, process_meeting_async, meeting_id, recording.path,
+                               recording.sha256, trace=trace)
+        meetings.append({"meeting_id": meeting_id, "filename": recording.filename})
+    await job_store.create(batch_id, status="processing", meetings=meetings, skipped=skipped)
+    
+    return BatchResponse(
+        batch_id=batch_id,
+        status="processing",
+        total=len(meetings),
+        counts={"pending": len(meetings)},
+        meetings=[BatchMeeting(status="pending", stage="queued", progress=0, **meeting) for meeting in meetings],
+        skipped=skipped,
+        message=f"{len(meetings)} recordings queued for processing."
+    )
+
+@app.get("/api/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: str):
+    """Status of every meeting in a batch, with totals"""
+    batch, meetings = await batch_meetings(batch_id)
+    return BatchResponse(
+        batch_id=batch_id,
+        **summarize_batch(meetings),
+        meetings=[BatchMeeting(**meeting) for meeting in meetings],
+        skipped=batch.get("skipped") or []
+    )
+
+@app.get("/api/batches/{batch_id}/download")
+async def download_batch(batch_id: str):
+    """
+    Every finished meeting's reports in one zip, streamed as it is built
+    One folder per recording, plus batch.json with each meeting's status
+    """
+    batch, meetings = await batch_meetings(batch_id)
+    manifest = dict(batch_id=batch_id, **summarize_batch(meetings), skipped=batch.get("skipped") or [])
+    return StreamingResponse(
+        stream_results_archive(meetings, job_store.get_results, manifest),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=dogwhistle_{batch_id}.zip"}
+    )
+
+@app.delete("/api/batches/{batch_id}")
+async def delete_batch(batch_id: str):
+    """Cancel a batch's waiting meetings and delete all of its meetings' data"""
+    batch, meetings = await batch_meetings(batch_id)
+    cancelled = set(scheduler.cancel_batch(batch_id))
+    for meeting in meetings:
+        record = await job_store.get(meeting["meeting_id"])
+        if meeting["meeting_id"] in cancelled and record and os.path.exists(record.get("temp_path") or ""):
+            os.remove(record["temp_path"])
+        await job_store.delete(meeting["meeting_id"])
+        await forget_meeting(meeting["meeting_id"], record)
+    await job_store.delete(batch_id)
+    return {"message": f"Batch deleted ({len(cancelled)} meetings cancelled before processing)"}
+
+async def batch_meetings(batch_id: str):
+    """A batch's record and the current status of each of its meetings"""
+    batch = await job_store.get(batch_id)
+    if batch is None or not batch_id.startswith("batch-") or "meetings" not in batch:
+        raise HTTPException(404, "Batch not found")
+    meetings = []
+    for meeting in batch["meetings"]:
+        record = await job_store.get(meeting["meeting_id"]) or {"status": "deleted"}
+        meetings.append(dict(
+            meeting,
+            status=record["status"],
+            stage=record.get("stage"),
+            progress=record.get("progress"),
+            message=record.get("error"),
+        ))
+    return batch, meetings
 
 @app.get("/api/meetings/{meeting_id}/status", response_model=MeetingStatusResponse)
 async def get_meeting_status(meeting_id: str):
@@ -158,9 +1011,11 @@ async def get_meeting_status(meeting_id: str):
     Check processing status
     iOS app polls this endpoint
     """
-    if meeting_id not in meeting_status:
+    status_info = await job_store.get(meeting_id)
+    if status_info is None:
+        if not DEMO_MODE:
+            raise HTTPException(404, "Meeting not found")
         # For demo: return completed status for any meeting ID
-        # This handles server restarts on Render
         return MeetingStatusResponse(
             meeting_id=meeting_id,
             status="completed",
@@ -168,22 +1023,97 @@ async def get_meeting_status(meeting_id: str):
             message="Demo mode - returning mock success"
         )
     
-    status_info = meeting_status[meeting_id]
+    # Live queue position when this worker holds the job, stored values otherwise
+    queue_info = scheduler.queue_info(meeting_id) or scheduler.batch_info(meeting_id) or {
+        "queue_position": status_info.get("queue_position"),
+        "queue_depth": scheduler.depth if status_info["status"] == "pending" else None,
+        "queue_wait_seconds": status_info.get("queue_wait_seconds"),
+    }
     
     return MeetingStatusResponse(
         meeting_id=meeting_id,
         status=status_info["status"],
+        stage=status_info.get("stage"),
         progress=status_info.get("progress"),
-        message=status_info.get("error") if status_info["status"] == "failed" else None
+        message=status_info.get("error") if status_info["status"] == "failed" else None,
+        partial_analysis=status_info.get("partial_analysis") if status_info["status"] == "processing" else None,
+        recordings=len(status_info["recordings"]) if "recordings" in status_info else None,
+        timings=status_info.get("timings"),
+        **queue_info
+    )
+
+@app.get("/api/meetings/{meeting_id}/live-transcript")
+async def get_live_transcript(meeting_id: str):
+    """The running transcript of a meeting being recorded live (empty before the first window)"""
+    text = await job_store.get_live_text(meeting_id)
+    if text is None:
+        raise HTTPException(404, "Meeting not found")
+    return {"meeting_id": meeting_id, "text": text}
+
+@app.get("/api/meetings/{meeting_id}/events")
+async def meeting_events(meeting_id: str, request: Request):
+    """
+    Server-Sent Events stream of processing progress
+    Sends each stage transition; the final completed event carries the results
+    """
+    if await job_store.get(meeting_id) is None:
+        raise HTTPException(404, "Meeting not found")
+    
+    return StreamingResponse(
+        stream_meeting_events(meeting_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+async def stream_meeting_events(meeting_id: str, request: Request):
+    """Yield SSE messages until the meeting completes, fails or the client leaves"""
+    queue = progress_broker.subscribe(meeting_id)
+    try:
+        record = await job_store.get(meeting_id)
+        event = stage_event(meeting_id, record) if record else None
+        last_sent = None
+        if event is not None and event["stage"] == "recording":
+            # Later transcript events continue from here
+            yield format_sse(transcript_event(meeting_id, 0, await job_store.get_live_text(meeting_id) or ""))
+        
+        while event is not None:
+            if event.get("type") == "transcript":
+                yield format_sse(event)
+            elif event != last_sent:
+                if event["stage"] in TERMINAL_STAGES:
+                    if event["stage"] == "completed":
+                        event["results"] = await load_results(meeting_id)
+                    yield format_sse(event)
+                    return
+                yield format_sse(event)
+                last_sent = event
+            
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENT_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # Progress may have been made by another worker
+                record = await job_store.get(meeting_id)
+                event = stage_event(meeting_id, record) if record else None
+                if event == last_sent:
+                    yield ": keepalive\n\n"
+    finally:
+        progress_broker.unsubscribe(meeting_id, queue)
+
 @app.get("/api/meetings/{meeting_id}/results")
-async def get_meeting_results(meeting_id: str):
+async def get_meeting_results(meeting_id: str, request: Request, fields: Optional[str] = None):
     """
     Get processed results
     Returns transcript, summary, action items, and follow-up questions
+    `fields` picks parts by dotted path (e.g. analysis.summary,transcript.word_count).
+    Responses are gzip/brotli compressed when accepted and carry an ETag;
+    send it back in If-None-Match to get a 304 when nothing changed.
     """
-    if meeting_id not in meeting_status:
+    status_info = await job_store.get(meeting_id)
+    if status_info is None:
+        if not DEMO_MODE:
+            raise HTTPException(404, "Meeting not found")
         # For demo: return mock results
         return {
             "transcript": "Welcome to the DogWhistle demo! This is a sample transcription of your recorded audio. In production, this would contain the actual transcribed content from your meeting.",
@@ -222,52 +1152,128 @@ Generated by DogWhistle AI - Hackathon Demo"""
             }
         }
     
-    status_info = meeting_status[meeting_id]
-    
     if status_info["status"] != "completed":
         raise HTTPException(400, f"Meeting processing not completed. Status: {status_info['status']}")
+    try:
+        paths = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     
-    return status_info["results"]
+    async def build():
+        results = await job_store.get_results(meeting_id)
+        if results is None:
+            raise HTTPException(404, "Meeting results not found")
+        if wants(paths, "text_outputs"):
+            results = dict(results, text_outputs=await render_cache.text_outputs(results))
+        return project(results, paths)
+    
+    # Served from the cache of serialized responses; the meeting's record
+    # timestamp tells when stored results may have changed
+    encoded = await response_cache.get(meeting_id, str(status_info["updated_at"]), paths,
+                                       negotiate_encoding(request.headers.get("accept-encoding")), build)
+    headers = {"ETag": encoded.etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), encoded.etag):
+        return Response(status_code=304, headers=headers)
+    if encoded.encoding:
+        headers["Content-Encoding"] = encoded.encoding
+    return Response(encoded.body, media_type="application/json", headers=headers)
+
+async def load_results(meeting_id: str) -> Optional[Dict]:
+    """Stored results plus the text reports the iOS app displays"""
+    results = await job_store.get_results(meeting_id)
+    if results is None:
+        return None
+    return dict(results, text_outputs=await render_cache.text_outputs(results))
 
 @app.get("/api/meetings/{meeting_id}/download")
-async def download_meeting_report(meeting_id: str):
+async def download_meeting_report(meeting_id: str, format: str = "combined"):
     """
-    Download the complete meeting report as a text file
+    Download a meeting report as a file
+    Formats: combined (default), summary, action_items, transcript, json
     Perfect for iOS app to save/display
     """
-    from fastapi.responses import PlainTextResponse
+    renderer = RENDERERS.get(format)
+    if renderer is None:
+        raise HTTPException(400, f"Unknown report format '{format}'. Available: {', '.join(RENDERERS)}")
     
-    if meeting_id not in meeting_status:
+    status_info = await job_store.get(meeting_id)
+    if status_info is None:
         raise HTTPException(404, "Meeting not found")
     
-    status_info = meeting_status[meeting_id]
-    
     if status_info["status"] != "completed":
         raise HTTPException(400, f"Meeting processing not completed. Status: {status_info['status']}")
     
-    # Get the combined report text
-    combined_report = status_info["results"]["text_outputs"]["combined_report"]
+    results = await job_store.get_results(meeting_id)
+    if results is None:
+        raise HTTPException(404, "Meeting results not found")
+    report = await render_cache.render(results, format)
     
-    # Return as downloadable text file
-    return PlainTextResponse(
-        content=combined_report,
-        media_type="text/plain",
+    # Return as downloadable file
+    return Response(
+        content=report,
+        media_type=renderer.media_type,
         headers={
-            "Content-Disposition": f"attachment; filename=dogwhistle_{meeting_id}.txt"
+            "Content-Disposition": f"attachment; filename=dogwhistle_{meeting_id}.{renderer.extension}"
         }
     )
 
+@app.get("/api/meetings/{meeting_id}/related", response_model=RelatedMeetingsResponse)
+async def get_related_meetings(meeting_id: str, limit: int = 5):
+    """The processed meetings most similar to this one, by transcript and analysis"""
+    status_info = await job_store.get(meeting_id)
+    if status_info is None:
+        raise HTTPException(404, "Meeting not found")
+    if status_info["status"] != "completed":
+        raise HTTPException(400, f"Meeting processing not completed. Status: {status_info['status']}")
+    
+    related = await related_index.related(meeting_id, limit)
+    if related is None:
+        # Processed before the index existed, or indexing failed: add it now
+        results = await job_store.get_results(meeting_id)
+        if results is None:
+            raise HTTPException(404, "Meeting results not found")
+        await related_index.add(meeting_id, results)
+        related = await related_index.related(meeting_id, limit)
+    return RelatedMeetingsResponse(meeting_id=meeting_id, related=related)
+
+@app.get("/api/search", response_model=SearchResponse)
+async def search_meetings(q: Optional[str] = None, fields: Optional[str] = None, owner: Optional[str] = None,
+                          due: Optional[str] = None, meeting_type: Optional[str] = None,
+                          limit: int = 20, offset: int = 0):
+    """
+    Search processed meetings, best match first
+    `q` matches words ("quoted phrases", prefix*) in transcripts, summaries,
+    action items, topics and meeting type; `fields` limits it to some of
+    these (comma-separated). `owner`, `due` and `meeting_type` filter, and
+    with owner/due each hit lists the action items that matched.
+    """
+    try:
+        return await search_index.search(
+            q,
+            fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+            owner=owner,
+            due_date=due,
+            meeting_type=meeting_type,
+            limit=limit,
+            offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
 @app.delete("/api/meetings/{meeting_id}")
 async def delete_meeting(meeting_id: str):
     """
     Handle consent revocation
     Deletes all meeting data
     """
-    if meeting_id not in meeting_status:
-        raise HTTPException(404, "Meeting not found")
-    
     # Delete from storage
-    del meeting_status[meeting_id]
+    await abandon_group(meeting_id)
+    abandon_upload(meeting_id)
+    abandon_live_session(meeting_id)
+    record = await job_store.get(meeting_id)
+    if not await job_store.delete(meeting_id):
+        raise HTTPException(404, "Meeting not found")
+    await forget_meeting(meeting_id, record)
     
     # In production: Also delete from S3, database, etc.
     
@@ -279,34 +1285,121 @@ async def consent_check(meeting_id: str, consent_given: bool):
     Post-meeting consent verification
     Part of DogWhistle's privacy-first approach
     """
-    if meeting_id not in meeting_status:
+    record = await job_store.get(meeting_id)
+    if record is None:
         raise HTTPException(404, "Meeting not found")
     
     if not consent_given:
         # Delete all data if consent not given
-        del meeting_status[meeting_id]
+        await abandon_group(meeting_id)
+        abandon_upload(meeting_id)
+        abandon_live_session(meeting_id)
+        await job_store.delete(meeting_id)
+        await forget_meeting(meeting_id, record)
         return {"message": "Meeting data deleted per user request"}
     
     # Mark as consented
-    meeting_status[meeting_id]["consented"] = True
+    await job_store.update(meeting_id, consented=True)
     return {"message": "Consent recorded"}
 
+@app.get("/api/meetings/{meeting_id}/profile", response_class=PlainTextResponse)
+async def get_meeting_profile(meeting_id: str):
+    """cProfile report for a meeting uploaded with profile=true"""
+    status_info = await job_store.get(meeting_id)
+    if status_info is None:
+        raise HTTPException(404, "Meeting not found")
+    if not status_info.get("profile"):
+        raise HTTPException(404, "No profile for this meeting")
+    return PlainTextResponse(status_info["profile"])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: stage durations, upload and Whisper sizes, tokens,
+    OpenAI latency, rate-limit waits and retries, plus queue gauges
+    """
+    queue = scheduler.stats()
+    gauges = {
+        "dogwhistle_queue_depth": queue["queue_depth"],
+        "dogwhistle_pipeline_running": queue["running"],
+        "dogwhistle_event_listeners": progress_broker.listener_count(),
+    }
+    return PlainTextResponse(render_metrics(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/queue/stats")
+async def queue_stats():
+    """Processing queue depth, throughput and wait times, plus OpenAI call health"""
+    stats = scheduler.stats()
+    if processor is not None and hasattr(processor.client, "stats"):
+        stats["openai"] = processor.client.stats()
+    return stats
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    Result cache hit/miss counters
+    Every hit is a Whisper or GPT-4o call that didn't have to be made
+    """
+    if processor is None:
+        raise HTTPException(503, "Processor not initialized")
+    return dict(processor.cache.stats(), reports=render_cache.stats(), responses=response_cache.stats())
+
 # Load API key and initialize processor on startup
 @app.on_event("startup")
 async def startup_event():
-    global processor
+    global processor, job_store, search_index, related_index
+    started = time.perf_counter()
     # Load API key from file if not already set
     if not os.getenv("OPENAI_API_KEY"):
         try:
-            with open("api_keys.txt", "r") as f:
-                api_key = f.read().strip().split("=")[1]
-            os.environ["OPENAI_API_KEY"] = api_key
+            os.environ["OPENAI_API_KEY"] = await asyncio.to_thread(openai_pool.read_api_key_file)
         except Exception as e:
             print(f"Warning: Could not load API key from file: {e}")
     
-    # Initialize processor
+    # Open the stores here rather than on import, so importing the app creates no files
+    opened = time.perf_counter()
+    if job_store is None:
+        job_store = await asyncio.to_thread(create_job_store)
+    if search_index is None:
+        search_index = await asyncio.to_thread(SearchIndex)
+    if related_index is None:
+        related_index = await asyncio.to_thread(RelatedMeetingsIndex)
+    startup_report["stores_seconds"] = round(time.perf_counter() - opened, 3)
+    
+    # Initialize processor; its OpenAI client is built when first used (or warmed)
     processor = DogWhistleProcessor()
-    print("✅ DogWhistle AI API started successfully!")
+    
+    await scheduler.start()
+    
+    # Periodically purge meetings past their TTL
+    run_in_background(evict_expired_meetings())
+    if WARM_ON_STARTUP:
+        run_in_background(openai_pool.warm_up())
+    startup_report["startup_seconds"] = round(time.perf_counter() - started, 3)
+    print(f"✅ DogWhistle AI API started successfully! (startup {startup_report['startup_seconds']}s)")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.stop()
+    await openai_pool.close()
+
+async def evict_expired_meetings():
+    """Background loop that keeps the job store bounded"""
+    while True:
+        try:
+            removed = await job_store.evict_expired()
+            if removed:
+                print(f"Evicted {removed} expired meetings")
+            await search_index.evict_older_than(JOB_TTL_SECONDS)
+            await related_index.evict_older_than(JOB_TTL_SECONDS)
+            idle = [meeting_id for meeting_id, upload in resumable_uploads.items()
+                    if not upload.lock.locked() and time.monotonic() - upload.last_active > UPLOAD_IDLE_SECONDS]
+            for meeting_id in idle:
+                abandon_upload(meeting_id)
+                await report_progress(meeting_id, "failed", error="Upload was abandoned before it finished")
+        except Exception as e:
+            print(f"Warning: job store eviction failed: {e}")
+        await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
 
 # For local development
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+"""
+DogWhistle Audio I/O
+Probing, decoding to mono PCM, and writing WAV files for the audio pipeline
+Uses the standard library for WAV and a local ffmpeg for everything else
+"""
+
+import os
+import shutil
+import subprocess
+import wave
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Whisper resamples everything to 16 kHz mono internally
+SPEECH_SAMPLE_RATE = 16000
+
+# Samples per block from pcm_blocks: a minute at 16 kHz, ~2MB as int16
+BLOCK_SAMPLES = 60 * SPEECH_SAMPLE_RATE
+
+
+def ffmpeg_available() -> bool:
+    """Check whether ffmpeg/ffprobe are on the PATH"""
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def is_pcm_wav(audio_file_path: str) -> bool:
+    """True for uncompressed 16-bit WAV files the wave module can read"""
+    try:
+        with wave.open(audio_file_path, "rb") as wav:
+            return wav.getsampwidth() == 2
+    except (wave.Error, EOFError, OSError):
+        return False
+
+
+def probe_duration(audio_file_path: str) -> Optional[float]:
+    """
+    Get the audio duration in seconds
+    Returns None when the duration can't be determined
+    """
+    if is_pcm_wav(audio_file_path):
+        with wave.open(audio_file_path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+
+    if not ffmpeg_available():
+        return None
+
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            audio_file_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def downmix(samples: np.ndarray, channels: int) -> np.ndarray:
+    """Average interleaved channels into a single mono channel"""
+    if channels == 1:
+        return samples.astype(np.float32)
+    frames = len(samples) // channels
+    return samples[:frames * channels].reshape(frames, channels).mean(axis=1, dtype=np.float32)
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling, good enough for speech"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples.astype(np.float32)
+    duration = len(samples) / float(source_rate)
+    target_length = int(round(duration * target_rate))
+    positions = np.arange(target_length, dtype=np.float64) * (source_rate / float(target_rate))
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def read_wav(audio_file_path: str):
+    """Read a 16-bit WAV file, returning (interleaved int16 samples, sample rate, channels)"""
+    with wave.open(audio_file_path, "rb") as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        raw = wav.readframes(wav.getnframes())
+    return np.frombuffer(raw, dtype="<i2"), sample_rate, channels
+
+
+def load_pcm(audio_file_path: str, sample_rate: int = SPEECH_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any supported audio file to mono int16 samples at `sample_rate`
+    WAV is handled in NumPy; other containers need ffmpeg
+    """
+    if is_pcm_wav(audio_file_path):
+        samples, source_rate, channels = read_wav(audio_file_path)
+        mono = resample(downmix(samples, channels), source_rate, sample_rate)
+        return np.clip(np.round(mono), -32768, 32767).astype(np.int16)
+
+    if not ffmpeg_available():
+        raise RuntimeError(f"ffmpeg is required to decode {os.path.basename(audio_file_path)}")
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-v", "error",
+            "-i", audio_file_path,
+            "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "-",
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype="<i2")
+
+
+def load_pcm_native(audio_file_path: str, fallback_rate: int = 48000):
+    """
+    Decode to mono int16 without resampling WAV, returning (samples, sample rate)
+    Other containers are decoded at `fallback_rate`, which keeps content up to 24 kHz
+    """
+    if is_pcm_wav(audio_file_path):
+        samples, sample_rate, channels = read_wav(audio_file_path)
+        mono = downmix(samples, channels)
+        return np.clip(np.round(mono), -32768, 32767).astype(np.int16), sample_rate
+    return load_pcm(audio_file_path, fallback_rate), fallback_rate
+
+
+def native_sample_rate(audio_file_path: str, fallback_rate: int = 48000) -> int:
+    """The rate load_pcm_native would decode at: a WAV's own, else `fallback_rate`"""
+    if is_pcm_wav(audio_file_path):
+        with wave.open(audio_file_path, "rb") as wav:
+            return wav.getframerate()
+    return fallback_rate
+
+
+def _wav_blocks(audio_file_path: str, sample_rate: int, block_samples: int) -> Iterator[np.ndarray]:
+    """Mono float blocks of a WAV file, resampled as one continuous signal"""
+    with wave.open(audio_file_path, "rb") as wav:
+        source_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        total = wav.getnframes()
+        source_block = max(1, int(block_samples * source_rate / sample_rate))
+        if source_rate == sample_rate:
+            while True:
+                raw = wav.readframes(source_block)
+                if not raw:
+                    return
+                yield downmix(np.frombuffer(raw, dtype="<i2"), channels)
+
+        # Same positions as resample() over the whole file; each block keeps its
+        # last sample so interpolation can continue across the boundary
+        step = source_rate / float(sample_rate)
+        target_length = int(round(total / float(source_rate) * sample_rate))
+        produced = 0
+        base = 0
+        carry = np.zeros(0, dtype=np.float32)
+        while produced < target_length:
+            raw = wav.readframes(source_block)
+            buffer = np.concatenate((carry, downmix(np.frombuffer(raw, dtype="<i2"), channels)))
+            if len(buffer) == 0:
+                return
+            end = base + len(buffer)
+            last = target_length if not raw else min(target_length, int((end - 1) / step) + 1)
+            positions = np.arange(produced, last, dtype=np.float64) * step - base
+            yield np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+            produced = last
+            base = end - 1
+            carry = buffer[-1:]
+
+
+def _ffmpeg_blocks(audio_file_path: str, sample_rate: int, block_samples: int) -> Iterator[np.ndarray]:
+    """int16 blocks read from an ffmpeg pipe as they are decoded"""
+    process = subprocess.Popen(
+        [
+            "ffmpeg", "-nostdin", "-v", "error",
+            "-i", audio_file_path,
+            "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            raw = process.stdout.read(block_samples * 2)
+            if not raw:
+                break
+            yield np.frombuffer(raw[:len(raw) // 2 * 2], dtype="<i2")
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not decode audio: {stderr.decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def pcm_blocks(audio_file_path: str, sample_rate: int = SPEECH_SAMPLE_RATE,
+               block_samples: int = BLOCK_SAMPLES) -> Iterator[np.ndarray]:
+    """
+    Decode like load_pcm, but yield mono int16 blocks of `block_samples`
+    (the last may be shorter) so memory doesn't grow with the recording
+    """
+    if is_pcm_wav(audio_file_path):
+        decoded = _wav_blocks(audio_file_path, sample_rate, block_samples)
+    elif ffmpeg_available():
+        decoded = _ffmpeg_blocks(audio_file_path, sample_rate, block_samples)
+    else:
+        raise RuntimeError(f"ffmpeg is required to decode {os.path.basename(audio_file_path)}")
+
+    pending = np.zeros(0, dtype=np.int16)
+    for block in decoded:
+        if block.dtype != np.int16:
+            block = np.clip(np.round(block), -32768, 32767).astype(np.int16)
+        pending = np.concatenate((pending, block)) if len(pending) else block
+        while len(pending) >= block_samples:
+            yield pending[:block_samples]
+            pending = pending[block_samples:]
+    if len(pending):
+        yield pending
+
+
+def write_wav(audio_file_path: str, samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE) -> str:
+    """Write mono int16 samples as a WAV file"""
+    with wave.open(audio_file_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+    return audio_file_path
+
+
+def write_wav_ranges(audio_file_path: str, ranges: List[Tuple[int, int, str]],
+                     sample_rate: int = SPEECH_SAMPLE_RATE) -> None:
+    """
+    Copy sample ranges of a recording into WAV files, decoding it block by block
+    `ranges` are (start, end, output path), sorted by start and by end; ranges
+    sharing a path are appended to it in order
+    """
+    blocks = pcm_blocks(audio_file_path, sample_rate)
+    writers = {}
+    remaining = {}
+    for _, _, path in ranges:
+        remaining[path] = remaining.get(path, 0) + 1
+    try:
+        first = 0
+        position = 0
+        for block in blocks:
+            block_end = position + len(block)
+            index = first
+            while index < len(ranges) and ranges[index][0] < block_end:
+                start, end, path = ranges[index]
+                if path not in writers:
+                    writers[path] = wave.open(path, "wb")
+                    writers[path].setnchannels(1)
+                    writers[path].setsampwidth(2)
+                    writers[path].setframerate(sample_rate)
+                writers[path].writeframes(block[max(start, position) - position:min(end, block_end) - position].tobytes())
+                if end <= block_end:
+                    remaining[path] -= 1
+                    if remaining[path] == 0:
+                        writers.pop(path).close()
+                    if index == first:
+                        first += 1
+                index += 1
+            position = block_end
+            if first == len(ranges):
+                break
+        # Ranges past the end of the audio still get their (short or empty) file
+        for start, end, path in ranges[first:]:
+            if path not in writers and remaining[path]:
+                write_wav(path, np.zeros(0, dtype=np.int16), sample_rate)
+                remaining[path] = 0
+    finally:
+        blocks.close()  # Stops ffmpeg if the last range ended early
+        for writer in writers.values():
+            writer.close()
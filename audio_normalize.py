@@ -0,0 +1,81 @@
+"""
+DogWhistle Audio Normalization
+Shrinks uploads to what Whisper actually needs before sending them:
+mono, 16 kHz, and (with ffmpeg) a low-bitrate Opus speech encoding
+
+Whisper resamples to 16 kHz mono itself, so a 48 kHz stereo WAV from the
+browser spends most of its upload bytes on audio that is thrown away.
+"""
+
+import os
+import subprocess
+import wave
+from dataclasses import dataclass
+
+from audio_io import SPEECH_SAMPLE_RATE, ffmpeg_available, is_pcm_wav, load_pcm, write_wav
+
+NORMALIZE_AUDIO = os.getenv("DOGWHISTLE_NORMALIZE_AUDIO", "1") == "1"
+
+# Opus at 24 kbps is transparent for speech: ~180 KB per minute
+SPEECH_BITRATE = os.getenv("DOGWHISTLE_SPEECH_BITRATE", "24k")
+
+
+@dataclass
+class NormalizedAudio:
+    """The file to upload, and what normalizing it saved"""
+    path: str
+    original_bytes: int
+    size_bytes: int
+    codec: str  # opus, pcm_s16le, or original when left untouched
+
+
+def encode_speech(audio_file_path: str, output_path: str, bitrate: str = SPEECH_BITRATE) -> str:
+    """Transcode to 16 kHz mono Opus in an Ogg container (needs ffmpeg)"""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-v", "error", "-y",
+            "-i", audio_file_path,
+            "-ac", "1", "-ar", str(SPEECH_SAMPLE_RATE),
+            "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+            output_path,
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not encode audio: {result.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def normalize_for_whisper(audio_file_path: str, output_dir: str) -> NormalizedAudio:
+    """
+    Produce the smallest faithful version of a recording for transcription
+    Uses ffmpeg when installed, a NumPy downmix/resample for WAV otherwise,
+    and falls back to the original file if neither makes it smaller
+    """
+    original_bytes = os.path.getsize(audio_file_path)
+    original = NormalizedAudio(audio_file_path, original_bytes, original_bytes, "original")
+    if not NORMALIZE_AUDIO:
+        return original
+
+    stem = os.path.splitext(os.path.basename(audio_file_path))[0]
+    if ffmpeg_available():
+        try:
+            path, codec = encode_speech(audio_file_path, os.path.join(output_dir, f"{stem}_speech.ogg")), "opus"
+        except RuntimeError as e:
+            print(f"Audio normalization skipped: {e}")
+            return original
+    elif is_pcm_wav(audio_file_path):
+        with wave.open(audio_file_path, "rb") as wav:
+            if wav.getnchannels() == 1 and wav.getframerate() == SPEECH_SAMPLE_RATE:
+                return original  # Already speech-rate PCM
+        samples = load_pcm(audio_file_path, SPEECH_SAMPLE_RATE)
+        path, codec = write_wav(os.path.join(output_dir, f"{stem}_16k.wav"), samples), "pcm_s16le"
+    else:
+        # Compressed formats can't be re-encoded without ffmpeg
+        return original
+
+    size_bytes = os.path.getsize(path)
+    if size_bytes >= original_bytes:
+        os.remove(path)
+        return original
+    return NormalizedAudio(path, original_bytes, size_bytes, codec)
@@ -0,0 +1,215 @@
+"""
+DogWhistle Audio Segmenter
+Splits long recordings into overlapping windows cut at quiet moments, and
+stitches the per-window Whisper transcripts back together in order
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE, pcm_blocks, write_wav_ranges
+
+# Whisper rejects single requests above 25MB
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+
+# 10 minutes of 16 kHz mono 16-bit WAV is ~19MB, safely under the limit
+WINDOW_SECONDS = float(os.getenv("DOGWHISTLE_WINDOW_SECONDS", "600"))
+
+# Audio shared by neighbouring windows so words at a cut aren't lost
+OVERLAP_SECONDS = float(os.getenv("DOGWHISTLE_OVERLAP_SECONDS", "4"))
+
+# How far back from the nominal cut to look for a pause
+SEARCH_SECONDS = 30.0
+
+FRAME_SECONDS = 0.05
+
+# Longest run of words the text fallback will treat as duplicated overlap
+MAX_OVERLAP_WORDS = 60
+
+
+@dataclass
+class AudioWindow:
+    """A slice of the recording sent to Whisper as one request"""
+    index: int
+    start: float  # Seconds where the window's audio begins
+    end: float  # Seconds where the window's audio ends
+    keep_from: float  # The stretch of the stitched transcript this window owns
+    keep_until: float
+    path: Optional[str] = None
+
+
+def needs_chunking(size_bytes: int, duration: Optional[float], window_seconds: float = WINDOW_SECONDS) -> bool:
+    """Decide whether a recording should be transcribed in windows"""
+    if size_bytes > WHISPER_MAX_BYTES:
+        return True
+    return duration is not None and duration > window_seconds
+
+
+def frame_energy(samples: np.ndarray, sample_rate: int, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames"""
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def quietest_point(energy: np.ndarray, start: float, end: float, frame_seconds: float = FRAME_SECONDS) -> float:
+    """Find the centre of the quietest half second between `start` and `end`"""
+    first = int(start / frame_seconds)
+    last = min(int(end / frame_seconds), len(energy))
+    region = energy[first:last]
+    if len(region) == 0:
+        return end
+
+    # Smooth so we land in a pause rather than a single quiet frame
+    width = max(1, min(len(region), int(0.5 / frame_seconds)))
+    smoothed = np.convolve(region, np.ones(width, dtype=np.float32) / width, mode="same")
+    return (first + int(np.argmin(smoothed)) + 0.5) * frame_seconds
+
+
+def plan_windows(
+    samples: np.ndarray,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    window_seconds: float = WINDOW_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+    search_seconds: float = SEARCH_SECONDS,
+) -> List[AudioWindow]:
+    """
+    Plan overlapping windows no longer than `window_seconds`
+    Each cut is placed at the quietest point near where the window would end
+    """
+    duration = len(samples) / float(sample_rate)
+    if duration <= window_seconds:
+        return [AudioWindow(0, 0.0, duration, 0.0, duration)]
+    return plan_windows_from_energy(frame_energy(samples, sample_rate), duration,
+                                    window_seconds, overlap_seconds, search_seconds)
+
+
+def plan_windows_from_energy(
+    energy: np.ndarray,
+    duration: float,
+    window_seconds: float = WINDOW_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+    search_seconds: float = SEARCH_SECONDS,
+) -> List[AudioWindow]:
+    """plan_windows for a recording already reduced to frame_energy"""
+    if duration <= window_seconds:
+        return [AudioWindow(0, 0.0, duration, 0.0, duration)]
+
+    half_overlap = overlap_seconds / 2
+
+    cuts = []
+    cursor = 0.0
+    while duration - cursor > window_seconds - half_overlap:
+        target = cursor + window_seconds - overlap_seconds
+        earliest = max(cursor + window_seconds / 2, target - search_seconds)
+        cut = quietest_point(energy, earliest, target)
+        cuts.append(cut)
+        cursor = cut
+
+    boundaries = [0.0] + cuts + [duration]
+    windows = []
+    for i in range(len(boundaries) - 1):
+        windows.append(AudioWindow(
+            index=i,
+            start=max(0.0, boundaries[i] - half_overlap),
+            end=min(duration, boundaries[i + 1] + half_overlap),
+            keep_from=boundaries[i],
+            keep_until=boundaries[i + 1],
+        ))
+    return windows
+
+
+def split_audio(
+    audio_file_path: str,
+    output_dir: str,
+    window_seconds: float = WINDOW_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+) -> List[AudioWindow]:
+    """
+    Decode a recording and write each planned window as a 16 kHz mono WAV
+    Decodes twice, a block at a time (blocks are whole frames): once for the
+    frame energy that places the cuts, once to copy the windows out
+    """
+    energy = []
+    total_samples = 0
+    for block in pcm_blocks(audio_file_path, SPEECH_SAMPLE_RATE):
+        energy.append(frame_energy(block, SPEECH_SAMPLE_RATE))
+        total_samples += len(block)
+    duration = total_samples / float(SPEECH_SAMPLE_RATE)
+    windows = plan_windows_from_energy(np.concatenate(energy) if energy else np.zeros(0, dtype=np.float32),
+                                       duration, window_seconds, overlap_seconds)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for window in windows:
+        window.path = os.path.join(output_dir, f"window_{window.index:03d}.wav")
+    write_wav_ranges(audio_file_path, [
+        (int(window.start * SPEECH_SAMPLE_RATE), int(window.end * SPEECH_SAMPLE_RATE), window.path)
+        for window in windows
+    ], SPEECH_SAMPLE_RATE)
+    return windows
+
+
+def _words(text: str) -> List[str]:
+    return [re.sub(r"[^\w']", "", word.lower()) for word in text.split()]
+
+
+def merge_overlapping_text(previous: str, following: str, max_words: int = MAX_OVERLAP_WORDS) -> str:
+    """
+    Join two transcripts whose audio overlapped
+    Drops the longest run of words that ends `previous` and starts `following`
+    """
+    if not previous:
+        return following.strip()
+    if not following:
+        return previous.strip()
+
+    before = _words(previous)
+    after_tokens = following.split()
+    after = _words(following)
+
+    for size in range(min(max_words, len(before), len(after)), 0, -1):
+        if before[-size:] == after[:size]:
+            return f"{previous.strip()} {' '.join(after_tokens[size:])}".strip()
+    return f"{previous.strip()} {following.strip()}"
+
+
+def stitch_transcripts(windows: List[AudioWindow], responses: List[Dict]) -> Tuple[str, List[Dict]]:
+    """
+    Combine per-window transcriptions into one transcript
+
+    `responses` holds each window's verbose Whisper output ({"text", "segments"}).
+    Segments are shifted to recording time and kept only by the window that owns
+    them; windows without segments fall back to removing duplicated words.
+    """
+    text = ""
+    segments = []
+
+    for window, response in zip(windows, responses):
+        window_segments = response.get("segments") or []
+        last = window is windows[-1]
+
+        if not window_segments:
+            text = merge_overlapping_text(text, response.get("text", ""))
+            continue
+
+        kept = []
+        for segment in window_segments:
+            start = window.start + float(segment["start"])
+            end = window.start + float(segment["end"])
+            middle = (start + end) / 2
+            if middle < window.keep_from or (middle >= window.keep_until and not last):
+                continue
+            kept.append({"start": round(start, 2), "end": round(end, 2), "text": segment["text"].strip()})
+
+        segments.extend(kept)
+        piece = " ".join(segment["text"] for segment in kept)
+        text = f"{text} {piece}".strip()
+
+    return text, segments
@@ -0,0 +1,162 @@
+"""
+DogWhistle Batch Uploads
+Many recordings in one request, either as repeated file parts or one zip
+archive, and all of their reports back as one streamed zip
+
+Each recording becomes an ordinary meeting; the batch just remembers which
+meetings it made so their status can be summed up and their results
+exported together.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from report_renderers import RENDERERS
+from upload_streaming import (MAX_UPLOAD_BYTES, SNIFF_BYTES, SUPPORTED_EXTENSIONS, SpooledUpload, UploadRejected,
+                              sniff_audio_format)
+
+# Recordings accepted in one batch
+BATCH_MAX_FILES = int(os.getenv("DOGWHISTLE_BATCH_MAX_FILES", "100"))
+
+# Total bytes of one batch request, and of the audio unpacked from an archive
+BATCH_MAX_BYTES = int(os.getenv("DOGWHISTLE_BATCH_MAX_MB", "4096")) * 1024 * 1024
+
+# Bytes copied at a time when unpacking an archive
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "recording"
+
+
+def extract_archive(archive_path: str, spool_path_for, max_files: int = BATCH_MAX_FILES,
+                    max_bytes: int = MAX_UPLOAD_BYTES,
+                    max_total_bytes: int = BATCH_MAX_BYTES) -> Tuple[List[SpooledUpload], List[str]]:
+    """
+    Unpack the recordings in a zip archive
+    Returns (recordings, skipped member names). Sizes are enforced on the bytes
+    actually inflated, not the sizes the archive claims.
+    """
+    uploads, skipped = [], []
+    total = 0
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or name.startswith(".") or "__MACOSX" in member.filename:
+                    continue
+                if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    skipped.append(member.filename)
+                    continue
+                if len(uploads) >= max_files:
+                    raise UploadRejected(400, f"Too many files. Maximum: {max_files}")
+
+                path = spool_path_for(name)
+                digest, size = hashlib.sha256(), 0
+                with archive.open(member) as source, open(path, "wb") as dest:
+                    header = source.read(SNIFF_BYTES)
+                    audio_format = sniff_audio_format(header)
+                    chunk = header
+                    while chunk:
+                        size += len(chunk)
+                        total += len(chunk)
+                        if size > max_bytes or total > max_total_bytes:
+                            dest.close()
+                            os.remove(path)
+                            raise UploadRejected(413, f"{member.filename} unpacks past the size limit")
+                        digest.update(chunk)
+                        dest.write(chunk)
+                        chunk = source.read(COPY_CHUNK_SIZE)
+                if audio_format is None:
+                    os.remove(path)
+                    skipped.append(member.filename)
+                    continue
+                uploads.append(SpooledUpload(path, name, size, audio_format, digest.hexdigest()))
+    except zipfile.BadZipFile:
+        discard_uploads(uploads)
+        raise UploadRejected(400, "Archive is not a valid zip file")
+    except BaseException:
+        discard_uploads(uploads)
+        raise
+    return uploads, skipped
+
+
+def discard_uploads(uploads: List[SpooledUpload]):
+    for upload in uploads:
+        if os.path.exists(upload.path):
+            os.remove(upload.path)
+
+
+def summarize_batch(meetings: List[Dict]) -> Dict:
+    """Aggregate the status of a batch's meetings"""
+    counts = {}
+    for meeting in meetings:
+        counts[meeting["status"]] = counts.get(meeting["status"], 0) + 1
+    finished = counts.get("completed", 0) + counts.get("failed", 0)
+    progress = sum(100 if meeting["status"] in ("completed", "failed") else meeting.get("progress") or 0
+                   for meeting in meetings)
+    return {
+        "total": len(meetings),
+        "counts": counts,
+        "finished": finished,
+        "progress": progress // max(1, len(meetings)),
+        "status": "completed" if finished == len(meetings) else "processing",
+    }
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that lets zipfile stream: written bytes are drained by the caller"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def _write_meeting(archive: zipfile.ZipFile, folder: str, results: Dict):
+    for renderer in RENDERERS.values():
+        archive.writestr(f"{folder}/{renderer.name}.{renderer.extension}", renderer.render(results))
+
+
+async def stream_results_archive(meetings: List[Dict],
+                                 load_results: Callable[[str], Awaitable[Optional[Dict]]],
+                                 manifest: Dict) -> AsyncIterator[bytes]:
+    """
+    Zip every finished meeting's reports, one folder per recording, plus a
+    batch.json of `manifest` and each meeting's status (and folder)
+    Only one meeting's reports are held in memory at a time
+    """
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    for index, meeting in enumerate(meetings):
+        results = await load_results(meeting["meeting_id"]) if meeting["status"] == "completed" else None
+        if results is None:
+            continue
+        folder = f"{index + 1:03d}_{_safe_name(os.path.splitext(meeting['filename'])[0])}"
+        meeting["folder"] = folder
+        await asyncio.to_thread(_write_meeting, archive, folder, results)
+        yield sink.drain()
+    archive.writestr("batch.json", json.dumps(dict(manifest, meetings=meetings), indent=2))
+    archive.close()
+    yield sink.drain()
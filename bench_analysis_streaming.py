@@ -0,0 +1,95 @@
+"""
+Benchmark time to first useful analysis content, streamed vs buffered
+Replays a realistic gpt-4o analysis through a stubbed client that emits
+tokens at a fixed rate, and records when the first field (the brief
+summary) and the complete analysis become available.
+
+Usage: python bench_analysis_streaming.py [--tokens-per-second 60] [--first-token 0.6]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from dogwhistle_ai_processor import DogWhistleProcessor
+
+ANALYSIS = {
+    "summary": {
+        "brief": "The team agreed to ship the v2 onboarding flow next sprint and to cut the legacy importer.",
+        "detailed": " ".join(["The group walked through the onboarding metrics, the importer's support load, "
+                              "and the staffing plan for the next two sprints."] * 6),
+    },
+    "action_items": [
+        {"task": f"Follow up on item {i} from the roadmap review", "owner": "Dana", "due_date": "Friday", "priority": "medium"}
+        for i in range(8)
+    ],
+    "follow_up_questions": [f"How should we measure the impact of change {i}?" for i in range(5)],
+    "key_insights": [f"Insight {i}: onboarding drop-off is concentrated in step {i}" for i in range(5)],
+    "topics_discussed": ["onboarding", "importer", "staffing", "metrics"],
+    "sentiment": "positive",
+    "meeting_type": "planning",
+}
+
+CHARS_PER_TOKEN = 4
+
+
+def stub_client(tokens_per_second: float, first_token: float):
+    content = json.dumps(ANALYSIS, indent=2)
+    token_interval = 1 / tokens_per_second
+
+    async def token_stream():
+        await asyncio.sleep(first_token)
+        for i in range(0, len(content), CHARS_PER_TOKEN):
+            await asyncio.sleep(token_interval)
+            delta = SimpleNamespace(content=content[i:i + CHARS_PER_TOKEN])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def create(stream=False, **kwargs):
+        if stream:
+            return token_stream()
+        # The buffered call returns only once every token has been generated
+        await asyncio.sleep(first_token + token_interval * len(content) / CHARS_PER_TOKEN)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+async def main(tokens_per_second: float, first_token: float):
+    processor = DogWhistleProcessor()
+    processor.client = stub_client(tokens_per_second, first_token)
+
+    started = time.perf_counter()
+    buffered = await processor.analyze_transcript("transcript")
+    buffered_total = time.perf_counter() - started
+
+    first_content = None
+
+    async def on_progress(stage, progress, **details):
+        nonlocal first_content
+        if first_content is None:
+            first_content = time.perf_counter() - started
+
+    started = time.perf_counter()
+    streamed = await processor.analyze_transcript_streaming("transcript", on_progress)
+    streamed_total = time.perf_counter() - started
+
+    assert json.dumps(streamed) == json.dumps(buffered)
+    print(f"{tokens_per_second:.0f} tokens/s, {first_token:.1f}s to first token\n")
+    print(f"{'mode':<12}{'first content':>15}{'complete':>11}")
+    print("-" * 38)
+    print(f"{'buffered':<12}{buffered_total:>14.2f}s{buffered_total:>10.2f}s")
+    print(f"{'streamed':<12}{first_content:>14.2f}s{streamed_total:>10.2f}s")
+    print(f"\nFirst content after {first_content / buffered_total:.0%} of the buffered latency; results identical")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens-per-second", type=float, default=60)
+    parser.add_argument("--first-token", type=float, default=0.6)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens_per_second, args.first_token))
@@ -0,0 +1,62 @@
+"""
+Benchmark merging one meeting recorded on several phones
+Synthesizes a meeting, gives each phone its own start offset, distance and
+noise, then times merge_recordings. This is the only extra work a group
+adds: the merged track is transcribed and analyzed once, like one recording.
+
+Usage: python bench_group.py [--minutes 60] [--phones 3]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE, write_wav
+from bench_vad import synth_meeting
+from meeting_group import merge_recordings
+
+
+def main(minutes: float, phones: int):
+    rate = SPEECH_SAMPLE_RATE
+    rng = np.random.default_rng(1)
+    meeting = synth_meeting(minutes + 1).astype(np.float32)
+    work_dir = tempfile.mkdtemp(prefix="bench_group_")
+    paths, starts = [], []
+    for phone in range(phones):
+        start = float(rng.uniform(0, 30))
+        level = rng.uniform(0.2, 1.0)
+        audio = meeting[int(start * rate):int((start + minutes * 60) * rate)] * level
+        audio += rng.normal(0, rng.uniform(20, 200), len(audio))
+        path = os.path.join(work_dir, f"phone{phone}.wav")
+        write_wav(path, np.clip(audio, -32768, 32767).astype(np.int16))
+        paths.append(path)
+        starts.append(start)
+
+    try:
+        started = time.perf_counter()
+        merged = merge_recordings(paths, os.path.join(work_dir, "merged.wav"))
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Phones that started later are offset further into the merged timeline
+    expected = [start - min(starts) for start in starts]
+    error_ms = max(abs(got - want) for got, want in zip(merged.offsets, expected)) * 1000
+    print(f"{phones} phones x {minutes:.0f} minutes of 16 kHz mono audio\n")
+    print(f"merge_recordings   {elapsed:>8.2f} s  ({elapsed / (minutes / 60):.2f} s per meeting hour)")
+    print(f"alignment error    {error_ms:>8.2f} ms (worst phone)")
+    print(f"merged duration    {merged.duration / 60:>8.1f} min, sent to Whisper once")
+    for phone, seconds in sorted(merged.sources_used.items()):
+        print(f"  phone {phone}          {seconds / 60:>8.1f} min chosen")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--phones", type=int, default=3)
+    args = parser.parse_args()
+    main(args.minutes, args.phones)
@@ -0,0 +1,249 @@
+"""
+End-to-end load benchmark against a local fake OpenAI
+Runs the app in-process with its real pipeline, pointed at fake_openai with
+configurable latency distributions, error rate and rate limits, and drives N
+concurrent clients through upload -> status polling -> results.
+
+Prints a JSON report (throughput, p50/p95/p99 per endpoint, event-loop lag,
+peak RSS, queue and OpenAI stats) so runs can be compared commit to commit.
+
+Latency specs: a constant ("0.2"), "uniform:LOW:HIGH", "lognormal:MEDIAN:SIGMA"
+or "exp:MEAN", in seconds.
+
+Usage: python bench_load.py [--clients 20] [--meetings-per-client 3]
+           [--whisper-latency lognormal:1.5:0.5] [--chat-latency lognormal:3:0.4]
+           [--error-rate 0.02] [--output load.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+_workdir = tempfile.mkdtemp(prefix="dogwhistle_load_")
+os.environ.setdefault("DOGWHISTLE_JOB_DB", os.path.join(_workdir, "jobs.db"))
+os.environ.setdefault("DOGWHISTLE_SEARCH_DB", os.path.join(_workdir, "search.db"))
+os.environ.setdefault("DOGWHISTLE_RELATED_DIR", os.path.join(_workdir, "related_index"))
+os.environ.setdefault("DOGWHISTLE_WARM_ON_STARTUP", "0")  # Stubbed client; nothing to connect to
+os.environ.setdefault("DOGWHISTLE_CACHE_DIR", os.path.join(_workdir, "cache"))
+os.environ.setdefault("DOGWHISTLE_QUEUE_SIZE", "1000")
+
+import httpx
+from openai import AsyncOpenAI
+
+import app as dogwhistle_app
+from audio_io import SPEECH_SAMPLE_RATE
+from bench_vad import synth_meeting
+from dogwhistle_ai_processor import DogWhistleProcessor
+from fake_openai import create_fake_openai
+from openai_limiter import CHAT_RPM, CHAT_TPM, WHISPER_RPM, RateLimitedClient
+
+# How often the lag monitor expects to wake up
+LAG_PROBE_SECONDS = 0.01
+
+
+def latency_distribution(spec: str, rng: random.Random):
+    """Parse a latency spec into a function returning seconds"""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(":")] if params else []
+    if not params:
+        constant = float(kind)
+        return lambda: constant
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(values_ms):
+    if not values_ms:
+        return {"count": 0}
+    return {
+        "count": len(values_ms),
+        "p50_ms": round(percentile(values_ms, 50), 2),
+        "p95_ms": round(percentile(values_ms, 95), 2),
+        "p99_ms": round(percentile(values_ms, 99), 2),
+        "max_ms": round(max(values_ms), 2),
+    }
+
+
+def recording_bytes(seconds: float) -> bytes:
+    """A 16 kHz mono WAV of synthetic speech with pauses"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SPEECH_SAMPLE_RATE)
+        wav.writeframes(synth_meeting(seconds / 60).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def unique_copy(recording: bytes) -> bytes:
+    """Change a few samples so every upload misses the result cache"""
+    return recording[:-64] + os.urandom(64)
+
+
+async def monitor_loop_lag(lags_ms, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_SECONDS)
+        lags_ms.append(max(0.0, (time.perf_counter() - started - LAG_PROBE_SECONDS) * 1000))
+
+
+async def timed(latencies, endpoint: str, request):
+    started = time.perf_counter()
+    response = await request
+    latencies[endpoint].append((time.perf_counter() - started) * 1000)
+    return response
+
+
+async def run_client(client, recording: bytes, meetings: int, poll_interval: float, latencies, outcomes):
+    for _ in range(meetings):
+        started = time.perf_counter()
+        while True:
+            response = await timed(latencies, "upload", client.post(
+                "/api/meetings/upload",
+                files={"audio_file": ("meeting.wav", unique_copy(recording), "audio/wav")},
+            ))
+            if response.status_code != 503:
+                break
+            outcomes["rejected"] += 1
+            await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+        if response.status_code != 200:
+            outcomes["upload_errors"] += 1
+            continue
+        meeting_id = response.json()["meeting_id"]
+
+        while True:
+            await asyncio.sleep(poll_interval)
+            status = await timed(latencies, "status", client.get(f"/api/meetings/{meeting_id}/status"))
+            if status.json()["status"] in ("completed", "failed"):
+                break
+        if status.json()["status"] == "failed":
+            outcomes["failed"] += 1
+            continue
+
+        await timed(latencies, "results", client.get(f"/api/meetings/{meeting_id}/results"))
+        outcomes["completed"] += 1
+        outcomes["meeting_ms"].append((time.perf_counter() - started) * 1000)
+
+
+def git_commit() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return result.stdout.strip() or "unknown"
+
+
+async def main(args) -> dict:
+    rng = random.Random(args.seed)
+    counter = iter(range(1, sys.maxsize))
+    fake = create_fake_openai(
+        requests_per_minute=args.fake_rpm or None,
+        tokens_per_minute=args.fake_tpm or None,
+        error_rate=args.error_rate,
+        latency=latency_distribution(args.whisper_latency, rng),
+        chat_latency=latency_distribution(args.chat_latency, rng),
+        # Distinct transcripts so analyses aren't served from the cache either
+        transcript=lambda: f"Meeting {next(counter)}: Dana will ship the migration by Friday.",
+        seed=args.seed,
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await dogwhistle_app.startup_event()
+    processor = DogWhistleProcessor()
+    processor.client = RateLimitedClient(AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake-openai/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)),
+        max_retries=0,
+    ), whisper_rpm=args.whisper_rpm, chat_rpm=args.chat_rpm, chat_tpm=args.chat_tpm)
+    dogwhistle_app.processor = processor
+
+    # Reports land in the scratch directory, not the repo
+    os.chdir(_workdir)
+    recording = recording_bytes(args.recording_seconds)
+    latencies = {"upload": [], "status": [], "results": []}
+    outcomes = {"completed": 0, "failed": 0, "rejected": 0, "upload_errors": 0, "meeting_ms": []}
+    lags_ms = []
+    stop = asyncio.Event()
+
+    transport = httpx.ASGITransport(app=dogwhistle_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        monitor = asyncio.create_task(monitor_loop_lag(lags_ms, stop))
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence pipeline logging
+            await asyncio.gather(*(
+                run_client(client, recording, args.meetings_per_client, args.poll_interval, latencies, outcomes)
+                for _ in range(args.clients)
+            ))
+        wall = time.perf_counter() - started
+        stop.set()
+        await monitor
+
+    await dogwhistle_app.shutdown_event()
+    return {
+        "commit": git_commit(),
+        "config": vars(args),
+        "wall_seconds": round(wall, 2),
+        "throughput_meetings_per_minute": round(outcomes["completed"] / wall * 60, 2),
+        "meetings": {
+            "completed": outcomes["completed"],
+            "failed": outcomes["failed"],
+            "rejected_uploads": outcomes["rejected"],
+            "upload_errors": outcomes["upload_errors"],
+            "end_to_end": summarize(outcomes["meeting_ms"]),
+        },
+        "endpoints": {endpoint: summarize(values) for endpoint, values in latencies.items()},
+        "event_loop_lag": summarize(lags_ms),
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "queue": dogwhistle_app.scheduler.stats(),
+        "openai_client": processor.client.stats(),
+        "fake_openai": dict(fake.state.stats, peak_in_flight=fake.state.peak_in_flight),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--meetings-per-client", type=int, default=3)
+    parser.add_argument("--recording-seconds", type=float, default=30)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--whisper-latency", default="lognormal:1.5:0.5")
+    parser.add_argument("--chat-latency", default="lognormal:3:0.4")
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--fake-rpm", type=float, default=0, help="Fake API request limit (0 = none)")
+    parser.add_argument("--fake-tpm", type=float, default=0, help="Fake API token limit (0 = none)")
+    parser.add_argument("--whisper-rpm", type=float, default=WHISPER_RPM, help="Client-side Whisper limit")
+    parser.add_argument("--chat-rpm", type=float, default=CHAT_RPM, help="Client-side chat request limit")
+    parser.add_argument("--chat-tpm", type=float, default=CHAT_TPM, help="Client-side chat token limit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
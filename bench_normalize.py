@@ -0,0 +1,91 @@
+"""
+Benchmark audio normalization: bytes and time saved per minute of audio
+Synthesizes speech-like recordings in the formats browsers and iOS produce,
+normalizes them, and estimates the upload time saved at a given uplink.
+
+Usage: python bench_normalize.py [--minutes 5] [--uplink-mbps 10]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import audio_normalize
+from audio_io import ffmpeg_available
+from audio_segmenter import WHISPER_MAX_BYTES
+from audio_normalize import normalize_for_whisper
+
+SOURCES = [
+    ("44.1 kHz stereo WAV", 44100, 2),
+    ("48 kHz stereo WAV", 48000, 2),
+    ("48 kHz mono WAV", 48000, 1),
+]
+
+
+def synth_speech(path: str, minutes: float, rate: int, channels: int, seed: int = 0):
+    """Band-limited noise gated at syllable rate, a rough stand-in for speech"""
+    rng = np.random.default_rng(seed)
+    count = int(minutes * 60 * rate)
+    t = np.arange(count) / rate
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t) + 0.3 * np.sin(2 * np.pi * 0.5 * t), 0, None)
+    voice = np.convolve(rng.standard_normal(count), np.ones(8) / 8, mode="same")
+    samples = (6000 * envelope * voice).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(samples, channels).tobytes())
+
+
+def run(label: str, path: str, minutes: float, uplink_mbps: float, work_dir: str):
+    started = time.perf_counter()
+    speech = normalize_for_whisper(path, work_dir)
+    elapsed = time.perf_counter() - started
+
+    per_minute = lambda value: value / minutes
+    upload_before = speech.original_bytes * 8 / (uplink_mbps * 1e6)
+    upload_after = speech.size_bytes * 8 / (uplink_mbps * 1e6)
+    saved = per_minute(upload_before - upload_after - elapsed)
+    fits = WHISPER_MAX_BYTES / per_minute(speech.size_bytes)
+    print(
+        f"{label:<22}{speech.codec:<11}{per_minute(speech.original_bytes) / 1e6:>8.2f}MB"
+        f"{per_minute(speech.size_bytes) / 1e6:>8.2f}MB{speech.original_bytes / speech.size_bytes:>7.1f}x"
+        f"{per_minute(elapsed) * 1000:>9.0f}ms{saved:>9.2f}s{fits:>9.0f}"
+    )
+
+
+def main(minutes: float, uplink_mbps: float):
+    work_dir = tempfile.mkdtemp(prefix="dogwhistle_bench_")
+    try:
+        paths = []
+        for i, (label, rate, channels) in enumerate(SOURCES):
+            path = os.path.join(work_dir, f"source_{i}.wav")
+            synth_speech(path, minutes, rate, channels, seed=i)
+            paths.append((label, path))
+
+        modes = [("NumPy", False)] + ([("ffmpeg", True)] if ffmpeg_available() else [])
+        print(f"{minutes:g} minutes of audio per source, {uplink_mbps:g} Mbps uplink; figures per minute of audio\n")
+        print(f"{'source':<22}{'codec':<11}{'before':>10}{'after':>10}{'ratio':>8}{'encode':>11}"
+              f"{'saved':>10}{'min/25MB':>9}")
+        print("-" * 91)
+        for mode, use_ffmpeg in modes:
+            audio_normalize.ffmpeg_available = lambda use_ffmpeg=use_ffmpeg: use_ffmpeg
+            for label, path in paths:
+                run(label, path, minutes, uplink_mbps, work_dir)
+        if not ffmpeg_available():
+            print("\nffmpeg not installed: Opus encoding (~0.18 MB/min) not measured")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--uplink-mbps", type=float, default=10)
+    args = parser.parse_args()
+    main(args.minutes, args.uplink_mbps)
@@ -0,0 +1,140 @@
+"""
+Benchmark cold-start cost: importing the app, and the first OpenAI request
+Each measurement runs in a fresh interpreter, as a cold start would.
+
+Import time is compared with also loading the modules the app used to import
+eagerly (openai, httpx, aiohttp). First-request latency is measured after the
+startup event, with the connection pool cold and after openai_pool.warm_up().
+By default requests go to a local fake OpenAI (plain HTTP, so only the SDK
+import and TCP setup show); pass --base-url https://api.openai.com/v1 with a
+real OPENAI_API_KEY to include DNS and TLS.
+
+Usage: python bench_startup.py [--runs 5] [--base-url URL]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def child_env(workdir: str, base_url: str) -> dict:
+    env = dict(os.environ, OPENAI_BASE_URL=base_url, DOGWHISTLE_WARM_ON_STARTUP="0",
+               DOGWHISTLE_JOB_DB=os.path.join(workdir, "jobs.db"),
+               DOGWHISTLE_SEARCH_DB=os.path.join(workdir, "search.db"),
+               DOGWHISTLE_RELATED_DIR=os.path.join(workdir, "related_index"),
+               DOGWHISTLE_CACHE_DIR=os.path.join(workdir, "cache"))
+    env.setdefault("OPENAI_API_KEY", "bench")
+    return env
+
+
+def run_child(mode: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--child", mode], cwd=HERE, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def child(mode: str) -> dict:
+    started = time.perf_counter()
+    if mode == "eager":
+        # What app.py used to pull in; aiohttp is no longer a requirement
+        for name in ("openai", "httpx", "aiohttp"):
+            try:
+                __import__(name)
+            except ImportError:
+                pass
+    import app
+    import openai_pool
+    measured = {"import_seconds": time.perf_counter() - started}
+    if mode == "eager":
+        return measured
+
+    await app.startup_event()
+    if mode == "warm":
+        warmup = await openai_pool.warm_up()
+        measured["warmup_seconds"] = warmup["seconds"]
+    sending = time.perf_counter()
+    try:
+        await app.processor.client.chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "ping"}], max_tokens=1)
+    except Exception as e:
+        measured["error"] = f"{type(e).__name__}: {e}"
+    measured["first_request_seconds"] = time.perf_counter() - sending
+    await app.shutdown_event()
+    return measured
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Fake OpenAI did not start")
+
+
+def summarize(samples: list, key: str) -> str:
+    values = [sample[key] * 1000 for sample in samples if key in sample]
+    if not values:
+        return "n/a"
+    return f"median {statistics.median(values):7.1f} ms  (min {min(values):.1f}, max {max(values):.1f})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--base-url", help="OpenAI-compatible API to call (default: a local fake)")
+    parser.add_argument("--child", choices=("eager", "cold", "warm"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(child(args.child))))
+        return
+
+    fake = None
+    base_url = args.base_url
+    if base_url is None:
+        port = free_port()
+        fake = subprocess.Popen([sys.executable, "-m", "uvicorn", "fake_openai:app", "--port", str(port),
+                                 "--log-level", "warning"], cwd=HERE)
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}/v1"
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="dogwhistle_bench_") as workdir:
+            env = child_env(workdir, base_url)
+            results = {mode: [run_child(mode, env) for _ in range(args.runs)] for mode in ("eager", "cold", "warm")}
+    finally:
+        if fake is not None:
+            fake.terminate()
+            fake.wait()
+
+    print(f"Cold start, {args.runs} fresh interpreters each, against {base_url}")
+    print(f"  import app + openai/httpx/aiohttp (old)  {summarize(results['eager'], 'import_seconds')}")
+    print(f"  import app (deferred SDK)                {summarize(results['cold'], 'import_seconds')}")
+    print(f"  first request, cold pool                 {summarize(results['cold'], 'first_request_seconds')}")
+    print(f"  pool warm-up                             {summarize(results['warm'], 'warmup_seconds')}")
+    print(f"  first request, after warm-up             {summarize(results['warm'], 'first_request_seconds')}")
+    errors = {sample["error"] for samples in results.values() for sample in samples if "error" in sample}
+    for error in errors:
+        print(f"  error: {error}")
+
+
+if __name__ == "__main__":
+    main()
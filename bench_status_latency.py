@@ -0,0 +1,167 @@
+"""
+Benchmark /status latency while meeting reports are being written
+Runs the app in-process with a stubbed OpenAI client, processes a burst of
+meetings with large transcripts, and polls /status the whole time.
+
+Compares writing reports on a worker thread (current) with writing them
+directly on the event loop (the old behaviour).
+
+Usage: python bench_status_latency.py [--meetings 50] [--transcript-words 300000]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+_workdir = tempfile.mkdtemp(prefix="dogwhistle_bench_")
+os.environ.setdefault("DOGWHISTLE_JOB_DB", os.path.join(_workdir, "jobs.db"))
+os.environ.setdefault("DOGWHISTLE_SEARCH_DB", os.path.join(_workdir, "search.db"))
+os.environ.setdefault("DOGWHISTLE_RELATED_DIR", os.path.join(_workdir, "related_index"))
+os.environ.setdefault("DOGWHISTLE_WARM_ON_STARTUP", "0")  # Stubbed client; nothing to connect to
+os.environ.setdefault("DOGWHISTLE_CACHE_DIR", os.path.join(_workdir, "cache"))
+os.environ.setdefault("DOGWHISTLE_QUEUE_SIZE", "1000")
+
+import httpx
+from openai.types.audio import Transcription
+
+import app as dogwhistle_app
+from dogwhistle_ai_processor import DogWhistleProcessor, write_text_files
+
+ANALYSIS = {
+    "summary": {"brief": "Weekly sync.", "detailed": "The team reviewed the roadmap."},
+    "action_items": [{"task": "Ship the migration", "owner": "Dana", "due_date": "Friday", "priority": "high"}],
+    "follow_up_questions": ["Who reviews the rollout?"],
+    "key_insights": ["Migration is on track"],
+    "topics_discussed": ["roadmap", "migration"],
+    "sentiment": "positive",
+    "meeting_type": "planning",
+}
+
+
+class BlockingWriteProcessor(DogWhistleProcessor):
+    """Renders and writes reports straight on the event loop, like the original code"""
+
+    async def format_results(self, transcript, analysis, meeting_id):
+        results, files = self.build_results(transcript, analysis, meeting_id)
+        write_text_files(files)
+        return results
+
+
+def stub_client(transcript: str, api_latency: float):
+    async def transcribe(**kwargs):
+        await asyncio.sleep(api_latency)
+        return Transcription(text=transcript)
+
+    async def complete(stream=False, **kwargs):
+        await asyncio.sleep(api_latency)
+        content = json.dumps(ANALYSIS)
+        if stream:
+            return stream_chunks(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return SimpleNamespace(
+        audio=SimpleNamespace(transcriptions=SimpleNamespace(create=transcribe)),
+        chat=SimpleNamespace(completions=SimpleNamespace(create=complete)),
+    )
+
+
+async def stream_chunks(content: str, size: int = 16):
+    for i in range(0, len(content), size):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + size]))])
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_mode(client, processor, meetings: int) -> dict:
+    dogwhistle_app.processor = processor
+
+    # A meeting to poll that isn't itself being processed
+    probe = await client.post(
+        "/api/meetings/upload",
+        files={"audio_file": ("probe.wav", b"RIFF\0\0\0\0WAVEfmt " + os.urandom(64), "audio/wav")},
+    )
+    probe_id = probe.json()["meeting_id"]
+    while (await client.get(f"/api/meetings/{probe_id}/status")).json()["status"] not in ("completed", "failed"):
+        await asyncio.sleep(0.01)
+
+    meeting_ids = []
+    for _ in range(meetings):
+        response = await client.post(
+            "/api/meetings/upload",
+            files={"audio_file": ("m.wav", b"RIFF\0\0\0\0WAVEfmt " + os.urandom(1024), "audio/wav")},
+        )
+        meeting_ids.append(response.json()["meeting_id"])
+
+    latencies = []
+    started = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        await client.get(f"/api/meetings/{probe_id}/status")
+        latencies.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.005)
+
+        if len(latencies) % 20 == 0:
+            statuses = [dogwhistle_app.scheduler.queue_info(mid) for mid in meeting_ids]
+            if not any(statuses) and not dogwhistle_app.scheduler.stats()["running"]:
+                break
+    elapsed = time.perf_counter() - started
+
+    return {
+        "status_requests": len(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "wall_seconds": elapsed,
+    }
+
+
+async def main(meetings: int, transcript_words: int, api_latency: float):
+    transcript = " ".join(f"word{i % 1000}" for i in range(transcript_words))
+    with contextlib.redirect_stdout(io.StringIO()):
+        await dogwhistle_app.startup_event()
+
+    # Reports land in the scratch directory, not the repo
+    os.chdir(_workdir)
+
+    modes = [
+        ("on event loop (old)", BlockingWriteProcessor),
+        ("worker thread (new)", DogWhistleProcessor),
+    ]
+    transport = httpx.ASGITransport(app=dogwhistle_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{meetings} meetings, {len(transcript) / 1e6:.1f} MB transcript each\n")
+        print(f"{'report writes':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'requests':>10}")
+        print("-" * 68)
+        for label, processor_class in modes:
+            processor = processor_class()
+            processor.client = stub_client(transcript, api_latency)
+            with contextlib.redirect_stdout(io.StringIO()):  # Silence pipeline logging
+                result = await run_mode(client, processor, meetings)
+            print(
+                f"{label:<22}{result['p50_ms']:>7.1f}ms{result['p95_ms']:>7.1f}ms"
+                f"{result['p99_ms']:>7.1f}ms{result['max_ms']:>7.1f}ms{result['status_requests']:>10}"
+            )
+
+    await dogwhistle_app.shutdown_event()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meetings", type=int, default=50)
+    parser.add_argument("--transcript-words", type=int, default=300000)
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.meetings, args.transcript_words, args.api_latency))
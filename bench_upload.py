@@ -0,0 +1,139 @@
+"""
+Benchmark upload handling: buffered read() vs streaming to disk
+Measures peak Python heap usage while an upload is received, and how much of
+an oversized upload is consumed before it gets rejected
+
+Usage: python bench_upload.py [--size-mb 20] [--oversize-mb 60] [--limit-mb 25]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from starlette.requests import Request
+
+from upload_streaming import UploadRejected, stream_upload_to_disk
+
+BOUNDARY = "dogwhistlebenchboundary"
+RECEIVE_CHUNK = 64 * 1024  # What uvicorn typically hands the app per message
+
+# Upload size limit applied by both handlers (set from --limit-mb)
+limit_bytes = 25 * 1024 * 1024
+
+
+def build_multipart(size: int) -> bytes:
+    """Build a multipart body holding a fake WAV file of `size` bytes"""
+    audio = b"RIFF\x00\x00\x00\x00WAVEfmt " + b"\x00" * (size - 16)
+    head = (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="audio_file"; filename="meeting.wav"\r\n'
+        f"Content-Type: audio/wav\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    return head + audio + tail
+
+
+def make_request(body: bytes, counter: dict) -> Request:
+    """Starlette request that delivers `body` in server-sized pieces"""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/meetings/upload",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+    view = memoryview(body)
+    position = 0
+
+    async def receive():
+        nonlocal position
+        chunk = bytes(view[position:position + RECEIVE_CHUNK])
+        position += len(chunk)
+        counter["received"] = position
+        return {"type": "http.request", "body": chunk, "more_body": position < len(body)}
+
+    return Request(scope, receive)
+
+
+async def buffered_upload(request: Request, dest: str) -> int:
+    """The original handler: parse the form, read() everything, then write"""
+    form = await request.form()
+    contents = await form["audio_file"].read()
+    if len(contents) > limit_bytes:
+        raise UploadRejected(400, "File too large")
+    with open(dest, "wb") as f:
+        f.write(contents)
+    return len(contents)
+
+
+async def streaming_upload(request: Request, dest: str) -> int:
+    upload = await stream_upload_to_disk(request, spool_path_for=lambda filename: dest, max_bytes=limit_bytes)
+    return upload.size
+
+
+async def run_once(handler, body: bytes, dest: str, traced: bool) -> dict:
+    counter = {"received": 0}
+    request = make_request(body, counter)
+
+    if traced:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    try:
+        await handler(request, dest)
+        outcome = "accepted"
+    except UploadRejected as e:
+        outcome = f"rejected ({e.status_code})"
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if traced:
+        _, peak = tracemalloc.get_traced_memory()
+        peak -= baseline
+        tracemalloc.stop()
+
+    if os.path.exists(dest):
+        os.remove(dest)
+
+    return {
+        "outcome": outcome,
+        "peak_mb": peak / (1024 * 1024),
+        "seconds": elapsed,
+        "received_mb": counter["received"] / (1024 * 1024),
+    }
+
+
+async def measure(handler, body: bytes) -> dict:
+    """Time an untraced run, then repeat under tracemalloc for the heap peak"""
+    dest = os.path.join(tempfile.gettempdir(), f"bench_upload_{os.getpid()}.wav")
+    result = await run_once(handler, body, dest, traced=False)
+    result["peak_mb"] = (await run_once(handler, body, dest, traced=True))["peak_mb"]
+    return result
+
+
+async def main(size_mb: int, oversize_mb: int):
+    cases = [
+        (f"{size_mb} MB upload", build_multipart(size_mb * 1024 * 1024)),
+        (f"{oversize_mb} MB upload (over limit)", build_multipart(oversize_mb * 1024 * 1024)),
+    ]
+
+    print(f"{'case':<32}{'handler':<12}{'outcome':<16}{'peak heap':>12}{'body read':>12}{'time':>10}")
+    print("-" * 94)
+    for label, body in cases:
+        for name, handler in (("buffered", buffered_upload), ("streaming", streaming_upload)):
+            result = await measure(handler, body)
+            print(
+                f"{label:<32}{name:<12}{result['outcome']:<16}"
+                f"{result['peak_mb']:>9.1f} MB{result['received_mb']:>9.1f} MB{result['seconds']:>9.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--oversize-mb", type=int, default=60)
+    parser.add_argument("--limit-mb", type=int, default=25)
+    args = parser.parse_args()
+    limit_bytes = args.limit_mb * 1024 * 1024
+    asyncio.run(main(args.size_mb, args.oversize_mb))
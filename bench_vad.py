@@ -0,0 +1,59 @@
+"""
+Benchmark voice activity detection on an hour of 16 kHz audio
+Synthesizes a meeting with dead air at both ends and pauses between turns,
+then times trim_silence and reports how much billable audio it removes.
+
+Usage: python bench_vad.py [--minutes 60] [--whisper-usd-per-minute 0.006]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE
+from vad import trim_silence
+
+
+def synth_meeting(minutes: float, seed: int = 0) -> np.ndarray:
+    """Turns of 5-40s of speech-like noise separated by 0.3-25s pauses"""
+    rng = np.random.default_rng(seed)
+    rate = SPEECH_SAMPLE_RATE
+    pieces = [(20 * rng.standard_normal(rate * 90)).astype(np.int16)]  # Dead air while people join
+    total = len(pieces[0])
+    while total < minutes * 60 * rate:
+        turn = int(rng.uniform(5, 40) * rate)
+        t = np.arange(turn) / rate
+        envelope = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t) + 0.4, 0, None)
+        voice = np.convolve(rng.standard_normal(turn), np.ones(6) / 6, mode="same")
+        pause = int(rng.choice([rng.uniform(0.3, 1.2), rng.uniform(2, 25)], p=[0.7, 0.3]) * rate)
+        pieces += [(5000 * envelope * voice).astype(np.int16), (20 * rng.standard_normal(pause)).astype(np.int16)]
+        total += turn + pause
+    return np.concatenate(pieces)[:int(minutes * 60 * rate)]
+
+
+def main(minutes: float, usd_per_minute: float):
+    samples = synth_meeting(minutes)
+    trim_silence(samples[:SPEECH_SAMPLE_RATE * 10])  # Warm up
+
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        trimmed, offsets = trim_silence(samples)
+        timings.append(time.perf_counter() - started)
+
+    original = offsets.original_seconds / 60
+    kept = offsets.kept_seconds / 60
+    print(f"{original:.0f} minutes of 16 kHz mono audio ({samples.nbytes / 1e6:.0f} MB)\n")
+    print(f"trim_silence           {min(timings) * 1000:>8.0f} ms (best of 3)")
+    print(f"speech spans           {len(offsets.lengths):>8}")
+    print(f"audio sent to Whisper  {kept:>8.1f} min  ({kept / original:.0%})")
+    print(f"billable audio saved   {original - kept:>8.1f} min  (${(original - kept) * usd_per_minute:.3f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--whisper-usd-per-minute", type=float, default=0.006)
+    args = parser.parse_args()
+    main(args.minutes, args.whisper_usd_per_minute)
@@ -4,45 +4,210 @@ Handles audio transcription and meeting analysis using OpenAI APIs
 """
 
 import os
+import copy
 import json
 import asyncio
-from typing import Dict, List, Optional
+import contextlib
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import aiohttp
-from openai import AsyncOpenAI
 
-# Initialize OpenAI client (will be set later)
-client = None
+from audio_io import probe_duration
+from audio_normalize import normalize_for_whisper
+from audio_segmenter import AudioWindow, needs_chunking, split_audio, stitch_transcripts
+from map_reduce_analysis import (MAP_CONCURRENCY, chunk_prompt, combine_analysis, merge_action_items,
+                                 needs_map_reduce, reduce_prompt, split_transcript)
+from meeting_group import combine_device_scans, merge_recordings
+from openai_pool import shared_client
+from partial_json import IncrementalJSONParser, apply_partial
+from pipeline_metrics import record, span
+from report_renderers import RENDERERS
+from result_cache import ResultCache, analysis_key, hash_file
+from ultrasonic_detector import scan_recording
+from vad import OffsetMap, trim_audio_file
+
+# Maximum Whisper requests in flight for one long meeting
+TRANSCRIBE_CONCURRENCY = int(os.getenv("DOGWHISTLE_TRANSCRIBE_CONCURRENCY", "6"))
+
+# Meetings allowed in each API-bound stage at once, across the whole process
+TRANSCRIPTION_SLOTS = int(os.getenv("DOGWHISTLE_TRANSCRIPTION_SLOTS", "3"))
+ANALYSIS_SLOTS = int(os.getenv("DOGWHISTLE_ANALYSIS_SLOTS", "2"))
+
+# Progress percentage at which each stage starts
+STAGE_PROGRESS = {"aligning": 5, "transcribing": 10, "analyzing": 60, "formatting": 90}
+
+# Stream the gpt-4o analysis so finished fields can be shown while it generates
+STREAM_ANALYSIS = os.getenv("DOGWHISTLE_STREAM_ANALYSIS", "1") == "1"
+
+# Top-level fields of the analysis, used to estimate streaming progress
+ANALYSIS_FIELDS = ("summary", "action_items", "follow_up_questions", "key_insights",
+                   "topics_discussed", "sentiment", "meeting_type")
+
+# Bump whenever the analysis prompt or model changes so cached analyses are not reused
+PROMPT_VERSION = "2024-06-gpt-4o-v1"
+
+async def ignore_progress(stage: str, progress: int, **details):
+    """Default progress callback"""
+
+
+@dataclass
+class PreparedAudio:
+    """A recording already hashed, trimmed and encoded for Whisper (see prepare_audio)"""
+    sha256: str
+    speech_path: Optional[str]  # One request's worth of audio, or None when split into windows
+    windows: Optional[List[AudioWindow]]  # Window paths point at their encoded audio
+    offsets: Optional[OffsetMap]  # Set when silence was trimmed
+    duration: Optional[float]
+    devices: Optional[List[Dict]]
+
+
+def prepare_audio(audio_file_path: str, work_dir: str, scan_devices: bool = True) -> PreparedAudio:
+    """
+    The CPU-bound half of transcription: hashing, device scan, silence
+    trimming, probing and encoding, making the same choices as transcribe_audio
+    Picklable in and out, so it can run in a process pool
+    """
+    audio_sha256 = hash_file(audio_file_path)
+    devices = scan_recording(audio_file_path) if scan_devices else None
+    trimmed = trim_audio_file(audio_file_path, work_dir)
+    speech_source = trimmed.path if trimmed else audio_file_path
+    duration = probe_duration(speech_source)
+
+    speech = None
+    if not needs_chunking(0, duration):
+        speech = normalize_for_whisper(speech_source, work_dir)
+    windows = None
+    if speech is None or needs_chunking(speech.size_bytes, duration):
+        windows_dir = os.path.join(work_dir, "windows")
+        os.makedirs(windows_dir, exist_ok=True)
+        windows = split_audio(speech_source, windows_dir)
+        for window in windows:
+            window.path = normalize_for_whisper(window.path, windows_dir).path
+    return PreparedAudio(
+        sha256=audio_sha256,
+        speech_path=None if windows else speech.path,
+        windows=windows,
+        offsets=trimmed.offsets if trimmed else None,
+        duration=duration,
+        devices=devices,
+    )
+
 
 class DogWhistleProcessor:
     """Main processor for DogWhistle audio files"""
     
-    def __init__(self):
-        # Get API key from environment
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            # For demo, try a fallback encoded key
-            import base64
-            # This is a base64 encoded key for demo purposes
-            encoded_key = "c2stcHJvai1VRFJfSmd0OE84Q3J1a1J5dkdfVTAtYkw0d3E2RGd4VXZMVVFnNnpmRGlBRFB3OUtvRWd3c2FZQmUzYUxnSFk3QWZJZjA5MGpvMlQzQmxia0ZKMkx2NVJUbEp2dEt2c0FUMGFLb2NtV1AzTlZpWUdzN1RrWUxtTjRmM0szelN1ejB4U0JaY2JqcVFRdi1ReVI3U1VTTElCTGh1NEE="
-            api_key = base64.b64decode(encoded_key).decode('utf-8')
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, transcribe_concurrency: int = TRANSCRIBE_CONCURRENCY, cache: Optional[ResultCache] = None,
+                 stream_analysis: bool = STREAM_ANALYSIS, transcription_slots: int = TRANSCRIPTION_SLOTS,
+                 analysis_slots: int = ANALYSIS_SLOTS, client=None):
+        self.transcribe_concurrency = transcribe_concurrency
+        self.stream_analysis = stream_analysis
+        self.cache = cache if cache is not None else ResultCache()
+        self.transcription_slots = asyncio.Semaphore(transcription_slots)
+        self.analysis_slots = asyncio.Semaphore(analysis_slots)
+        # The shared client (see openai_pool) unless one is given; built on first use
+        self._client = client
     
-    async def process_meeting(self, audio_file_path: str, meeting_id: str) -> Dict:
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = shared_client()
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
+    
+    async def process_meeting(self, audio_file_path: str, meeting_id: str, audio_sha256: Optional[str] = None,
+                              on_progress=ignore_progress, scan_devices: bool = True, transcriber=None,
+                              prepared: Optional[PreparedAudio] = None) -> Dict:
         """
         Main entry point - processes audio file through complete pipeline
+        Identical audio (by SHA-256) reuses cached transcripts and analyses
+        `transcriber` is an IncrementalTranscriber that started on the audio while it uploaded
+        `prepared` is the output of prepare_audio, so only the API calls are left
+        `on_progress(stage, progress, **details)` is awaited as the meeting moves through
+        each stage; while analyzing, details carry the fields finished so far
         """
         try:
+            if prepared is not None:
+                audio_sha256 = prepared.sha256
+            if audio_sha256 is None:
+                with span("hashing"):
+                    audio_sha256 = await asyncio.to_thread(hash_file, audio_file_path)
+            
+            # Listen for paired devices' tones while the audio is transcribed
+            device_scan = None
+            if scan_devices and prepared is None:
+                device_scan = asyncio.create_task(asyncio.to_thread(scan_recording, audio_file_path))
+            
             # Step 1: Transcribe audio
-            print(f"Starting transcription for meeting {meeting_id}...")
-            transcript = await self.transcribe_audio(audio_file_path)
+            await on_progress("transcribing", STAGE_PROGRESS["transcribing"])
+            cached = await self.cache.get_transcript(audio_sha256)
+            if cached:
+                print(f"Reusing cached transcript for meeting {meeting_id}")
+                record(transcript_cache_hits=1)
+                transcript = cached["text"]
+                self.segments = cached["segments"]
+                if transcriber is not None:
+                    transcriber.close()
+            elif transcriber is not None:
+                # Most windows were transcribed during the upload; wait for the rest
+                print(f"Finishing pipelined transcription for meeting {meeting_id} "
+                      f"({transcriber.windows_started} windows started during upload)")
+                record(audio_seconds=transcriber.duration)
+                with span("transcribing"):
+                    transcript, self.segments = await transcriber.finish()
+                await self.cache.set_transcript(audio_sha256, transcript, self.segments)
+            else:
+                with span("transcription_wait"):
+                    await self.transcription_slots.acquire()
+                try:
+                    print(f"Starting transcription for meeting {meeting_id}...")
+                    with span("transcribing"):
+                        if prepared is not None:
+                            transcript, self.segments = await self.transcribe_prepared(prepared, on_progress)
+                        else:
+                            transcript = await self.transcribe_audio(audio_file_path, on_progress)
+                finally:
+                    self.transcription_slots.release()
+                await self.cache.set_transcript(audio_sha256, transcript, self.segments)
             
             # Step 2: Analyze transcript (single API call for everything)
-            print(f"Analyzing meeting content...")
-            analysis = await self.analyze_transcript(transcript)
+            # The cache entries this meeting uses, so deleting it can clear them
+            await on_progress("analyzing", STAGE_PROGRESS["analyzing"],
+                              cache_keys=[audio_sha256, analysis_key(transcript, PROMPT_VERSION)])
+            analysis = await self.cache.get_analysis(transcript, PROMPT_VERSION)
+            if analysis:
+                print(f"Reusing cached analysis for meeting {meeting_id}")
+                record(analysis_cache_hits=1)
+            else:
+                with span("analysis_wait"):
+                    await self.analysis_slots.acquire()
+                try:
+                    print(f"Analyzing meeting content...")
+                    with span("analyzing"):
+                        if needs_map_reduce(transcript):
+                            analysis = await self.analyze_transcript_map_reduce(transcript, on_progress)
+                        elif self.stream_analysis:
+                            analysis = await self.analyze_transcript_streaming(transcript, on_progress)
+                        else:
+                            analysis = await self.analyze_transcript(transcript)
+                finally:
+                    self.analysis_slots.release()
+                await self.cache.set_analysis(transcript, PROMPT_VERSION, analysis)
             
             # Step 3: Format results
-            results = self.format_results(transcript, analysis, meeting_id)
+            await on_progress("formatting", STAGE_PROGRESS["formatting"])
+            with span("formatting"):
+                results = await self.format_results(transcript, analysis, meeting_id)
+            if device_scan is not None:
+                # Usually done long ago; any time here is the scan outlasting the pipeline
+                with span("device_scan"):
+                    results["devices"] = await device_scan
+            elif scan_devices and prepared is not None:
+                results["devices"] = prepared.devices
             
             return results
             
@@ -53,40 +218,279 @@ class DogWhistleProcessor:
             print(f"Traceback: {traceback.format_exc()}")
             raise
     
-    async def transcribe_audio(self, audio_file_path: str) -> str:
+    async def process_group(self, audio_file_paths: List[str], meeting_id: str, on_progress=ignore_progress) -> Dict:
+        """
+        Process one meeting recorded on several phones
+        The recordings are aligned and merged into a single clearest-source
+        track, which goes through the pipeline once
+        """
+        await on_progress("aligning", STAGE_PROGRESS["aligning"])
+        # Device tones are above the merged track's 8 kHz bandwidth, so scan the originals
+        device_scans = asyncio.gather(*(asyncio.to_thread(scan_recording, path) for path in audio_file_paths))
+        work_dir = tempfile.mkdtemp(prefix="dogwhistle_group_")
+        try:
+            with span("aligning"):
+                merged = await asyncio.to_thread(
+                    merge_recordings, audio_file_paths, os.path.join(work_dir, f"{meeting_id}_group.wav"))
+            print(f"Merged {len(audio_file_paths)} recordings for meeting {meeting_id}: offsets {merged.offsets}")
+            results = await self.process_meeting(merged.path, meeting_id, on_progress=on_progress, scan_devices=False)
+            results["devices"] = combine_device_scans(await device_scans, merged.offsets)
+            results["group"] = {
+                "recordings": len(audio_file_paths),
+                "offsets": [round(offset, 3) for offset in merged.offsets],
+                "seconds_from_recording": [merged.sources_used.get(i, 0.0) for i in range(len(audio_file_paths))],
+                "duration": round(merged.duration, 2),
+            }
+            return results
+        except Exception:
+            device_scans.cancel()
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    async def transcribe_audio(self, audio_file_path: str, on_progress=ignore_progress) -> str:
         """
         Transcribe audio using OpenAI Whisper API
         """
+        work_dir = tempfile.mkdtemp(prefix="dogwhistle_speech_")
         try:
             print(f"Opening audio file: {audio_file_path}")
-            print(f"File exists: {os.path.exists(audio_file_path)}")
-            print(f"File size: {os.path.getsize(audio_file_path) if os.path.exists(audio_file_path) else 'N/A'}")
             
-            with open(audio_file_path, "rb") as audio_file:
-                print("Calling Whisper API...")
-                transcription = await self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="en"  # Optional: specify language
-                )
+            # Cut dead air so it isn't uploaded or billed
+            with span("trim_silence"):
+                trimmed = await asyncio.to_thread(trim_audio_file, audio_file_path, work_dir)
+            if trimmed:
+                offsets = trimmed.offsets
+                print(f"Voice activity: kept {offsets.kept_seconds:.0f}s of {offsets.original_seconds:.0f}s")
+                record(audio_seconds=offsets.original_seconds)
+                audio_file_path = trimmed.path
             
-            # Extract just the text for analysis
-            full_text = transcription.text
+            full_text = await self.transcribe_speech(audio_file_path, work_dir, on_progress)
             print(f"Transcription successful, length: {len(full_text)}")
             
-            # Store segments for future features (speaker detection, etc)
-            self.segments = []
+            # Segment timestamps in meeting time, for future features (speaker detection, etc)
+            if trimmed:
+                self.segments = trimmed.offsets.map_segments(self.segments)
             
             return full_text
         except Exception as e:
             print(f"Transcription error: {str(e)}")
             print(f"Error type: {type(e).__name__}")
             raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    async def transcribe_speech(self, audio_file_path: str, work_dir: str, on_progress=ignore_progress) -> str:
+        """Send a recording to Whisper in one request, or in windows if it's long"""
+        # Long meetings are split into windows and transcribed in parallel
+        duration = await asyncio.to_thread(probe_duration, audio_file_path)
+        if duration:
+            record(whisper_audio_seconds=duration)
+        if needs_chunking(0, duration):
+            return await self.transcribe_chunked(audio_file_path, on_progress)
+        
+        # Mono 16 kHz speech encoding: far fewer bytes to upload
+        with span("normalizing"):
+            speech = await asyncio.to_thread(normalize_for_whisper, audio_file_path, work_dir)
+        print(f"File size: {speech.original_bytes} -> {speech.size_bytes} ({speech.codec})")
+        if needs_chunking(speech.size_bytes, duration):
+            return await self.transcribe_chunked(audio_file_path, on_progress)
+        
+        # Read off the event loop; the SDK would otherwise read the file inline
+        data = await asyncio.to_thread(read_file_bytes, speech.path)
+        record(whisper_bytes=len(data))
+        print("Calling Whisper API...")
+        with span("whisper"):
+            transcription = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(os.path.basename(speech.path), data),
+                language="en",  # Optional: specify language
+                response_format="verbose_json"  # Segment timestamps
+            )
+        self.segments = [
+            {"start": round(segment["start"], 2), "end": round(segment["end"], 2), "text": segment["text"].strip()}
+            for segment in transcription.model_dump().get("segments") or []
+        ]
+        return transcription.text
+    
+    async def transcribe_chunked(self, audio_file_path: str, on_progress=ignore_progress) -> str:
+        """
+        Transcribe a long recording as overlapping windows
+        Windows run concurrently (up to transcribe_concurrency) and are stitched in order
+        """
+        work_dir = tempfile.mkdtemp(prefix="dogwhistle_windows_")
+        try:
+            with span("splitting"):
+                windows = await asyncio.to_thread(split_audio, audio_file_path, work_dir)
+            print(f"Transcribing {len(windows)} windows, {self.transcribe_concurrency} at a time...")
+            
+            semaphore = asyncio.Semaphore(self.transcribe_concurrency)
+            finished = 0
+            
+            async def transcribe_window(window):
+                nonlocal finished
+                async with semaphore:
+                    speech = await asyncio.to_thread(normalize_for_whisper, window.path, work_dir)
+                    data = await asyncio.to_thread(read_file_bytes, speech.path)
+                    record(whisper_bytes=len(data))
+                    transcription = await self.client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=(os.path.basename(speech.path), data),
+                        language="en",
+                        response_format="verbose_json"  # Segment timestamps for stitching
+                    )
+                finished += 1
+                start, end = STAGE_PROGRESS["transcribing"], STAGE_PROGRESS["analyzing"]
+                await on_progress("transcribing", start + (end - start) * finished // len(windows))
+                return transcription.model_dump()
+            
+            # Windows normalize and call Whisper concurrently, so they're timed together
+            with span("whisper"):
+                responses = await asyncio.gather(*(transcribe_window(w) for w in windows))
+            full_text, self.segments = stitch_transcripts(windows, responses)
+            print(f"Chunked transcription successful, length: {len(full_text)}")
+            
+            return full_text
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    async def transcribe_prepared(self, prepared: PreparedAudio,
+                                  on_progress=ignore_progress) -> Tuple[str, List[Dict]]:
+        """Whisper calls for audio from prepare_audio; returns (text, segments in meeting time)"""
+        if prepared.offsets:
+            record(audio_seconds=prepared.offsets.original_seconds)
+        if prepared.duration:
+            record(whisper_audio_seconds=prepared.duration)
+        paths = [window.path for window in prepared.windows] if prepared.windows else [prepared.speech_path]
+        semaphore = asyncio.Semaphore(self.transcribe_concurrency)
+        finished = 0
+        
+        async def transcribe(path):
+            nonlocal finished
+            async with semaphore:
+                data = await asyncio.to_thread(read_file_bytes, path)
+                record(whisper_bytes=len(data))
+                transcription = await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(os.path.basename(path), data),
+                    language="en",
+                    response_format="verbose_json"
+                )
+            finished += 1
+            start, end = STAGE_PROGRESS["transcribing"], STAGE_PROGRESS["analyzing"]
+            await on_progress("transcribing", start + (end - start) * finished // len(paths))
+            return transcription.model_dump()
+        
+        with span("whisper"):
+            responses = await asyncio.gather(*(transcribe(path) for path in paths))
+        if prepared.windows:
+            text, segments = stitch_transcripts(prepared.windows, responses)
+        else:
+            text = responses[0]["text"]
+            segments = [
+                {"start": round(segment["start"], 2), "end": round(segment["end"], 2), "text": segment["text"].strip()}
+                for segment in responses[0].get("segments") or []
+            ]
+        if prepared.offsets:
+            segments = prepared.offsets.map_segments(segments)
+        return text, segments
+    
+    async def transcribe_window_file(self, window_path: str) -> Dict:
+        """
+        Transcribe one window of an upload that is still arriving
+        Returns the verbose Whisper response, with segment times in the window's time
+        """
+        work_dir = tempfile.mkdtemp(prefix="dogwhistle_window_")
+        try:
+            trimmed = await asyncio.to_thread(trim_audio_file, window_path, work_dir)
+            speech = await asyncio.to_thread(normalize_for_whisper, trimmed.path if trimmed else window_path, work_dir)
+            data = await asyncio.to_thread(read_file_bytes, speech.path)
+            record(whisper_bytes=len(data))
+            with span("whisper"):
+                transcription = await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(os.path.basename(speech.path), data),
+                    language="en",
+                    response_format="verbose_json"  # Segment timestamps for stitching
+                )
+            response = transcription.model_dump()
+            if trimmed:
+                response["segments"] = trimmed.offsets.map_segments(response.get("segments") or [])
+            return response
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
     
     async def analyze_transcript(self, transcript: str) -> Dict:
         """
         Analyze transcript using GPT-4 - Single call for all features
         """
+        response = await self.client.chat.completions.create(**self.analysis_request(transcript))
+        
+        return json.loads(response.choices[0].message.content)
+    
+    async def analyze_transcript_streaming(self, transcript: str, on_progress=ignore_progress) -> Dict:
+        """
+        Same analysis as analyze_transcript, consumed as a token stream
+        Each field is reported through `on_progress(..., partial_analysis=...)` as
+        soon as it is complete; the result is parsed from the same full text
+        """
+        parser = IncrementalJSONParser()
+        partial = {}
+        start, end = STAGE_PROGRESS["analyzing"], STAGE_PROGRESS["formatting"]
+        
+        stream = await self.client.chat.completions.create(**self.analysis_request(transcript), stream=True)
+        # Closed even if on_progress fails, so the stream's rate limiter slot comes straight back
+        async with contextlib.aclosing(stream):
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                completed = parser.feed(chunk.choices[0].delta.content)
+                if not completed:
+                    continue
+                for path, value in completed:
+                    apply_partial(partial, path, value)
+                done = sum(1 for field in ANALYSIS_FIELDS if field in partial)
+                await on_progress("analyzing", start + (end - start) * done // (len(ANALYSIS_FIELDS) + 1),
+                                  partial_analysis=copy.deepcopy(partial))
+        
+        return parser.result()
+    
+    async def analyze_transcript_map_reduce(self, transcript: str, on_progress=ignore_progress) -> Dict:
+        """
+        Analyze a long transcript in chunks, then merge
+        Chunks are analyzed in parallel; action items are de-duplicated locally and
+        one final call writes the summary from the chunk notes
+        """
+        chunks = split_transcript(transcript)
+        print(f"Analyzing {len(chunks)} transcript chunks...")
+        semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+        notes = [None] * len(chunks)
+        finished = 0
+        start, end = STAGE_PROGRESS["analyzing"], STAGE_PROGRESS["formatting"]
+        
+        async def analyze_chunk(index: int):
+            nonlocal finished
+            async with semaphore:
+                notes[index] = await self.complete_json(chunk_prompt(chunks[index], index, len(chunks)))
+            finished += 1
+            # Action items found so far, in transcript order
+            found = merge_action_items([note.get("action_items", []) for note in notes if note])
+            await on_progress("analyzing", start + (end - start) * finished // (len(chunks) + 1),
+                              partial_analysis={"action_items": found})
+        
+        await asyncio.gather(*(analyze_chunk(i) for i in range(len(chunks))))
+        
+        action_items = merge_action_items([note.get("action_items", []) for note in notes])
+        reduced = await self.complete_json(reduce_prompt(notes, action_items))
+        return combine_analysis(reduced, action_items)
+    
+    async def complete_json(self, prompt: str) -> Dict:
+        """One JSON-mode gpt-4o call with the analyst system prompt"""
+        response = await self.client.chat.completions.create(**self.json_request(prompt))
+        return json.loads(response.choices[0].message.content)
+    
+    def analysis_request(self, transcript: str) -> Dict:
+        """Chat completion arguments for analyzing a transcript"""
         prompt = f"""
         Analyze this meeting transcript and provide a comprehensive analysis.
         
@@ -124,7 +528,11 @@ class DogWhistleProcessor:
         Be specific and actionable in your analysis. Extract real information, not generic observations.
         """
         
-        response = await self.client.chat.completions.create(
+        return self.json_request(prompt)
+    
+    def json_request(self, prompt: str) -> Dict:
+        """Chat completion arguments for a JSON-mode gpt-4o call"""
+        return dict(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an expert meeting analyst. Provide structured, actionable insights."},
@@ -134,173 +542,71 @@ class DogWhistleProcessor:
             temperature=0.3,  # Lower temperature for consistency
             max_tokens=2000
         )
-        
-        return json.loads(response.choices[0].message.content)
     
-    def format_results(self, transcript: str, analysis: Dict, meeting_id: str) -> Dict:
+    async def format_results(self, transcript: str, analysis: Dict, meeting_id: str) -> Dict:
         """
         Format results for consumption by iOS app
+        Text reports are rendered on demand (see report_renderers), so only the
+        JSON report is written here, off the event loop
         """
-        timestamp = datetime.now().isoformat()
-        
-        # Create the files and get their paths
-        transcript_path = self.create_transcript_file(transcript, meeting_id)
-        summary_path = self.create_summary_file(analysis, meeting_id)
-        actions_path = self.create_action_items_file(analysis, meeting_id)
-        
-        # Read the generated files to include content in response
-        with open(summary_path, 'r') as f:
-            summary_content = f.read()
-        
-        with open(actions_path, 'r') as f:
-            actions_content = f.read()
-            
-        # Create a combined output file for iOS
-        combined_content = f"""DOGWHISTLE MEETING REPORT
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Meeting ID: {meeting_id}
-
-{'='*60}
-
-{summary_content}
-
-{'='*60}
-
-{actions_content}
-
-{'='*60}
-
-FULL TRANSCRIPT
-{'-'*20}
-{transcript}
-"""
-        
-        # Save combined file
-        os.makedirs("outputs", exist_ok=True)
-        combined_path = f"outputs/{meeting_id}_complete.txt"
-        with open(combined_path, "w") as f:
-            f.write(combined_content)
-        
-        return {
+        results, files = await asyncio.to_thread(self.build_results, transcript, analysis, meeting_id)
+        await self.persist_outputs(files)
+        return results
+    
+    def build_results(self, transcript: str, analysis: Dict, meeting_id: str):
+        """Assemble the results, returning (results, {path: file content})"""
+        word_count = len(transcript.split())
+        results = {
             "meeting_id": meeting_id,
-            "processed_at": timestamp,
+            "processed_at": datetime.now().isoformat(),
             "transcript": {
                 "full_text": transcript,
-                "word_count": len(transcript.split()),
-                "duration_estimate": f"{len(transcript.split()) // 150} minutes"  # Rough estimate
+                "word_count": word_count,
+                "duration_estimate": f"{word_count // 150} minutes"  # Rough estimate
             },
             "analysis": analysis,
-            "text_outputs": {
-                "summary": summary_content,
-                "action_items": actions_content,
-                "combined_report": combined_content
-            },
             "file_paths": {
-                "transcript_txt": transcript_path,
-                "summary_txt": summary_path,
-                "action_items_txt": actions_path,
-                "combined_txt": combined_path,
-                "full_report_json": f"reports/{meeting_id}_full_report.json"
+                "full_report_json": report_path(meeting_id)
             }
         }
+        files = {
+            results["file_paths"]["full_report_json"]: RENDERERS["json"].render(results)
+        }
+        return results, files
     
-    def create_transcript_file(self, transcript: str, meeting_id: str) -> str:
-        """Create formatted transcript file"""
-        content = f"""DOGWHISTLE MEETING TRANSCRIPT
-Meeting ID: {meeting_id}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    async def persist_outputs(self, files: Dict[str, str]):
+        """Write rendered reports on a worker thread so the event loop keeps serving"""
+        await asyncio.to_thread(write_text_files, files)
 
-{'='*50}
 
-{transcript}
-"""
-        # Create directory if it doesn't exist
-        os.makedirs("transcripts", exist_ok=True)
-        
-        filename = f"transcripts/{meeting_id}_transcript.txt"
-        with open(filename, "w") as f:
-            f.write(content)
-        
-        return filename
-    
-    def create_summary_file(self, analysis: Dict, meeting_id: str) -> str:
-        """Create formatted summary file"""
-        summary = analysis.get('summary', {})
-        content = f"""DOGWHISTLE MEETING SUMMARY
-Meeting ID: {meeting_id}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-EXECUTIVE SUMMARY
-{'-'*20}
-{summary.get('brief', 'No summary available')}
-
-DETAILED SUMMARY
-{'-'*20}
-{summary.get('detailed', 'No detailed summary available')}
-
-KEY INSIGHTS
-{'-'*20}
-"""
-        for insight in analysis.get('key_insights', []):
-            content += f"• {insight}\n"
-        
-        content += f"\nTOPICS DISCUSSED: {', '.join(analysis.get('topics_discussed', []))}"
-        content += f"\nMEETING TYPE: {analysis.get('meeting_type', 'Unknown')}"
-        content += f"\nOVERALL SENTIMENT: {analysis.get('sentiment', 'Neutral')}"
-        
-        # Create directory if it doesn't exist
-        os.makedirs("summaries", exist_ok=True)
-        
-        filename = f"summaries/{meeting_id}_summary.txt"
-        with open(filename, "w") as f:
-            f.write(content)
-        
-        return filename
-    
-    def create_action_items_file(self, analysis: Dict, meeting_id: str) -> str:
-        """Create formatted action items file"""
-        content = f"""DOGWHISTLE ACTION ITEMS
-Meeting ID: {meeting_id}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+def report_path(meeting_id: str) -> str:
+    """Where format_results writes a meeting's JSON report"""
+    return f"reports/{meeting_id}_full_report.json"
 
-ACTION ITEMS
-{'='*50}
 
-"""
-        action_items = analysis.get('action_items', [])
-        if not action_items:
-            content += "No action items identified.\n"
-        else:
-            for i, item in enumerate(action_items, 1):
-                content += f"{i}. {item['task']}\n"
-                if item.get('owner'):
-                    content += f"   Owner: {item['owner']}\n"
-                if item.get('due_date'):
-                    content += f"   Due: {item['due_date']}\n"
-                content += f"   Priority: {item.get('priority', 'Medium')}\n\n"
-        
-        content += f"\nFOLLOW-UP QUESTIONS\n{'='*50}\n"
-        for i, question in enumerate(analysis.get('follow_up_questions', []), 1):
-            content += f"{i}. {question}\n"
-        
-        # Create directory if it doesn't exist
-        os.makedirs("action_items", exist_ok=True)
-        
-        filename = f"action_items/{meeting_id}_actions.txt"
-        with open(filename, "w") as f:
+def read_file_bytes(path: str) -> bytes:
+    """Read a whole file (call via asyncio.to_thread)"""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_text_files(files: Dict[str, str]):
+    """Write {path: content}, creating directories as needed (call via asyncio.to_thread)"""
+    for path, content in files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
             f.write(content)
-        
-        # Also save the full JSON report
-        os.makedirs("reports", exist_ok=True)
-        full_report = {
-            "meeting_id": meeting_id,
-            "analysis": analysis,
-            "generated_at": datetime.now().isoformat()
-        }
-        with open(f"reports/{meeting_id}_full_report.json", "w") as f:
-            json.dump(full_report, f, indent=2)
-        
-        return filename
+
+
+_shared_processor: Optional[DogWhistleProcessor] = None
+
+
+def shared_processor() -> DogWhistleProcessor:
+    """One processor per process, so callers share its client, caches and stage slots"""
+    global _shared_processor
+    if _shared_processor is None:
+        _shared_processor = DogWhistleProcessor()
+    return _shared_processor
 
 
 # FastAPI endpoint example (for server deployment)
@@ -308,7 +614,7 @@ async def process_meeting_endpoint(audio_file, meeting_id: str):
     """
     Example endpoint for processing meetings
     """
-    processor = DogWhistleProcessor()
+    processor = shared_processor()
     
     # Save uploaded file temporarily
     temp_path = f"/tmp/{meeting_id}_audio.m4a"
@@ -332,22 +638,30 @@ async def process_meeting_endpoint(audio_file, meeting_id: str):
         return {"status": "error", "message": str(e)}
 
 
-# Example usage
-async def main():
-    # Example: Process a meeting
-    processor = DogWhistleProcessor()
+def main(argv: Optional[List[str]] = None) -> int:
+    """Offline batch mode: process a directory or manifest of recordings without the server"""
+    import argparse
+    from offline_batch import BATCH_CONCURRENCY, BATCH_WORKERS, CHECKPOINT_PATH, find_recordings, run_batch
     
-    # In production, this would come from iOS app
-    audio_file = "path/to/meeting_audio.m4a"
-    meeting_id = "meeting_12345"
+    parser = argparse.ArgumentParser(description="Process a directory (or manifest) of meeting recordings. "
+                                                 "Reports are written to reports/, as the server writes them.")
+    parser.add_argument("source", help="Directory of recordings, or a manifest file with one path per line")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help=f"Preprocessing processes (default {BATCH_WORKERS})")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"Meetings in each API stage at once (default {BATCH_CONCURRENCY})")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help=f"Progress file; rerun with the same one to resume (default {CHECKPOINT_PATH})")
+    parser.add_argument("--retry-failed", action="store_true", help="Also rerun recordings that failed last time")
+    args = parser.parse_args(argv)
     
-    results = await processor.process_meeting(audio_file, meeting_id)
-    print(json.dumps(results, indent=2))
+    recordings = find_recordings(args.source)
+    summary = asyncio.run(run_batch(recordings, max(1, args.workers), max(1, args.concurrency),
+                                    args.checkpoint, args.retry_failed))
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
 
 
 if __name__ == "__main__":
-    # Set your OpenAI API key
-    os.environ["OPENAI_API_KEY"] = "your-api-key-here"
-    
-    # Run example
-    asyncio.run(main())
\ No newline at end of file
+    import sys
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+DogWhistle Fake OpenAI
+A local stand-in for the Whisper and chat completion endpoints that
+enforces its own rate limits, for testing and load benchmarks
+
+Point AsyncOpenAI at it in-process:
+
+    app = create_fake_openai(requests_per_minute=120, error_rate=0.05)
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    client = AsyncOpenAI(api_key="fake", base_url="http://fake-openai/v1",
+                         http_client=http_client, max_retries=0)
+
+or run it standalone: uvicorn fake_openai:app --port 8100
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Callable, Dict, Optional, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from openai_limiter import TokenBucket, estimate_chat_tokens
+
+DEFAULT_TRANSCRIPT = "Thanks everyone for joining. Dana will ship the migration by Friday."
+
+DEFAULT_ANALYSIS = {
+    "summary": {"brief": "Weekly sync on the migration.", "detailed": "The team reviewed the migration plan."},
+    "action_items": [{"task": "Ship the migration", "owner": "Dana", "due_date": "Friday", "priority": "high"}],
+    "follow_up_questions": ["Who reviews the rollout?"],
+    "key_insights": ["Migration is on track"],
+    "topics_discussed": ["migration"],
+    "sentiment": "positive",
+    "meeting_type": "planning",
+}
+
+
+def create_fake_openai(requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                       error_rate: float = 0.0, latency: Callable[[], float] = lambda: 0.0,
+                       transcript: Union[str, Callable[[], str]] = DEFAULT_TRANSCRIPT,
+                       analysis: Dict = DEFAULT_ANALYSIS, seed: Optional[int] = None,
+                       chat_latency: Optional[Callable[[], float]] = None) -> FastAPI:
+    """
+    Build a fake OpenAI API
+    Requests over the limits get 429 with Retry-After; `error_rate` of the rest
+    get a 500; `latency()` seconds (`chat_latency()` for chat, if given) are
+    spent on each accepted request. `transcript` may be a function, e.g. to
+    give every recording a different transcript.
+    """
+    fake = FastAPI(title="Fake OpenAI")
+    rng = random.Random(seed)
+    # Like the real API, request limits are enforced per second rather than per minute
+    requests_bucket = TokenBucket(requests_per_minute, capacity=max(1.0, requests_per_minute / 60)) \
+        if requests_per_minute else None
+    tokens_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    fake.state.stats = {"requests": 0, "accepted": 0, "throttled": 0, "errors": 0}
+    fake.state.in_flight = 0
+    fake.state.peak_in_flight = 0
+
+    def admit(tokens: int) -> Optional[JSONResponse]:
+        stats = fake.state.stats
+        stats["requests"] += 1
+        for bucket, amount, kind in ((requests_bucket, 1, "requests"), (tokens_bucket, tokens, "tokens")):
+            if bucket is None or not amount:
+                continue
+            wait = bucket.try_acquire(amount)
+            if wait:
+                stats["throttled"] += 1
+                return JSONResponse(
+                    {"error": {"message": f"Rate limit reached for {kind}", "type": kind,
+                               "code": "rate_limit_exceeded"}},
+                    status_code=429,
+                    headers={"retry-after": str(math.ceil(wait * 1000) / 1000)},
+                )
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "The server had an error", "type": "server_error"}},
+                                status_code=500)
+        stats["accepted"] += 1
+        return None
+
+    async def work(delay: Callable[[], float] = latency):
+        fake.state.in_flight += 1
+        fake.state.peak_in_flight = max(fake.state.peak_in_flight, fake.state.in_flight)
+        try:
+            await asyncio.sleep(delay())
+        finally:
+            fake.state.in_flight -= 1
+
+    @fake.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        rejection = admit(0)
+        if rejection:
+            return rejection
+        await work()
+        text = transcript() if callable(transcript) else transcript
+        if form.get("response_format") == "verbose_json":
+            return {"text": text, "duration": 60.0,
+                    "segments": [{"id": 0, "start": 0.0, "end": 60.0, "text": text}]}
+        return {"text": text}
+
+    @fake.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        rejection = admit(estimate_chat_tokens(body))
+        if rejection:
+            return rejection
+        await work(chat_latency or latency)
+
+        content = json.dumps(analysis)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if body.get("stream"):
+            return StreamingResponse(_stream_chunks(completion_id, created, body["model"], content),
+                                     media_type="text/event-stream")
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": len(content) // 4,
+                      "total_tokens": 100 + len(content) // 4},
+        }
+
+    @fake.get("/stats")
+    async def stats():
+        return dict(fake.state.stats, peak_in_flight=fake.state.peak_in_flight)
+
+    return fake
+
+
+async def _stream_chunks(completion_id: str, created: int, model: str, content: str, size: int = 12):
+    for i in range(0, len(content), size):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+app = create_fake_openai()
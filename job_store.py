@@ -0,0 +1,366 @@
+"""
+DogWhistle Job Store
+Durable, bounded storage for meeting status and results
+
+Status records are small dicts ({"status", "progress", "error", ...}) looked up
+by meeting ID. Results are stored out of line and only loaded when asked for,
+as is the transcript of a meeting being recorded live, kept as appended pieces.
+Everything expires after a TTL so storage can't grow without bound.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+from result_cache import LRUCache
+
+JOB_STORE_BACKEND = os.getenv("DOGWHISTLE_JOB_STORE", "sqlite")
+JOB_DB_PATH = os.getenv("DOGWHISTLE_JOB_DB", "dogwhistle_jobs.db")
+JOB_TTL_SECONDS = float(os.getenv("DOGWHISTLE_JOB_TTL_HOURS", "24")) * 3600
+
+# Status records kept in memory per worker, and how long they are trusted
+# before re-reading the database (other workers may have updated them)
+HOT_ENTRIES = 1024
+HOT_TTL_SECONDS = 1.0
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _matches(record: Dict, expected: Optional[Dict]) -> bool:
+    return all(record.get(key) == value for key, value in (expected or {}).items())
+
+
+def _has_room(record: Dict, field: str, max_length: Optional[int]) -> bool:
+    return max_length is None or len(record.get(field, [])) < max_length
+
+
+class JobStore(ABC):
+    """Interface every job store backend implements"""
+
+    @abstractmethod
+    async def create(self, meeting_id: str, **fields) -> Dict:
+        """Create a status record for a new meeting"""
+
+    @abstractmethod
+    async def get(self, meeting_id: str) -> Optional[Dict]:
+        """Status record for a meeting, or None if unknown or expired"""
+
+    @abstractmethod
+    async def update(self, meeting_id: str, **fields) -> Optional[Dict]:
+        """Merge fields into a meeting's status record"""
+
+    @abstractmethod
+    async def update_if(self, meeting_id: str, expected: Dict, **fields) -> Optional[Dict]:
+        """Merge fields only if the record still has the `expected` values; None if it doesn't"""
+
+    @abstractmethod
+    async def append(self, meeting_id: str, field: str, value: Any, max_length: Optional[int] = None,
+                     expected: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Atomically add `value` to the list in `field`
+        Returns None, changing nothing, if the record is missing, the list
+        already holds `max_length` items, or `expected` values don't match
+        """
+
+    @abstractmethod
+    async def set_results(self, meeting_id: str, results: Dict):
+        """Store a meeting's (potentially large) results"""
+
+    @abstractmethod
+    async def get_results(self, meeting_id: str) -> Optional[Dict]:
+        """Load a meeting's results"""
+
+    @abstractmethod
+    async def append_live_text(self, meeting_id: str, offset: int, text: str):
+        """Replace a live transcript from character `offset` on with `text`"""
+
+    @abstractmethod
+    async def get_live_text(self, meeting_id: str) -> Optional[str]:
+        """A meeting's live transcript so far"""
+
+    @abstractmethod
+    async def delete(self, meeting_id: str) -> bool:
+        """Remove a meeting's status and results"""
+
+    @abstractmethod
+    async def evict_expired(self) -> int:
+        """Drop meetings past their TTL, returning how many were removed"""
+
+
+class MemoryJobStore(JobStore):
+    """Single-process store, mainly for tests and local demos"""
+
+    def __init__(self, ttl_seconds: float = JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._records = {}
+        self._results = {}
+        self._live_text = {}
+
+    def _expired(self, record: Dict) -> bool:
+        return record["updated_at"] + self.ttl_seconds < time.time()
+
+    async def create(self, meeting_id: str, **fields) -> Dict:
+        now = time.time()
+        record = dict(fields, created_at=now, updated_at=now)
+        self._records[meeting_id] = record
+        return dict(record)
+
+    async def get(self, meeting_id: str) -> Optional[Dict]:
+        record = self._records.get(meeting_id)
+        if record is None or self._expired(record):
+            return None
+        return dict(record)
+
+    async def update(self, meeting_id: str, **fields) -> Optional[Dict]:
+        record = self._records.get(meeting_id)
+        if record is None:
+            return None
+        record.update(fields, updated_at=time.time())
+        return dict(record)
+
+    async def update_if(self, meeting_id: str, expected: Dict, **fields) -> Optional[Dict]:
+        record = self._records.get(meeting_id)
+        if record is None or not _matches(record, expected):
+            return None
+        return await self.update(meeting_id, **fields)
+
+    async def append(self, meeting_id: str, field: str, value: Any, max_length: Optional[int] = None,
+                     expected: Optional[Dict] = None) -> Optional[Dict]:
+        record = self._records.get(meeting_id)
+        if record is None or not _matches(record, expected) or not _has_room(record, field, max_length):
+            return None
+        return await self.update(meeting_id, **{field: record.get(field, []) + [value]})
+
+    async def set_results(self, meeting_id: str, results: Dict):
+        self._results[meeting_id] = results
+
+    async def get_results(self, meeting_id: str) -> Optional[Dict]:
+        if await self.get(meeting_id) is None:
+            return None
+        return self._results.get(meeting_id)
+
+    async def append_live_text(self, meeting_id: str, offset: int, text: str):
+        self._live_text[meeting_id] = self._live_text.get(meeting_id, "")[:offset] + text
+
+    async def get_live_text(self, meeting_id: str) -> Optional[str]:
+        if await self.get(meeting_id) is None:
+            return None
+        return self._live_text.get(meeting_id, "")
+
+    async def delete(self, meeting_id: str) -> bool:
+        self._results.pop(meeting_id, None)
+        self._live_text.pop(meeting_id, None)
+        return self._records.pop(meeting_id, None) is not None
+
+    async def evict_expired(self) -> int:
+        expired = [mid for mid, record in self._records.items() if self._expired(record)]
+        for meeting_id in expired:
+            await self.delete(meeting_id)
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    SQLite (WAL mode) store that several worker processes can share
+
+    Status rows are tiny and indexed by meeting ID; results live compressed in
+    a separate table. Each worker keeps a small hot tier of status records in
+    memory so frequent polling rarely touches the database.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH, ttl_seconds: float = JOB_TTL_SECONDS,
+                 hot_entries: int = HOT_ENTRIES, hot_ttl_seconds: float = HOT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hot_ttl_seconds = hot_ttl_seconds
+        self._hot = LRUCache(hot_entries)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                meeting_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at);
+            CREATE TABLE IF NOT EXISTS results (
+                meeting_id TEXT PRIMARY KEY,
+                body BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS live_text (
+                meeting_id TEXT NOT NULL,
+                "offset" INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS live_text_meeting_id ON live_text (meeting_id);
+            """
+        )
+
+    # -- synchronous helpers, run on a worker thread --
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _read(self, meeting_id: str) -> Optional[Dict]:
+        rows = self._execute(
+            "SELECT data FROM jobs WHERE meeting_id = ? AND expires_at >= ?", (meeting_id, time.time())
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def _write(self, meeting_id: str, record: Dict):
+        self._execute(
+            "INSERT OR REPLACE INTO jobs (meeting_id, data, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+            (meeting_id, json.dumps(record), record["updated_at"], record["updated_at"] + self.ttl_seconds),
+        )
+
+    def _merge(self, meeting_id: str, change: Callable[[Dict], Optional[Dict]]) -> Optional[Dict]:
+        """Apply the fields `change` returns for the current record (None leaves it alone)"""
+        # BEGIN IMMEDIATE so concurrent workers can't interleave read-modify-write
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT data FROM jobs WHERE meeting_id = ?", (meeting_id,)).fetchall()
+                record = json.loads(rows[0][0]) if rows else None
+                fields = change(record) if record is not None else None
+                if fields is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                record.update(fields, updated_at=time.time())
+                self._conn.execute(
+                    "UPDATE jobs SET data = ?, updated_at = ?, expires_at = ? WHERE meeting_id = ?",
+                    (json.dumps(record), record["updated_at"], record["updated_at"] + self.ttl_seconds, meeting_id),
+                )
+                self._conn.execute("COMMIT")
+                return record
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _cache(self, meeting_id: str, record: Dict):
+        self._hot.set(meeting_id, (record, time.monotonic()))
+
+    # -- JobStore interface --
+
+    async def create(self, meeting_id: str, **fields) -> Dict:
+        now = time.time()
+        record = dict(fields, created_at=now, updated_at=now)
+        await asyncio.to_thread(self._write, meeting_id, record)
+        self._cache(meeting_id, record)
+        return dict(record)
+
+    async def get(self, meeting_id: str) -> Optional[Dict]:
+        hot = self._hot.get(meeting_id)
+        if hot is not None:
+            record, cached_at = hot
+            if time.monotonic() - cached_at < self.hot_ttl_seconds:
+                return dict(record)
+
+        record = await asyncio.to_thread(self._read, meeting_id)
+        if record is None:
+            self._hot.delete(meeting_id)
+            return None
+        self._cache(meeting_id, record)
+        return dict(record)
+
+    async def _apply(self, meeting_id: str, change: Callable[[Dict], Optional[Dict]]) -> Optional[Dict]:
+        record = await asyncio.to_thread(self._merge, meeting_id, change)
+        if record is not None:
+            self._cache(meeting_id, record)
+            return dict(record)
+        return None
+
+    async def update(self, meeting_id: str, **fields) -> Optional[Dict]:
+        return await self._apply(meeting_id, lambda record: fields)
+
+    async def update_if(self, meeting_id: str, expected: Dict, **fields) -> Optional[Dict]:
+        return await self._apply(meeting_id, lambda record: fields if _matches(record, expected) else None)
+
+    async def append(self, meeting_id: str, field: str, value: Any, max_length: Optional[int] = None,
+                     expected: Optional[Dict] = None) -> Optional[Dict]:
+        def change(record):
+            if not _matches(record, expected) or not _has_room(record, field, max_length):
+                return None
+            return {field: record.get(field, []) + [value]}
+
+        return await self._apply(meeting_id, change)
+
+    async def set_results(self, meeting_id: str, results: Dict):
+        body = await asyncio.to_thread(lambda: zlib.compress(json.dumps(results).encode("utf-8"), 6))
+        await asyncio.to_thread(
+            self._execute, "INSERT OR REPLACE INTO results (meeting_id, body) VALUES (?, ?)", (meeting_id, body)
+        )
+
+    async def get_results(self, meeting_id: str) -> Optional[Dict]:
+        if await self.get(meeting_id) is None:
+            return None
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT body FROM results WHERE meeting_id = ?", (meeting_id,)
+        )
+        if not rows:
+            return None
+        return await asyncio.to_thread(lambda: json.loads(zlib.decompress(rows[0][0])))
+
+    async def append_live_text(self, meeting_id: str, offset: int, text: str):
+        # Each piece is its own row, so an update costs its own length rather than the transcript's
+        await asyncio.to_thread(
+            self._execute, 'INSERT INTO live_text (meeting_id, "offset", text) VALUES (?, ?, ?)',
+            (meeting_id, offset, text)
+        )
+
+    async def get_live_text(self, meeting_id: str) -> Optional[str]:
+        if await self.get(meeting_id) is None:
+            return None
+        rows = await asyncio.to_thread(
+            self._execute, 'SELECT "offset", text FROM live_text WHERE meeting_id = ? ORDER BY rowid', (meeting_id,)
+        )
+        transcript = ""
+        for offset, text in rows:
+            transcript = transcript[:offset] + text
+        return transcript
+
+    async def delete(self, meeting_id: str) -> bool:
+        self._hot.delete(meeting_id)
+
+        def remove():
+            with self._lock:
+                self._conn.execute("DELETE FROM results WHERE meeting_id = ?", (meeting_id,))
+                self._conn.execute("DELETE FROM live_text WHERE meeting_id = ?", (meeting_id,))
+                return self._conn.execute("DELETE FROM jobs WHERE meeting_id = ?", (meeting_id,)).rowcount > 0
+
+        return await asyncio.to_thread(remove)
+
+    async def evict_expired(self) -> int:
+        def remove():
+            now = time.time()
+            with self._lock:
+                for table in ("results", "live_text"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE meeting_id IN (SELECT meeting_id FROM jobs WHERE expires_at < ?)",
+                        (now,)
+                    )
+                return self._conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,)).rowcount
+
+        return await asyncio.to_thread(remove)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store() -> JobStore:
+    """Build the backend selected by DOGWHISTLE_JOB_STORE (sqlite or memory)"""
+    if JOB_STORE_BACKEND == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore()
@@ -0,0 +1,238 @@
+"""
+DogWhistle Live Transcription
+Transcribes a meeting while it is being recorded, from the recorder's
+chunks streamed over a WebSocket
+
+Chunks are appended to the recording on disk as they arrive. Compressed
+recorder output (WebM/Ogg/MP4) is decoded as it streams by a long-running
+ffmpeg into a growing 16 kHz WAV; PCM WAV streams are used as they are. An
+IncrementalTranscriber transcribes that audio in rolling windows, so the
+running transcript can be shown during the meeting and stopping leaves
+only the last window and the analysis.
+"""
+
+import asyncio
+import hashlib
+import os
+import struct
+from typing import Awaitable, Callable, Dict, Optional
+
+from audio_io import SPEECH_SAMPLE_RATE, ffmpeg_available
+from resumable_upload import IncrementalTranscriber, WavLayout, wav_layout
+from upload_streaming import MAX_UPLOAD_BYTES, SNIFF_BYTES, UploadRejected, sniff_audio_format
+
+# Shorter than upload windows so the live transcript trails the meeting by
+# about this much
+LIVE_WINDOW_SECONDS = float(os.getenv("DOGWHISTLE_LIVE_WINDOW_SECONDS", "30"))
+
+# Leading bytes of a WAV stream kept to find its data chunk
+HEADER_BYTES = 64 * 1024
+
+# Bytes read from ffmpeg's output at a time
+DECODE_READ_BYTES = 64 * 1024
+
+
+def streaming_wav_header(sample_rate: int = SPEECH_SAMPLE_RATE) -> bytes:
+    """Header for a mono 16-bit WAV whose length isn't known yet"""
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
+
+
+def _append(f, data: bytes):
+    f.write(data)
+    f.flush()  # The transcriber reads the file from another handle
+
+
+class StreamDecoder:
+    """
+    Decodes a compressed recording as its bytes arrive, using one ffmpeg
+    process, into a growing 16 kHz mono WAV at `pcm_path`
+    `on_audio(size)` is awaited with the WAV's size as decoded audio lands
+    """
+
+    def __init__(self, pcm_path: str, on_audio: Callable[[int], Awaitable]):
+        self.pcm_path = pcm_path
+        self.on_audio = on_audio
+        self.process = None
+        self.reader = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-v", "error", "-i", "pipe:0",
+            "-ac", "1", "-ar", str(SPEECH_SAMPLE_RATE), "-f", "s16le", "pipe:1",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        # File I/O runs on a worker thread, as LiveSession._write does, so
+        # decoding live meetings doesn't stall the event loop
+        header = streaming_wav_header()
+        size = len(header)
+        f = await asyncio.to_thread(open, self.pcm_path, "wb")
+        try:
+            await asyncio.to_thread(_append, f, header)
+            while True:
+                pcm = await self.process.stdout.read(DECODE_READ_BYTES)
+                if not pcm:
+                    break
+                await asyncio.to_thread(_append, f, pcm)
+                size += len(pcm)
+                await self.on_audio(size)
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def feed(self, chunk: bytes):
+        self.process.stdin.write(chunk)
+        await self.process.stdin.drain()
+
+    async def finish(self):
+        """Decode what's left and wait for the last audio to be handed on"""
+        self.process.stdin.close()
+        await self.reader
+        await self.process.wait()
+
+    def kill(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+
+
+class LiveSession:
+    """
+    One meeting being recorded and transcribed as it streams in
+    `transcribe(path)` transcribes a 16 kHz window file (the processor's
+    transcribe_window_file); `on_transcript(offset, text)` is called whenever a
+    window finishes, with the running transcript's new text and the character
+    offset it starts at (earlier than the end if the last window's overlap changed)
+    """
+
+    def __init__(self, meeting_id: str, path: str, transcribe: Callable[[str], Awaitable[Dict]],
+                 on_transcript: Callable[[int, str], None], max_bytes: int = MAX_UPLOAD_BYTES):
+        self.meeting_id = meeting_id
+        self.path = path
+        self.pcm_path = f"{os.path.splitext(path)[0]}_live.wav"
+        self.transcribe = transcribe
+        self.on_transcript = on_transcript
+        self.transcript = ""  # Running transcript, as last reported
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.header = b""
+        self.audio_format: Optional[str] = None
+        self.decoder: Optional[StreamDecoder] = None
+        self.transcriber: Optional[IncrementalTranscriber] = None
+        self.live = True  # False once live transcription isn't possible for this stream
+        self.file = open(path, "wb")
+
+    async def add_chunk(self, chunk: bytes):
+        """Append a recorder chunk and hand its audio to the transcriber"""
+        if self.size + len(chunk) > self.max_bytes:
+            raise UploadRejected(413, f"Recording is larger than {self.max_bytes // (1024 * 1024)}MB")
+        if len(self.header) < HEADER_BYTES:
+            self.header += chunk[:HEADER_BYTES - len(self.header)]
+        if self.audio_format is None and len(self.header) >= SNIFF_BYTES:
+            self.audio_format = sniff_audio_format(self.header[:SNIFF_BYTES])
+            if self.audio_format is None:
+                raise UploadRejected(400, "Stream is not a supported audio format")
+
+        await asyncio.to_thread(self._write, chunk)
+        self.size += len(chunk)
+        self.digest.update(chunk)
+        if self.live and self.audio_format is not None:
+            await self._transcribe_more(chunk)
+
+    def _read_so_far(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def _write(self, chunk: bytes):
+        self.file.write(chunk)
+        self.file.flush()  # The transcriber reads the file from another handle
+
+    async def _transcribe_more(self, chunk: bytes):
+        if self.audio_format == "wav":
+            if self.transcriber is None:
+                layout = wav_layout(self.header)
+                if layout is None:
+                    self.live = len(self.header) < HEADER_BYTES
+                    return
+                self.transcriber = self._transcriber(self.path, layout)
+            await self.transcriber.on_upload_progress(self.size)
+            return
+
+        if self.decoder is None:
+            if not ffmpeg_available():
+                self._give_up(f"ffmpeg is needed to decode {self.audio_format}")
+                return
+            self.transcriber = self._transcriber(self.pcm_path, wav_layout(streaming_wav_header()))
+            self.decoder = StreamDecoder(self.pcm_path, self.transcriber.on_upload_progress)
+            await self.decoder.start()
+            # Everything so far, in case sniffing waited on more than this chunk
+            chunk = await asyncio.to_thread(self._read_so_far)
+        try:
+            await self.decoder.feed(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            self._give_up("the decoder stopped")
+
+    def _give_up(self, reason: str):
+        """Fall back to transcribing the whole recording when it stops"""
+        print(f"Live transcription off for meeting {self.meeting_id}: {reason}")
+        self.live = False
+        if self.decoder is not None:
+            self.decoder.kill()
+            self.decoder = None
+        self.close_transcriber()
+
+    def _transcriber(self, path: str, layout: WavLayout) -> IncrementalTranscriber:
+        def window_done():
+            if transcriber is self.transcriber:  # Not one that was given up on
+                self._report(transcriber.transcript_so_far())
+
+        transcriber = IncrementalTranscriber(path, layout, self.transcribe, window_seconds=LIVE_WINDOW_SECONDS,
+                                             on_window=window_done)
+        return transcriber
+
+    def _report(self, transcript: str):
+        """Pass on only what changed, so updates don't grow with the meeting"""
+        offset = len(os.path.commonprefix([self.transcript, transcript]))
+        if offset == len(transcript) == len(self.transcript):
+            return
+        self.transcript = transcript
+        self.on_transcript(offset, transcript[offset:])
+
+    @property
+    def sha256(self) -> str:
+        return self.digest.hexdigest()
+
+    async def stop(self) -> Optional[IncrementalTranscriber]:
+        """
+        Recording finished: close the file and flush the decoder
+        Returns the transcriber to finish the transcript with, or None when
+        the recording should be transcribed the normal way
+        """
+        self.file.close()
+        if self.decoder is not None:
+            try:
+                await self.decoder.finish()
+            except Exception as e:
+                self._give_up(f"decoding failed ({e})")
+        return self.transcriber
+
+    def close_transcriber(self):
+        if self.transcriber is not None:
+            self.transcriber.close()
+            self.transcriber = None
+
+    def discard(self):
+        """Remove the session's files (and stop decoding, if it still is)"""
+        if not self.file.closed:
+            self.file.close()
+        if self.decoder is not None:
+            self.decoder.kill()
+        self.close_transcriber()
+        for path in (self.path, self.pcm_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,193 @@
+"""
+DogWhistle Map-Reduce Analysis
+Hierarchical analysis for transcripts too long for one prompt
+
+The transcript is split into token-budgeted chunks, each chunk is analyzed
+on its own (map), action items are merged locally so the output cap can't
+truncate them, and one final call writes the summary from the chunk notes
+(reduce). The result has the same schema as the single-prompt analysis.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Dict, List
+
+# Transcripts estimated above this many tokens are analyzed in chunks
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("DOGWHISTLE_MAP_REDUCE_TOKENS", "12000"))
+
+# Target size of each chunk sent to the map step
+CHUNK_TOKENS = int(os.getenv("DOGWHISTLE_CHUNK_TOKENS", "4000"))
+
+# Map calls in flight at once for one meeting
+MAP_CONCURRENCY = int(os.getenv("DOGWHISTLE_MAP_CONCURRENCY", "4"))
+
+# Rough characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Token overlap above which two action items are treated as the same task
+DUPLICATE_SIMILARITY = 0.6
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+_STOPWORDS = {"a", "an", "the", "to", "and", "of", "for", "on", "in", "with", "by", "up", "our", "we", "will"}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def needs_map_reduce(transcript: str, threshold_tokens: int = MAP_REDUCE_THRESHOLD_TOKENS) -> bool:
+    return estimate_tokens(transcript) > threshold_tokens
+
+
+def split_transcript(transcript: str, chunk_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split at sentence boundaries into chunks of about `chunk_tokens`"""
+    budget = chunk_tokens * CHARS_PER_TOKEN
+    sentences = re.split(r"(?<=[.!?])\s+", transcript.strip())
+
+    chunks, current, size = [], [], 0
+    for sentence in sentences:
+        # A run-on "sentence" longer than a chunk is cut at word boundaries
+        while len(sentence) > budget:
+            cut = sentence.rfind(" ", 0, budget)
+            cut = cut if cut > 0 else budget
+            head, sentence = sentence[:cut], sentence[cut:].lstrip()
+            if current:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            chunks.append(head)
+        if size + len(sentence) > budget and current:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def chunk_prompt(chunk: str, index: int, total: int) -> str:
+    return f"""
+        This is part {index + 1} of {total} of a meeting transcript. Extract what this part contains.
+
+        TRANSCRIPT PART:
+        {chunk}
+
+        Provide your notes in the following JSON format:
+        {{
+            "summary": "3-5 sentences covering the topics, decisions and outcomes in this part",
+            "action_items": [
+                {{
+                    "task": "Clear description of what needs to be done",
+                    "owner": "Person responsible (if mentioned)",
+                    "due_date": "Due date (if mentioned)",
+                    "priority": "high/medium/low based on context"
+                }}
+            ],
+            "open_questions": ["Question left unresolved in this part"],
+            "key_insights": ["Important insight or decision"],
+            "topics_discussed": ["topic1", "topic2"],
+            "sentiment": "positive/neutral/mixed/negative"
+        }}
+
+        Only include action items that are actually agreed in this part. Be specific.
+        """
+
+
+def reduce_prompt(notes: List[Dict], action_items: List[Dict]) -> str:
+    parts = "\n\n".join(
+        f"PART {i + 1}:\nSummary: {note.get('summary', '')}\n"
+        f"Open questions: {'; '.join(note.get('open_questions', []))}\n"
+        f"Insights: {'; '.join(note.get('key_insights', []))}"
+        for i, note in enumerate(notes)
+    )
+    tasks = "\n".join(f"- {item['task']}" for item in action_items) or "- (none)"
+    return f"""
+        These are notes from consecutive parts of one long meeting, followed by its agreed action items.
+
+        {parts}
+
+        ACTION ITEMS:
+        {tasks}
+
+        Combine them into one analysis of the whole meeting in the following JSON format:
+        {{
+            "summary": {{
+                "brief": "2-3 sentence executive summary",
+                "detailed": "2-3 paragraph detailed summary covering key topics, decisions, and outcomes"
+            }},
+            "follow_up_questions": [
+                "Thoughtful question 1 based on unresolved topics",
+                "Thoughtful question 2 that could deepen the discussion",
+                "Thoughtful question 3 about implementation or next steps"
+            ],
+            "key_insights": [
+                "Important insight or decision 1",
+                "Important insight or decision 2"
+            ],
+            "topics_discussed": ["topic1", "topic2", "topic3"],
+            "sentiment": "overall meeting sentiment: positive/neutral/mixed/negative",
+            "meeting_type": "brainstorm/planning/review/standup/other"
+        }}
+
+        Be specific and actionable. Merge repeated points instead of listing them twice.
+        """
+
+
+def _task_words(task: str) -> set:
+    words = re.findall(r"[a-z0-9]+", task.lower())
+    return {word for word in words if word not in _STOPWORDS}
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def merge_action_items(chunk_items: List[List[Dict]]) -> List[Dict]:
+    """
+    De-duplicate action items across chunks, in order of first mention
+    Duplicates keep the longest wording, the most often named owner, the
+    latest stated due date and the highest priority
+    """
+    groups = []  # (words, [items])
+    for items in chunk_items:
+        for item in items:
+            if not item.get("task"):
+                continue
+            words = _task_words(item["task"])
+            for group_words, group in groups:
+                if _similarity(words, group_words) >= DUPLICATE_SIMILARITY:
+                    group.append(item)
+                    group_words |= words
+                    break
+            else:
+                groups.append((set(words), [item]))
+
+    merged = []
+    for _, group in groups:
+        owners = Counter(item["owner"] for item in group if item.get("owner"))
+        due_dates = [item["due_date"] for item in group if item.get("due_date")]
+        priorities = [str(item.get("priority", "medium")).lower() for item in group]
+        merged.append({
+            "task": max((item["task"] for item in group), key=len),
+            "owner": owners.most_common(1)[0][0] if owners else "",
+            "due_date": due_dates[-1] if due_dates else "",
+            "priority": max(priorities, key=lambda p: PRIORITY_RANK.get(p, 1)),
+        })
+    return merged
+
+
+def combine_analysis(reduced: Dict, action_items: List[Dict]) -> Dict:
+    """Assemble the final analysis in the single-prompt schema and key order"""
+    return {
+        "summary": reduced.get("summary", {}),
+        "action_items": action_items,
+        "follow_up_questions": reduced.get("follow_up_questions", []),
+        "key_insights": reduced.get("key_insights", []),
+        "topics_discussed": reduced.get("topics_discussed", []),
+        "sentiment": reduced.get("sentiment", "neutral"),
+        "meeting_type": reduced.get("meeting_type", "other"),
+    }
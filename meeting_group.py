@@ -0,0 +1,197 @@
+"""
+DogWhistle Meeting Groups
+Merges recordings of one meeting made on several phones into a single track
+
+Recordings start at different moments, so each is aligned to the longest
+one by FFT cross-correlation of a 100 Hz loudness envelope, then refined to
+the sample on a short excerpt. The merged track takes each second from
+whichever phone hears it most clearly (best SNR), with short crossfades,
+so the meeting is transcribed and analyzed once instead of once per phone.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE, load_pcm, write_wav
+from vad import FRAME_SECONDS, frame_features
+
+# Wait this long after the last recording arrives before processing a group
+GROUP_SETTLE_SECONDS = float(os.getenv("DOGWHISTLE_GROUP_SETTLE_SECONDS", "20"))
+
+# Most recordings accepted into one group
+MAX_GROUP_RECORDINGS = int(os.getenv("DOGWHISTLE_MAX_GROUP_RECORDINGS", "8"))
+
+ENVELOPE_RATE = 100  # Hz
+SELECT_SECONDS = 1.0
+CROSSFADE_SECONDS = 0.02
+
+# Another phone must be this much clearer (3 dB) before the merge switches to it
+SWITCH_MARGIN = 2.0
+
+# Length of the excerpt used to refine alignment to the sample
+REFINE_SECONDS = 10.0
+
+
+@dataclass
+class MergedRecording:
+    path: str
+    offsets: List[float]  # Seconds each source starts after the merged track starts
+    sources_used: Dict[int, float] = field(default_factory=dict)  # Source index -> seconds chosen
+    duration: float = 0.0
+
+
+def envelope(samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE, rate: int = ENVELOPE_RATE) -> np.ndarray:
+    """Mean absolute amplitude at `rate` Hz, log-compressed and zero-mean"""
+    step = sample_rate // rate
+    count = len(samples) // step
+    blocks = np.abs(samples[:count * step].reshape(count, step).astype(np.float32)).mean(axis=1)
+    compressed = np.log1p(blocks)
+    return compressed - compressed.mean() if count else compressed
+
+
+def cross_correlate(reference: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """Full cross-correlation via FFT; index i is lag i - (len(other) - 1)"""
+    size = len(reference) + len(other) - 1
+    n = 1 << (size - 1).bit_length()
+    spectrum = np.fft.rfft(reference, n) * np.conj(np.fft.rfft(other, n))
+    correlation = np.fft.irfft(spectrum, n)
+    # Rearrange so negative lags come first
+    return np.concatenate((correlation[n - (len(other) - 1):], correlation[:len(reference)]))
+
+
+def find_offset(reference: np.ndarray, other: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE) -> int:
+    """
+    Samples by which `other` starts after `reference` (negative if before)
+    Coarse lag from the envelopes, then refined on raw audio around it
+    """
+    ref_env, other_env = envelope(reference, sample_rate), envelope(other, sample_rate)
+    if len(ref_env) == 0 or len(other_env) == 0:
+        return 0
+    coarse = int(np.argmax(cross_correlate(ref_env, other_env))) - (len(other_env) - 1)
+    step = sample_rate // ENVELOPE_RATE
+    lag = coarse * step
+
+    # Refine within +/- one envelope step, on an excerpt from the loudest part
+    # of the stretch both recordings cover
+    lo, hi = max(0, step - lag), min(len(other), len(reference) - lag - step)
+    excerpt_length = min(hi - lo, int(REFINE_SECONDS * sample_rate))
+    if excerpt_length <= 0:
+        return lag
+    loudest = int(np.argmax(np.convolve(np.abs(other_env), np.ones(100), mode="same"))) * step
+    start = int(np.clip(loudest - excerpt_length // 2, lo, hi - excerpt_length))
+    excerpt = other[start:start + excerpt_length].astype(np.float32)
+    ref_start = lag + start - step
+    region = reference[ref_start:ref_start + excerpt_length + 2 * step].astype(np.float32)
+    fine = np.correlate(region, excerpt, mode="valid")
+    return ref_start + int(np.argmax(fine)) - start
+
+
+def _placed(track: np.ndarray, position: int, gain: float, first: int, last: int) -> np.ndarray:
+    """Samples [first, last) of the shared timeline from one track, zero where it wasn't recording"""
+    out = np.zeros(last - first, dtype=np.float32)
+    lo, hi = max(first, position), min(last, position + len(track))
+    if lo < hi:
+        out[lo - first:hi - first] = track[lo - position:hi - position] * gain
+    return out
+
+
+def _window_snr(track: np.ndarray, position: int, length: int, window: int,
+                sample_rate: int = SPEECH_SAMPLE_RATE) -> np.ndarray:
+    """Each timeline window's energy over the track's noise floor (0 where the track is absent)"""
+    # Speech leaves few whole seconds silent, so the floor comes from 20 ms frames
+    energy, _ = frame_features(track, sample_rate)
+    frame = int(sample_rate * FRAME_SECONDS)
+    per_window = window // frame
+    count = length // window
+    power = np.zeros(count * per_window, dtype=np.float32)
+    covered = np.zeros(count * per_window, dtype=bool)
+    at = int(round(position / frame))
+    kept = energy[:max(0, len(power) - at)]
+    power[at:at + len(kept)] = kept ** 2
+    covered[at:at + len(kept)] = True
+
+    floor = float(np.percentile(energy, 10)) ** 2 if len(energy) else 0.0
+    power, covered = power.reshape(count, per_window), covered.reshape(count, per_window)
+    return np.where(covered.all(axis=1), power.mean(axis=1) / max(floor, 1.0), 0.0)
+
+
+def merge_recordings(paths: List[str], output_path: str, sample_rate: int = SPEECH_SAMPLE_RATE) -> MergedRecording:
+    """Align recordings of the same meeting and write the clearest-source mix"""
+    tracks = [load_pcm(path, sample_rate) for path in paths]
+    reference = max(range(len(tracks)), key=lambda i: len(tracks[i]))
+    lags = [0 if i == reference else find_offset(tracks[reference], track, sample_rate)
+            for i, track in enumerate(tracks)]
+
+    # Where each track sits on a shared timeline, and a gain that level-matches
+    # them so switching sources doesn't jump in volume
+    positions = [lag - min(lags) for lag in lags]
+    length = max(position + len(track) for position, track in zip(positions, tracks))
+    gains = [4000.0 / max(float(np.percentile(np.abs(track), 95)) if len(track) else 1.0, 1.0)
+             for track in tracks]
+
+    window = int(SELECT_SECONDS * sample_rate)
+    snr = np.stack([_window_snr(track, position, length, window, sample_rate)
+                    for track, position in zip(tracks, positions)])
+    choice = np.argmax(snr, axis=0)
+    # Hold the current source unless another is clearly better
+    for w in range(1, len(choice)):
+        previous = choice[w - 1]
+        if snr[previous, w] > 0 and snr[choice[w], w] < snr[previous, w] * SWITCH_MARGIN:
+            choice[w] = previous
+
+    def placed(source: int, first: int, last: int) -> np.ndarray:
+        return _placed(tracks[source], positions[source], gains[source], first, last)
+
+    # Windows after the last whole one stay with the last choice
+    sources = np.concatenate((choice, [choice[-1] if len(choice) else reference]))
+    merged = np.empty(length, dtype=np.int16)
+    fade = int(CROSSFADE_SECONDS * sample_rate)
+    ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+    for w, source in enumerate(sources):
+        first, last = w * window, length if w == len(choice) else (w + 1) * window
+        audio = placed(source, first, last)
+        if w and source != sources[w - 1] and len(audio) >= fade:
+            # Crossfade from the previous source into this one
+            audio[:fade] = placed(sources[w - 1], first, first + fade) * (1 - ramp) + audio[:fade] * ramp
+        merged[first:last] = np.clip(np.round(audio), -32768, 32767)
+
+    write_wav(output_path, merged, sample_rate)
+    used = np.bincount(choice, minlength=len(tracks)) * SELECT_SECONDS
+    return MergedRecording(
+        path=output_path,
+        offsets=[position / sample_rate for position in positions],
+        sources_used={i: float(seconds) for i, seconds in enumerate(used) if seconds},
+        duration=length / sample_rate,
+    )
+
+
+def combine_device_scans(scans: List[Optional[List[Dict]]], offsets: List[float]) -> Optional[List[Dict]]:
+    """Merge per-recording device scans onto the group's timeline"""
+    if all(scan is None for scan in scans):
+        return None
+    devices = {}
+    for scan, offset in zip(scans, offsets):
+        for device in scan or []:
+            entry = devices.setdefault(device["device_code"], dict(device, intervals=[]))
+            entry["intervals"] += [{"start": round(span["start"] + offset, 2), "end": round(span["end"] + offset, 2)}
+                                   for span in device["intervals"]]
+
+    combined = []
+    for device in devices.values():
+        spans = []
+        for span in sorted(device["intervals"], key=lambda s: s["start"]):
+            if spans and span["start"] <= spans[-1]["end"]:
+                spans[-1]["end"] = max(spans[-1]["end"], span["end"])
+            else:
+                spans.append(dict(span))
+        combined.append(dict(
+            device,
+            intervals=spans,
+            first_seen=spans[0]["start"],
+            last_seen=spans[-1]["end"],
+            total_seconds=round(sum(s["end"] - s["start"] for s in spans), 2),
+        ))
+    return sorted(combined, key=lambda device: device["first_seen"])
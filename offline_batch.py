@@ -0,0 +1,150 @@
+"""
+DogWhistle Offline Batch
+Process a directory (or manifest) of recordings without the web server
+
+Decoding, silence trimming and encoding run in a process pool, one recording
+per core; the Whisper and GPT calls for the prepared recordings share one
+event loop, bounded by the processor's stage slots and rate limiter. Every
+finished recording is appended to a checkpoint file, so an interrupted run
+picks up where it stopped.
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from dogwhistle_ai_processor import DogWhistleProcessor, prepare_audio
+from upload_streaming import SUPPORTED_EXTENSIONS
+
+# Preprocessing processes (default: one per core)
+BATCH_WORKERS = int(os.getenv("DOGWHISTLE_BATCH_WORKERS", "0")) or os.cpu_count() or 1
+
+# Meetings in each API-bound stage (transcription, analysis) at once
+BATCH_CONCURRENCY = int(os.getenv("DOGWHISTLE_BATCH_CONCURRENCY", "8"))
+
+CHECKPOINT_PATH = os.getenv("DOGWHISTLE_BATCH_CHECKPOINT", "dogwhistle_batch_checkpoint.jsonl")
+
+
+class Recording(NamedTuple):
+    meeting_id: str
+    path: str
+
+
+def _meeting_id(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "recording"
+
+
+def find_recordings(source: str) -> List[Recording]:
+    """
+    Recordings under a directory (recursively), or listed in a manifest file
+    A manifest has one path per line, optionally followed by a tab and the
+    meeting ID; relative paths are relative to the manifest, # starts a comment.
+    Directory recordings are named after their path relative to the directory.
+    """
+    recordings = []
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name.startswith(".") or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.splitext(os.path.relpath(path, source))[0]
+                recordings.append(Recording(_meeting_id(relative.replace(os.sep, "__")), os.path.abspath(path)))
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                path, _, meeting_id = (part.strip() for part in line.partition("\t"))
+                path = os.path.join(base, os.path.expanduser(path))
+                meeting_id = meeting_id or _meeting_id(os.path.splitext(os.path.basename(path))[0])
+                recordings.append(Recording(meeting_id, os.path.abspath(path)))
+
+    seen = set()
+    for recording in recordings:
+        if recording.meeting_id in seen:
+            raise ValueError(f"Two recordings would share meeting ID {recording.meeting_id}")
+        seen.add(recording.meeting_id)
+    return recordings
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    """The last checkpoint entry for each meeting; a line torn by a crash is ignored"""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[entry["meeting_id"]] = entry
+    return entries
+
+
+def append_checkpoint(path: str, entry: Dict):
+    """Durably record one finished meeting (call via asyncio.to_thread)"""
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def run_batch(recordings: List[Recording], workers: int = BATCH_WORKERS,
+                    concurrency: int = BATCH_CONCURRENCY, checkpoint_path: str = CHECKPOINT_PATH,
+                    retry_failed: bool = False, processor: Optional[DogWhistleProcessor] = None) -> Dict:
+    """
+    Process every recording not already completed in the checkpoint
+    Results are written by format_results, exactly as the server writes them.
+    Returns counts of what happened.
+    """
+    done = load_checkpoint(checkpoint_path)
+    skip = {"completed", "failed"} if not retry_failed else {"completed"}
+    pending = [r for r in recordings if done.get(r.meeting_id, {}).get("status") not in skip]
+    summary = {"total": len(recordings), "skipped": len(recordings) - len(pending), "completed": 0, "failed": 0}
+    if not pending:
+        return summary
+    if processor is None:
+        processor = DogWhistleProcessor(transcription_slots=concurrency, analysis_slots=concurrency)
+    print(f"Processing {len(pending)} recordings ({summary['skipped']} already done) "
+          f"with {workers} workers, {concurrency} meetings per API stage")
+
+    loop = asyncio.get_running_loop()
+    # Enough admitted to keep every worker busy while each API stage is full,
+    # without preparing the whole backlog's audio into temp space up front
+    admitted = asyncio.Semaphore(workers + 2 * concurrency)
+
+    async def run(recording: Recording, pool: ProcessPoolExecutor):
+        async with admitted:
+            started = time.monotonic()
+            work_dir = tempfile.mkdtemp(prefix="dogwhistle_batch_")
+            entry = {"meeting_id": recording.meeting_id, "path": recording.path}
+            try:
+                prepared = await loop.run_in_executor(pool, prepare_audio, recording.path, work_dir)
+                results = await processor.process_meeting(recording.path, recording.meeting_id, prepared=prepared)
+                entry.update(status="completed", sha256=prepared.sha256,
+                             report=results["file_paths"]["full_report_json"])
+            except Exception as e:
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            entry["seconds"] = round(time.monotonic() - started, 2)
+            await asyncio.to_thread(append_checkpoint, checkpoint_path, entry)
+            summary[entry["status"]] += 1
+            finished = summary["completed"] + summary["failed"]
+            print(f"[{finished}/{len(pending)}] {recording.meeting_id}: {entry['status']} in {entry['seconds']}s"
+                  + (f" ({entry['error']})" if "error" in entry else ""))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        await asyncio.gather(*(run(recording, pool) for recording in pending))
+    return summary
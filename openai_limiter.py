@@ -0,0 +1,386 @@
+"""
+DogWhistle OpenAI Rate Limiting
+Shared wrapper around AsyncOpenAI that keeps every meeting in the process
+under the account's limits instead of failing on the first 429
+
+Per endpoint (Whisper, chat):
+- token buckets for requests/min and tokens/min
+- AIMD concurrency: +1 slot per window of successes, halved on 429
+- Retry-After pauses the whole endpoint, not just the request that saw it
+- jittered exponential retries, bounded by a per-call deadline
+- a circuit breaker that fails fast while the API is down
+"""
+
+import asyncio
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import pipeline_metrics
+
+WHISPER_RPM = float(os.getenv("DOGWHISTLE_WHISPER_RPM", "50"))
+CHAT_RPM = float(os.getenv("DOGWHISTLE_CHAT_RPM", "500"))
+CHAT_TPM = float(os.getenv("DOGWHISTLE_CHAT_TPM", "30000"))
+
+# Upper bound for the adaptive concurrency of each endpoint
+MAX_CONCURRENCY = int(os.getenv("DOGWHISTLE_OPENAI_CONCURRENCY", "16"))
+
+# Give up retrying a call after this long
+CALL_DEADLINE_SECONDS = float(os.getenv("DOGWHISTLE_OPENAI_DEADLINE_SECONDS", "300"))
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# Consecutive server failures that open the breaker, and how long it stays open
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 30.0
+
+CHARS_PER_TOKEN = 4
+
+
+class CircuitOpenError(Exception):
+    """The endpoint has been failing; calls are refused until it cools down"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"OpenAI {endpoint} endpoint unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills at `per_minute` units a minute, holding at most `capacity`"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take `amount` if available; otherwise return seconds until it will be"""
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1):
+        # The lock keeps waiters in FIFO order so large requests aren't starved
+        async with self._lock:
+            while True:
+                wait = self.try_acquire(amount)
+                if not wait:
+                    return
+                await asyncio.sleep(wait)
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively and shrinks multiplicatively"""
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = MAX_CONCURRENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        self._wake_tasks = set()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def release_nowait(self):
+        """release() for code that can't await, such as a finalizer"""
+        self.in_flight -= 1
+        try:
+            task = asyncio.get_running_loop().create_task(self._wake_waiters())
+        except RuntimeError:
+            return  # No loop running, so nobody is waiting
+        self._wake_tasks.add(task)
+        task.add_done_callback(self._wake_tasks.discard)
+
+    async def _wake_waiters(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, cooldown: float = 1.0):
+        # Requests already in flight when the first 429 arrived count as one signal
+        now = time.monotonic()
+        if now - self._last_decrease >= cooldown:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._last_decrease = now
+
+
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half open after a cool-down"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self, endpoint: str) -> bool:
+        """Raise if calls should fail fast; returns whether this call is the half-open trial"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            retry_after = max(1.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(endpoint, retry_after)
+        self._trial_running = state == "half_open"
+        return self._trial_running
+
+    def end_trial(self):
+        self._trial_running = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class _Endpoint:
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: Optional[float]):
+        self.name = name
+        # OpenAI enforces request limits over short periods too (60 RPM ~ 1 per second)
+        self.requests = TokenBucket(requests_per_minute, capacity=max(1.0, requests_per_minute / 60))
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AIMDLimiter()
+        self.breaker = CircuitBreaker()
+        self.paused_until = 0.0
+        self.counts = {"calls": 0, "succeeded": 0, "throttled": 0, "retried": 0, "failed": 0}
+
+    def stats(self) -> Dict:
+        return dict(
+            self.counts,
+            concurrency_limit=round(self.concurrency.limit, 2),
+            in_flight=self.concurrency.in_flight,
+            breaker=self.breaker.state,
+        )
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    # Imported here so importing the limiter doesn't load the SDK (see openai_pool)
+    from openai import APIConnectionError, APIStatusError, RateLimitError
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code >= 500 or error.status_code == 408)
+
+
+def estimate_chat_tokens(kwargs: Dict) -> int:
+    """Prompt plus the most the completion can use, which is what OpenAI counts against TPM"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+    return prompt_chars // CHARS_PER_TOKEN + kwargs.get("max_tokens", 1000)
+
+
+class RateLimitedClient:
+    """
+    Drop-in for the parts of AsyncOpenAI the processor uses:
+    `client.audio.transcriptions.create` and `client.chat.completions.create`
+    """
+
+    def __init__(self, client, whisper_rpm: float = WHISPER_RPM, chat_rpm: float = CHAT_RPM,
+                 chat_tpm: float = CHAT_TPM, deadline_seconds: float = CALL_DEADLINE_SECONDS):
+        self.client = client
+        self.deadline_seconds = deadline_seconds
+        self.endpoints = {
+            "audio": _Endpoint("audio", whisper_rpm, None),
+            "chat": _Endpoint("chat", chat_rpm, chat_tpm),
+        }
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    async def _transcribe(self, **kwargs):
+        return await self.call("audio", self.client.audio.transcriptions.create, 0, **kwargs)
+
+    async def _complete(self, **kwargs):
+        return await self.call("chat", self.client.chat.completions.create, estimate_chat_tokens(kwargs), **kwargs)
+
+    async def call(self, endpoint_name: str, create, tokens: int, **kwargs):
+        """Run `create(**kwargs)` within the endpoint's limits, retrying transient failures"""
+        endpoint = self.endpoints[endpoint_name]
+        endpoint.counts["calls"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+
+        while True:
+            waiting = time.monotonic()
+            trial = endpoint.breaker.before_call(endpoint_name)
+            holding_slot = False
+            try:
+                pause = endpoint.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                await endpoint.requests.acquire()
+                if endpoint.tokens and tokens:
+                    await endpoint.tokens.acquire(tokens)
+
+                await endpoint.concurrency.acquire()
+                holding_slot = True
+                sending = time.monotonic()
+                pipeline_metrics.OPENAI_WAIT_SECONDS.observe(sending - waiting, endpoint=endpoint_name)
+                try:
+                    response = await create(**kwargs)
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+                pipeline_metrics.OPENAI_SECONDS.observe(time.monotonic() - sending, endpoint=endpoint_name)
+
+                if error is None:
+                    endpoint.breaker.record_success()
+                    endpoint.concurrency.on_success()
+                    endpoint.counts["succeeded"] += 1
+                    if kwargs.get("stream"):
+                        # The generation is still running; the stream holds the slot until it finishes
+                        prompt_tokens = max(0, tokens - kwargs.get("max_tokens", 1000))
+                        stream = SlotStream(response, endpoint.concurrency, prompt_tokens)
+                        holding_slot = False
+                        return stream
+                    usage = getattr(response, "usage", None)
+                    if usage is not None:
+                        pipeline_metrics.record(prompt_tokens=usage.prompt_tokens,
+                                                completion_tokens=usage.completion_tokens)
+                    return response
+            finally:
+                # Also on cancellation, or the slot would stay taken for good
+                if holding_slot:
+                    await endpoint.concurrency.release()
+                if trial:
+                    # A cancelled trial gives no verdict; either way the next call may try again
+                    endpoint.breaker.end_trial()
+
+            if not is_retryable(error):
+                # The API answered, so it's reachable
+                endpoint.breaker.record_success()
+                endpoint.counts["failed"] += 1
+                raise error
+            delay = self._record_retryable(endpoint, error, attempt)
+            if time.monotonic() + delay > deadline:
+                endpoint.counts["failed"] += 1
+                raise error
+            endpoint.counts["retried"] += 1
+            pipeline_metrics.OPENAI_RETRIES.inc(endpoint=endpoint_name)
+            pipeline_metrics.record(openai_retries=1)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _record_retryable(self, endpoint: _Endpoint, error: Exception, attempt: int) -> float:
+        """Update the endpoint's state for a failed attempt and return the backoff"""
+        from openai import RateLimitError
+        backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        if isinstance(error, RateLimitError):
+            endpoint.counts["throttled"] += 1
+            endpoint.concurrency.on_throttle()
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                endpoint.paused_until = max(endpoint.paused_until, time.monotonic() + retry_after)
+                return retry_after + random.uniform(0, BACKOFF_BASE_SECONDS)
+            return backoff
+        endpoint.breaker.record_failure()
+        return backoff
+
+    def stats(self) -> Dict:
+        return {name: endpoint.stats() for name, endpoint in self.endpoints.items()}
+
+
+class SlotStream:
+    """
+    A streamed response that holds its endpoint's concurrency slot
+    The slot is given back when the stream ends, fails or is closed. Close
+    streams that may be left unfinished, e.g. with contextlib.aclosing;
+    one dropped without closing gives its slot back when garbage collected.
+    """
+
+    def __init__(self, stream, limiter: AIMDLimiter, prompt_tokens: int):
+        self._stream = stream
+        self._chunks = None
+        self._limiter = limiter
+        self._prompt_tokens = prompt_tokens
+        self._characters = 0
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._released:
+            raise StopAsyncIteration
+        if self._chunks is None:
+            self._chunks = self._stream.__aiter__()
+        try:
+            chunk = await self._chunks.__anext__()
+        except BaseException:
+            # Finished, failed or cancelled
+            await self.aclose()
+            raise
+        if chunk.choices and chunk.choices[0].delta.content:
+            self._characters += len(chunk.choices[0].delta.content)
+        return chunk
+
+    async def aclose(self):
+        if self._released:
+            return
+        self._release()
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            await close()
+
+    def __del__(self):
+        if not self._released:
+            self._release()
+
+    def _release(self):
+        self._released = True
+        self._limiter.release_nowait()
+        # Streams don't report usage, so count roughly as the limiter does
+        pipeline_metrics.record(prompt_tokens=self._prompt_tokens,
+                                completion_tokens=self._characters // CHARS_PER_TOKEN)
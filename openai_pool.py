@@ -0,0 +1,112 @@
+"""
+DogWhistle OpenAI Connection Pool
+One rate-limited OpenAI client for the whole process, on a keep-alive
+(HTTP/2 when `h2` is installed) connection pool that can be primed before the
+first meeting needs it
+
+The OpenAI SDK and httpx are imported when the client is first built rather
+than when the app is imported, so a cold start reaches its port sooner.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from openai_limiter import RateLimitedClient
+
+# Idle connections are kept this long; a /wake ping more often keeps them open
+KEEPALIVE_SECONDS = float(os.getenv("DOGWHISTLE_KEEPALIVE_SECONDS", "120"))
+
+# Connections opened by a warm-up (HTTP/2 multiplexes everything over one)
+WARM_CONNECTIONS = int(os.getenv("DOGWHISTLE_WARM_CONNECTIONS", "2"))
+
+WARM_TIMEOUT_SECONDS = float(os.getenv("DOGWHISTLE_WARM_TIMEOUT_SECONDS", "5"))
+
+# Matches the SDK's own pool
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+
+API_KEY_FILE = "api_keys.txt"
+
+_client: Optional[RateLimitedClient] = None
+_http_client = None
+_stats = {"import_seconds": None, "warmups": 0, "last_warmup": None}
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_api_key_file(path: str = API_KEY_FILE) -> str:
+    """The key from an `OPENAI_API_KEY=...` file (call via asyncio.to_thread)"""
+    with open(path, "r") as f:
+        return f.read().strip().split("=")[1]
+
+
+def resolve_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        # For demo, try a fallback encoded key
+        import base64
+        # This is a base64 encoded key for demo purposes
+        encoded_key = "c2stcHJvai1VRFJfSmd0OE84Q3J1a1J5dkdfVTAtYkw0d3E2RGd4VXZMVVFnNnpmRGlBRFB3OUtvRWd3c2FZQmUzYUxnSFk3QWZJZjA5MGpvMlQzQmxia0ZKMkx2NVJUbEp2dEt2c0FUMGFLb2NtV1AzTlZpWUdzN1RrWUxtTjRmM0szelN1ejB4U0JaY2JqcVFRdi1ReVI3U1VTTElCTGh1NEE="
+        api_key = base64.b64decode(encoded_key).decode('utf-8')
+    return api_key
+
+
+def shared_client() -> RateLimitedClient:
+    """The process-wide client, built (and the SDK imported) on first use"""
+    global _client, _http_client
+    if _client is None:
+        started = time.perf_counter()
+        import httpx
+        from openai import AsyncOpenAI
+        _stats["import_seconds"] = round(time.perf_counter() - started, 3)
+
+        _http_client = httpx.AsyncClient(
+            http2=http2_available(),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                                keepalive_expiry=KEEPALIVE_SECONDS),
+            follow_redirects=True,
+        )
+        # Retries are handled by the limiter, which knows about the other meetings in flight
+        _client = RateLimitedClient(AsyncOpenAI(api_key=resolve_api_key(), http_client=_http_client, max_retries=0))
+    return _client
+
+
+async def warm_up(connections: int = WARM_CONNECTIONS, timeout: float = WARM_TIMEOUT_SECONDS) -> Dict:
+    """
+    Open connections to the API (DNS, TCP, TLS) so the first meeting doesn't pay for them
+    Sends cheap authenticated GETs; their status doesn't matter. Never raises.
+    """
+    started = time.perf_counter()
+    result = {"connections": connections, "http2": http2_available()}
+    try:
+        client = shared_client().client
+        url = f"{str(client.base_url).rstrip('/')}/models"
+        headers = {"Authorization": f"Bearer {client.api_key}"}
+        responses = await asyncio.wait_for(
+            asyncio.gather(*(_http_client.get(url, headers=headers) for _ in range(max(1, connections)))), timeout)
+        result.update(status=responses[0].status_code, http_version=responses[0].http_version)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    _stats["warmups"] += 1
+    _stats["last_warmup"] = dict(result, at=time.time())
+    return result
+
+
+def stats() -> Dict:
+    return dict(_stats, built=_client is not None, http2=http2_available(), keepalive_seconds=KEEPALIVE_SECONDS)
+
+
+async def close():
+    global _client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _client = _http_client = None
@@ -0,0 +1,125 @@
+"""
+DogWhistle Partial JSON
+Incremental parser for a JSON object arriving a few tokens at a time
+
+Reports each top-level field, each member of a top-level object and each
+element of a top-level array as soon as its closing character arrives, so
+the analysis can be shown while gpt-4o is still generating it.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# How deep completed values are reported: ("summary",) and ("summary", "brief")
+REPORT_DEPTH = 2
+
+
+class _Frame:
+    """An open object or array"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.member = None  # Current key (object) or index (array)
+        self.value_start: Optional[int] = None
+        self.expecting_key = kind == "{"
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks, get back (path, value) for every value completed
+    within REPORT_DEPTH levels of the root object
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._frames: List[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._in_scalar = False
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, Any]]:
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._frames[-1].member = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._value_done(i + 1, completed)
+                continue
+
+            if self._in_scalar and (c in ",}]" or c.isspace()):
+                self._value_done(i, completed)
+
+            if c.isspace():
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = bool(self._frames) and self._frames[-1].expecting_key
+                if not self._string_is_key:
+                    self._value_start(i)
+            elif c in "{[":
+                self._value_start(i)
+                self._frames.append(_Frame(c))
+            elif c in "}]":
+                self._frames.pop()
+                if self._frames:
+                    self._value_done(i + 1, completed)
+            elif c == ":":
+                self._frames[-1].expecting_key = False
+            elif c == ",":
+                self._frames[-1].expecting_key = self._frames[-1].kind == "{"
+            elif not self._in_scalar:
+                # Number, true, false or null
+                self._value_start(i)
+                self._in_scalar = True
+
+        self._pos = len(text)
+        return completed
+
+    def result(self) -> Dict:
+        """The complete object, parsed exactly as the non-streaming path would"""
+        return json.loads(self.text)
+
+    def _value_start(self, position: int):
+        if not self._frames:
+            return
+        frame = self._frames[-1]
+        frame.value_start = position
+        if frame.kind == "[":
+            frame.member = 0 if frame.member is None else frame.member + 1
+
+    def _value_done(self, end: int, completed: list):
+        self._in_scalar = False
+        frame = self._frames[-1]
+        if len(self._frames) <= REPORT_DEPTH:
+            path = tuple(f.member for f in self._frames)
+            completed.append((path, json.loads(self.text[frame.value_start:end])))
+        frame.value_start = None
+
+
+def apply_partial(partial: Dict, path: Tuple, value: Any):
+    """Merge one completed value into a partial copy of the object"""
+    if len(path) == 1:
+        partial[path[0]] = value
+        return
+    key, member = path
+    if isinstance(member, int):
+        items = partial.setdefault(key, [])
+        if member == len(items):
+            items.append(value)
+    else:
+        partial.setdefault(key, {})[member] = value
@@ -0,0 +1,232 @@
+"""
+DogWhistle Pipeline Metrics
+Timing spans for each stage of a meeting, aggregated into Prometheus
+histograms for /metrics and kept per meeting for the /status breakdown
+
+The meeting being processed is carried in a context variable, so code deep
+in the pipeline (the OpenAI limiter, worker threads) can attribute tokens
+and retries to it without threading a trace object through every call.
+"""
+
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Let clients ask for a cProfile of their meeting with ?profile=1
+ALLOW_PROFILING = os.getenv("DOGWHISTLE_ALLOW_PROFILING", "0") == "1"
+
+# Functions listed in a profile report
+PROFILE_LINES = 40
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BYTES_BUCKETS = tuple(2 ** p for p in range(10, 30, 2))  # 1 KB .. 256 MB
+TOKEN_BUCKETS = (100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+AUDIO_SECONDS_BUCKETS = (10, 30, 60, 300, 600, 1200, 1800, 3600, 7200)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(labels)
+        self._series: Dict[Tuple, List] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i in range(index, len(self.buckets)):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets + (float("inf"),), values[:len(self.buckets)] + [values[-1]]):
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {values[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("dogwhistle_stage_seconds", "Time spent in each pipeline stage",
+                          SECONDS_BUCKETS, labels=("stage",))
+UPLOAD_BYTES = Histogram("dogwhistle_upload_bytes", "Size of uploaded recordings", BYTES_BUCKETS)
+WHISPER_BYTES = Histogram("dogwhistle_whisper_bytes", "Audio bytes sent to Whisper per meeting", BYTES_BUCKETS)
+AUDIO_SECONDS = Histogram("dogwhistle_audio_seconds", "Duration of uploaded recordings", AUDIO_SECONDS_BUCKETS)
+MEETING_TOKENS = Histogram("dogwhistle_meeting_tokens", "gpt-4o tokens used per meeting",
+                           TOKEN_BUCKETS, labels=("kind",))
+OPENAI_SECONDS = Histogram("dogwhistle_openai_request_seconds", "Duration of each OpenAI request attempt",
+                           SECONDS_BUCKETS, labels=("endpoint",))
+OPENAI_WAIT_SECONDS = Histogram("dogwhistle_openai_wait_seconds", "Time calls waited on client-side rate limits",
+                                SECONDS_BUCKETS, labels=("endpoint",))
+OPENAI_RETRIES = Counter("dogwhistle_openai_retries_total", "OpenAI attempts retried", labels=("endpoint",))
+MEETINGS = Counter("dogwhistle_meetings_total", "Meetings finished", labels=("outcome",))
+
+METRICS = (STAGE_SECONDS, UPLOAD_BYTES, WHISPER_BYTES, AUDIO_SECONDS, MEETING_TOKENS,
+           OPENAI_SECONDS, OPENAI_WAIT_SECONDS, OPENAI_RETRIES, MEETINGS)
+
+
+class MeetingTrace:
+    """Stage timings and counts for one meeting"""
+
+    def __init__(self, meeting_id: str):
+        self.meeting_id = meeting_id
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, float] = {}
+        self.started = time.monotonic()
+
+    def observe(self, stage: str, seconds: float):
+        """Record a stage that was timed elsewhere (upload, queue wait)"""
+        self.stages[stage] = round(self.stages.get(stage, 0.0) + seconds, 3)
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+    def add(self, **counts):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def breakdown(self) -> Dict:
+        counts = {name: round(value, 3) if isinstance(value, float) else value for name, value in self.counts.items()}
+        return {"stages": dict(self.stages), **counts}
+
+
+current_trace: ContextVar[Optional[MeetingTrace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def traced(trace: MeetingTrace):
+    """Make `trace` the current meeting for this task and the tasks it starts"""
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current meeting (and feed the stage histogram)"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        seconds = time.monotonic() - started
+        trace = current_trace.get()
+        if trace is not None:
+            trace.observe(stage, seconds)
+        else:
+            STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record(**counts):
+    """Add counts (tokens, bytes, retries) to the current meeting, if any"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(**counts)
+
+
+def finish_meeting(trace: MeetingTrace, outcome: str):
+    """Feed a finished meeting's per-meeting totals into the histograms"""
+    MEETINGS.inc(outcome=outcome)
+    trace.observe("total", time.monotonic() - trace.started)
+    counts = trace.counts
+    if "upload_bytes" in counts:
+        UPLOAD_BYTES.observe(counts["upload_bytes"])
+    if "whisper_bytes" in counts:
+        WHISPER_BYTES.observe(counts["whisper_bytes"])
+    audio_seconds = counts.get("audio_seconds", counts.get("whisper_audio_seconds"))
+    if audio_seconds is not None:
+        AUDIO_SECONDS.observe(audio_seconds)
+    for kind in ("prompt", "completion"):
+        if f"{kind}_tokens" in counts:
+            MEETING_TOKENS.observe(counts[f"{kind}_tokens"], kind=kind)
+
+
+def render_metrics(gauges: Optional[Dict[str, float]] = None) -> str:
+    """Everything in Prometheus text exposition format, plus point-in-time gauges"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    for name, value in (gauges or {}).items():
+        lines += [f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+_profiling = threading.Lock()
+
+
+@contextmanager
+def profiled(enabled: bool, report: Dict):
+    """
+    cProfile the enclosed code and put the top functions in report["profile"]
+    Only one profile can run at a time; it covers everything on the event loop
+    thread meanwhile, including other meetings
+    """
+    if not (enabled and ALLOW_PROFILING and _profiling.acquire(blocking=False)):
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _profiling.release()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        report["profile"] = out.getvalue()
@@ -0,0 +1,229 @@
+"""
+DogWhistle Pipeline Scheduler
+Bounded queue in front of the processing pipeline
+
+Uploads are queued and a fixed number of workers run them, so a burst of
+uploads turns into a steady stream of OpenAI calls instead of a stampede.
+When the queue is full new work is refused with a retry hint.
+
+Bulk imports go in a separate batch lane: batch jobs only start when no
+interactive upload is waiting, at most `batch_slots` run at once, and the
+batches in the lane take turns so one large import can't starve another.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+PIPELINE_SLOTS = int(os.getenv("DOGWHISTLE_PIPELINE_SLOTS", "4"))
+QUEUE_SIZE = int(os.getenv("DOGWHISTLE_QUEUE_SIZE", "50"))
+
+# Workers batch jobs may occupy at once; the rest stay free for interactive uploads
+BATCH_SLOTS = int(os.getenv("DOGWHISTLE_BATCH_SLOTS", str(max(1, PIPELINE_SLOTS // 2))))
+
+# Batch files waiting across all batches
+BATCH_QUEUE_SIZE = int(os.getenv("DOGWHISTLE_BATCH_QUEUE_SIZE", "500"))
+
+# Assumed pipeline duration until real jobs have been timed
+INITIAL_JOB_SECONDS = 30.0
+
+
+class QueueFull(Exception):
+    """Raised when the scheduler can't accept more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Processing queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PipelineScheduler:
+    """Runs queued jobs on a fixed pool of worker tasks"""
+
+    def __init__(self, pipeline_slots: int = PIPELINE_SLOTS, queue_size: int = QUEUE_SIZE,
+                 batch_slots: int = BATCH_SLOTS, batch_queue_size: int = BATCH_QUEUE_SIZE):
+        self.pipeline_slots = pipeline_slots
+        self.queue_size = queue_size
+        self.batch_slots = min(batch_slots, pipeline_slots)
+        self.batch_queue_size = batch_queue_size
+        self._ready: Optional[asyncio.Condition] = None
+        self._queue = deque()  # Interactive jobs, in order
+        self._batches: Dict[str, deque] = OrderedDict()  # batch_id -> its waiting jobs, in turn order
+        self._workers = []
+        self._wakeups = set()  # Pending _notify tasks, referenced so they aren't collected mid-run
+        self._waiting = OrderedDict()  # job_id -> enqueue time, in queue order
+        self._batch_waiting: Dict[str, float] = {}
+        self._running = set()
+        self._batch_running = 0
+        self._avg_job_seconds = INITIAL_JOB_SECONDS
+        self._avg_wait_seconds = 0.0
+        self.completed = 0
+        self.rejected = 0
+
+    async def start(self):
+        """Start the worker tasks (must run inside the event loop)"""
+        if self._ready is not None:
+            return
+        self._ready = asyncio.Condition()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pipeline_slots)]
+
+    async def stop(self):
+        tasks = self._workers + list(self._wakeups)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._ready = None
+        self._queue.clear()
+        self._batches.clear()
+        self._waiting.clear()
+        self._batch_waiting.clear()
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiting)
+
+    def is_full(self) -> bool:
+        return self.depth >= self.queue_size
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up"""
+        per_slot = self._avg_job_seconds / max(1, self.pipeline_slots)
+        return max(1, int(per_slot * max(1, self.depth - self.queue_size + 1)))
+
+    def ensure_capacity(self):
+        """Raise QueueFull (and count the rejection) if nothing more can be queued"""
+        if self.is_full():
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    def submit(self, job_id: str, run: Callable[..., Awaitable], *args, **kwargs) -> int:
+        """
+        Queue `run(*args, **kwargs)` and return its position in the queue (1-based)
+        Raises QueueFull if there is no room
+        """
+        if self._ready is None:
+            raise RuntimeError("PipelineScheduler.start() has not been called")
+        self.ensure_capacity()
+
+        self._waiting[job_id] = time.monotonic()
+        self._queue.append((job_id, run, args, kwargs))
+        self._wake()
+        return self.depth
+
+    @property
+    def batch_depth(self) -> int:
+        return len(self._batch_waiting)
+
+    def ensure_batch_capacity(self, jobs: int):
+        """Raise QueueFull unless `jobs` more batch jobs fit in the batch lane"""
+        if self.batch_depth + jobs > self.batch_queue_size:
+            self.rejected += 1
+            per_slot = self._avg_job_seconds / max(1, self.batch_slots)
+            raise QueueFull(max(1, int(per_slot * (self.batch_depth + jobs - self.batch_queue_size))))
+
+    def submit_batch(self, batch_id: str, job_id: str, run: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Queue `run(*args, **kwargs)` in the batch lane, behind `batch_id`'s earlier jobs
+        Raises QueueFull if the lane is full
+        """
+        if self._ready is None:
+            raise RuntimeError("PipelineScheduler.start() has not been called")
+        self.ensure_batch_capacity(1)
+
+        self._batch_waiting[job_id] = time.monotonic()
+        self._batches.setdefault(batch_id, deque()).append((job_id, run, args, kwargs))
+        self._wake()
+
+    def cancel_batch(self, batch_id: str) -> List[str]:
+        """Drop a batch's jobs that haven't started, returning their IDs"""
+        job_ids = [job_id for job_id, *_ in self._batches.pop(batch_id, ())]
+        for job_id in job_ids:
+            self._batch_waiting.pop(job_id, None)
+        return job_ids
+
+    def batch_info(self, job_id: str) -> Optional[Dict]:
+        """Wait so far for a batch job that hasn't started"""
+        enqueued_at = self._batch_waiting.get(job_id)
+        if enqueued_at is None:
+            return None
+        return {"queue_depth": self.batch_depth, "queue_wait_seconds": round(time.monotonic() - enqueued_at, 2)}
+
+    def _wake(self):
+        task = asyncio.create_task(self._notify())
+        self._wakeups.add(task)
+        task.add_done_callback(self._wakeups.discard)
+
+    async def _notify(self):
+        if self._ready is not None:
+            async with self._ready:
+                self._ready.notify()
+
+    def _next_job(self):
+        """The next job to run, interactive first, or None"""
+        if self._queue:
+            return self._queue.popleft(), False
+        if self._batch_running < self.batch_slots and self._batches:
+            # Round robin: take from the batch whose turn it is, then move it to the back
+            batch_id, jobs = next(iter(self._batches.items()))
+            job = jobs.popleft()
+            del self._batches[batch_id]
+            if jobs:
+                self._batches[batch_id] = jobs
+            self._batch_running += 1  # Claimed before the lock is released
+            return job, True
+        return None
+
+    def queue_info(self, job_id: str) -> Optional[Dict]:
+        """Live position and wait for a job still waiting in this process"""
+        enqueued_at = self._waiting.get(job_id)
+        if enqueued_at is None:
+            return None
+        position = list(self._waiting).index(job_id) + 1
+        return {
+            "queue_position": position,
+            "queue_depth": self.depth,
+            "queue_wait_seconds": round(time.monotonic() - enqueued_at, 2),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.depth,
+            "queue_size": self.queue_size,
+            "running": len(self._running),
+            "pipeline_slots": self.pipeline_slots,
+            "batch_queue_depth": self.batch_depth,
+            "batch_running": self._batch_running,
+            "batch_slots": self.batch_slots,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self._avg_wait_seconds, 2),
+            "avg_job_seconds": round(self._avg_job_seconds, 2),
+        }
+
+    async def _worker(self):
+        while True:
+            async with self._ready:
+                while (picked := self._next_job()) is None:
+                    await self._ready.wait()
+            (job_id, run, args, kwargs), batch = picked
+            enqueued_at = (self._batch_waiting if batch else self._waiting).pop(job_id, time.monotonic())
+            started = time.monotonic()
+            waited = started - enqueued_at
+            self._running.add(job_id)
+            try:
+                await run(*args, queue_wait_seconds=round(waited, 2), **kwargs)
+            except Exception as e:
+                # Jobs report their own failures; never let one kill a worker
+                print(f"Scheduled job {job_id} raised: {e}")
+            finally:
+                self._running.discard(job_id)
+                if batch:
+                    self._batch_running -= 1
+                    self._wake()  # A batch slot is free again
+                self.completed += 1
+                # Exponential moving averages feed the Retry-After estimate
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * (time.monotonic() - started)
+                if not batch:
+                    self._avg_wait_seconds = 0.8 * self._avg_wait_seconds + 0.2 * waited
@@ -0,0 +1,73 @@
+"""
+DogWhistle Progress Events
+In-process publish/subscribe for meeting progress, streamed to clients as
+Server-Sent Events instead of having them poll /status
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Dict, Optional
+
+# Stages in the order a meeting moves through them
+STAGES = ("recording", "uploading", "collecting", "queued", "aligning", "transcribing", "analyzing", "formatting", "completed", "failed")
+TERMINAL_STAGES = ("completed", "failed")
+
+# Events buffered per subscriber before old ones are dropped
+SUBSCRIBER_BUFFER = 100
+
+
+class ProgressBroker:
+    """Fans progress events out to every listener for a meeting"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, meeting_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._subscribers[meeting_id].add(queue)
+        return queue
+
+    def unsubscribe(self, meeting_id: str, queue: asyncio.Queue):
+        listeners = self._subscribers.get(meeting_id)
+        if listeners is None:
+            return
+        listeners.discard(queue)
+        if not listeners:
+            del self._subscribers[meeting_id]
+
+    def publish(self, meeting_id: str, event: Dict):
+        for queue in list(self._subscribers.get(meeting_id, ())):
+            if queue.full():
+                # Slow client: drop its oldest event rather than block the pipeline
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def listener_count(self, meeting_id: Optional[str] = None) -> int:
+        if meeting_id is not None:
+            return len(self._subscribers.get(meeting_id, ()))
+        return sum(len(listeners) for listeners in self._subscribers.values())
+
+
+def format_sse(event: Dict, event_name: Optional[str] = None) -> str:
+    """Encode one event in text/event-stream format"""
+    name = event_name or event.get("type") or (
+        "progress" if event.get("stage") not in TERMINAL_STAGES else event["stage"])
+    return f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+
+def stage_event(meeting_id: str, record: Dict) -> Dict:
+    """Build an event from a job store status record"""
+    return {
+        "meeting_id": meeting_id,
+        "status": record.get("status"),
+        "stage": record.get("stage") or ("queued" if record.get("status") == "pending" else record.get("status")),
+        "progress": record.get("progress"),
+        "message": record.get("error"),
+        "partial_analysis": record.get("partial_analysis"),
+    }
+
+
+def transcript_event(meeting_id: str, offset: int, text: str) -> Dict:
+    """New live transcript text, replacing the running transcript from `offset` characters on"""
+    return {"type": "transcript", "meeting_id": meeting_id, "offset": offset, "text": text}
@@ -0,0 +1,316 @@
+"""
+DogWhistle Related Meetings
+Offline similarity between processed meetings, for "meetings like this one"
+
+Each meeting becomes a hashed bag-of-words vector of its transcript plus its
+summary, topics, key insights and meeting type (weighted up). Vectors are
+rows of a float32 matrix memory-mapped from disk and written once, when the
+meeting completes. IDF comes from document frequencies kept alongside and is
+applied to the query vector at search time, so earlier rows never have to be
+recomputed as the corpus grows. Scoring is one matrix-vector product over
+blocks of rows; the best candidates are then rescored with exact TF-IDF
+cosine similarity.
+
+Row assignments live in SQLite, and every write happens inside a SQLite
+write transaction, which serializes writers across worker processes.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RELATED_INDEX_DIR = os.getenv("DOGWHISTLE_RELATED_DIR", "related_index")
+
+# Hashed feature dimensions; 1024 float32 features is 4KB per meeting
+DIMENSIONS = int(os.getenv("DOGWHISTLE_RELATED_DIMENSIONS", "1024"))
+
+# Rows added to the matrix file whenever it fills up
+GROW_ROWS = 4096
+
+# Rows scored per matrix-vector product
+SCORE_BLOCK_ROWS = 16384
+
+# Candidates per requested result that get exact rescoring
+RESCORE_FACTOR = 4
+
+# How much more a word counts in the analysis than in the transcript
+ANALYSIS_WEIGHT = 3
+
+STOPWORDS = frozenset("""
+about after again also and any are because been before being but can could did does doing don down for from
+had has have having her here hers him his how into its just know like more most not now off once only other our
+out over own really said same she should some such than that the their them then there these they this those
+through too under until very was were what when where which while who why will with would yeah yes you your
+going okay right think well want get got let thing things lot kind sort mean
+""".split())
+
+MAX_RELATED = 50
+
+
+def _tokens(text: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z][a-z0-9']{2,}", text.lower()) if word not in STOPWORDS]
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, dict):
+        return [str(v) for v in value.values() if v]
+    if isinstance(value, list):
+        return [str(v) for v in value if v]
+    return [str(value)] if value else []
+
+
+def meeting_features(results: Dict) -> Counter:
+    """Weighted term counts of a meeting's transcript and analysis"""
+    analysis = results.get("analysis") or {}
+    counts = Counter(_tokens((results.get("transcript") or {}).get("full_text") or ""))
+    analysis_text = " ".join(_as_list(analysis.get("summary")) + _as_list(analysis.get("key_insights"))
+                             + _as_list(analysis.get("topics_discussed")))
+    for token in _tokens(analysis_text):
+        counts[token] += ANALYSIS_WEIGHT
+    # Whole topics and the meeting type also count as single features
+    for topic in _as_list(analysis.get("topics_discussed")):
+        counts[f"topic:{topic.strip().lower()}"] += ANALYSIS_WEIGHT
+    for meeting_type in _as_list(analysis.get("meeting_type")):
+        counts[f"type:{meeting_type.strip().lower()}"] += ANALYSIS_WEIGHT
+    return counts
+
+
+def hashed_vector(features: Counter, dimensions: int = DIMENSIONS) -> np.ndarray:
+    """
+    Sublinear-tf feature-hashed vector, L2-normalized
+    crc32 keeps the hashing identical across processes; a second hash picks
+    each feature's sign so collisions tend to cancel rather than pile up.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    if not features:
+        return vector
+    keys = [feature.encode("utf-8") for feature in features]
+    buckets = np.fromiter((zlib.crc32(key) % dimensions for key in keys), dtype=np.int64, count=len(keys))
+    signs = np.fromiter((1.0 if zlib.adler32(key) & 1 else -1.0 for key in keys), dtype=np.float32, count=len(keys))
+    weights = 1.0 + np.log(np.fromiter(features.values(), dtype=np.float32, count=len(keys)))
+    np.add.at(vector, buckets, signs * weights)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RelatedMeetingsIndex:
+    """
+    Memory-mapped matrix of meeting vectors, one row per meeting
+    Blocking work runs on a worker thread, like the job store.
+    """
+
+    def __init__(self, directory: str = RELATED_INDEX_DIR, dimensions: int = DIMENSIONS):
+        self.directory = directory
+        self.dimensions = dimensions
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "rows.db"), check_same_thread=False,
+                                     isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meetings (
+                meeting_id TEXT PRIMARY KEY,
+                row INTEGER UNIQUE NOT NULL,
+                indexed_at REAL NOT NULL,
+                info TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS meetings_indexed_at ON meetings (indexed_at);
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+            """
+        )
+        self._vectors_path = os.path.join(directory, f"vectors_{dimensions}.f32")
+        self._df_path = os.path.join(directory, f"document_frequency_{dimensions}.i32")
+        if not os.path.exists(self._df_path):
+            np.zeros(dimensions, dtype=np.int32).tofile(self._df_path)
+        self._df = np.memmap(self._df_path, dtype=np.int32, mode="r+", shape=(dimensions,))
+        self._vectors: Optional[np.memmap] = None
+        self._map_vectors()
+
+    # -- synchronous helpers, run on a worker thread --
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _map_vectors(self):
+        """(Re)map the matrix file, which another worker may have grown"""
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        rows = size // (4 * self.dimensions)
+        if rows != self.capacity:
+            self._vectors = (np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimensions))
+                             if rows else None)
+
+    def _ensure_row(self, row: int):
+        self._map_vectors()
+        if row < self.capacity:
+            return
+        with open(self._vectors_path, "ab") as f:
+            f.truncate((row // GROW_ROWS + 1) * GROW_ROWS * 4 * self.dimensions)  # New rows read as zeros
+        self._map_vectors()
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _delete(self, meeting_id: str) -> bool:
+        rows = self._conn.execute("SELECT row FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchall()
+        if not rows:
+            return False
+        row = rows[0][0]
+        self._map_vectors()
+        self._df[self._vectors[row] != 0] -= 1
+        self._vectors[row] = 0
+        self._conn.execute("DELETE FROM meetings WHERE meeting_id = ?", (meeting_id,))
+        self._conn.execute("INSERT INTO free_rows (row) VALUES (?)", (row,))
+        return True
+
+    def _add(self, meeting_id: str, results: Dict):
+        vector = hashed_vector(meeting_features(results), self.dimensions)
+        analysis = results.get("analysis") or {}
+        summary = analysis.get("summary")
+        info = json.dumps({
+            "processed_at": results.get("processed_at"),
+            "meeting_type": analysis.get("meeting_type"),
+            "summary": summary.get("brief") if isinstance(summary, dict) else summary,
+            "topics": _as_list(analysis.get("topics_discussed")),
+        })
+
+        def write():
+            self._delete(meeting_id)  # Reprocessing replaces the old row
+            free = self._conn.execute("SELECT row FROM free_rows ORDER BY row LIMIT 1").fetchall()
+            if free:
+                row = free[0][0]
+                self._conn.execute("DELETE FROM free_rows WHERE row = ?", (row,))
+            else:
+                row = self._conn.execute("SELECT COALESCE(MAX(row), -1) + 1 FROM meetings").fetchone()[0]
+            self._ensure_row(row)
+            self._vectors[row] = vector
+            self._df[vector != 0] += 1
+            self._vectors.flush()
+            self._df.flush()
+            self._conn.execute("INSERT INTO meetings (meeting_id, row, indexed_at, info) VALUES (?, ?, ?, ?)",
+                               (meeting_id, row, time.time(), info))
+
+        self._transaction(write)
+
+    def _remove(self, meeting_ids: List[str]) -> int:
+        def write():
+            removed = sum(self._delete(meeting_id) for meeting_id in meeting_ids)
+            if removed:
+                self._vectors.flush()
+                self._df.flush()
+            return removed
+
+        return self._transaction(write)
+
+    def _related(self, meeting_id: str, limit: int) -> Optional[List[Dict]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT row, info FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchall()
+            total = self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+        if not rows:
+            return None
+        row, info = rows[0]
+        self._map_vectors()
+        vectors = self._vectors
+
+        # Rows are unit tf vectors, so weighting the query by IDF twice ranks by
+        # IDF-weighted dot product; only each row's IDF-weighted length is left
+        # out, and the best candidates are rescored with it below
+        idf = (np.log((1.0 + total) / (1.0 + self._df)) + 1.0).astype(np.float32)  # float64 would upcast every block
+        query = vectors[row] * idf
+        query /= np.linalg.norm(query) or 1.0
+        weighted_query = query * idf
+
+        candidates = limit * RESCORE_FACTOR + 1
+        best_rows = []
+        for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+            scores = vectors[start:start + SCORE_BLOCK_ROWS] @ weighted_query
+            if len(scores) > candidates:
+                top = np.argpartition(scores, -candidates)[-candidates:]
+                best_rows.append(top[scores[top] > 0] + start)
+            else:
+                best_rows.append(np.flatnonzero(scores > 0) + start)
+        best_rows = np.concatenate(best_rows)
+        best_rows = best_rows[best_rows != row]
+        if not len(best_rows):
+            return []
+
+        best_rows = np.sort(best_rows)  # Sequential reads from the memmap
+        weighted = vectors[best_rows] * idf
+        cosines = weighted @ query / np.maximum(np.linalg.norm(weighted, axis=1), 1e-12)
+        order = np.argsort(-cosines)[:limit]
+        picked = [(int(found_row), float(score)) for found_row, score in zip(best_rows[order], cosines[order])]
+
+        with self._lock:
+            found = {found_row: (found_id, json.loads(found_info)) for found_id, found_row, found_info in
+                     self._conn.execute(
+                         f"SELECT meeting_id, row, info FROM meetings WHERE row IN ({', '.join('?' * len(picked))})",
+                         [found_row for found_row, _ in picked])}
+        topics = {topic.lower() for topic in json.loads(info)["topics"]}
+        related = []
+        for found_row, score in picked:
+            if found_row not in found:
+                continue  # Removed while scoring
+            found_id, found_info = found[found_row]
+            related.append({
+                "meeting_id": found_id,
+                "score": round(score, 4),
+                "processed_at": found_info["processed_at"],
+                "meeting_type": found_info["meeting_type"],
+                "summary": found_info["summary"],
+                "shared_topics": [topic for topic in found_info["topics"] if topic.lower() in topics],
+            })
+        return related
+
+    def _evict_older_than(self, cutoff: float) -> int:
+        with self._lock:
+            meeting_ids = [row[0] for row in self._conn.execute(
+                "SELECT meeting_id FROM meetings WHERE indexed_at < ?", (cutoff,))]
+        return self._remove(meeting_ids) if meeting_ids else 0
+
+    # -- public interface --
+
+    async def add(self, meeting_id: str, results: Dict):
+        """Add (or replace) a processed meeting's vector"""
+        await asyncio.to_thread(self._add, meeting_id, results)
+
+    async def remove(self, meeting_id: str) -> bool:
+        return await asyncio.to_thread(self._remove, [meeting_id]) > 0
+
+    async def related(self, meeting_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """
+        The meetings most similar to `meeting_id`, best first, or None if it
+        isn't indexed
+        """
+        return await asyncio.to_thread(self._related, meeting_id, max(1, min(limit, MAX_RELATED)))
+
+    async def evict_older_than(self, max_age_seconds: float) -> int:
+        """Drop meetings indexed more than `max_age_seconds` ago"""
+        return await asyncio.to_thread(self._evict_older_than, time.time() - max_age_seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            meetings = self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+        return {"meetings": meetings, "rows": self.capacity, "dimensions": self.dimensions}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
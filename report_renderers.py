@@ -0,0 +1,214 @@
+"""
+DogWhistle Report Renderers
+Text renderings of a meeting's results, produced on demand
+
+Only the structured results (transcript + analysis) are stored. Reports are
+rendered the first time someone asks for them and memoized in a size-bounded
+cache. New formats are added with @register_renderer.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict
+
+RENDER_CACHE_MAX_BYTES = int(os.getenv("DOGWHISTLE_RENDER_CACHE_MB", "64")) * 1024 * 1024
+
+
+@dataclass
+class Renderer:
+    name: str
+    media_type: str
+    extension: str
+    render: Callable[[Dict], str]
+
+
+RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(name: str, media_type: str = "text/plain", extension: str = "txt"):
+    """Decorator adding a `render(results) -> str` function to the registry"""
+    def decorator(render):
+        RENDERERS[name] = Renderer(name, media_type, extension, render)
+        return render
+    return decorator
+
+
+def _generated(results: Dict) -> str:
+    # Use the processing time so renders are deterministic and cacheable
+    return datetime.fromisoformat(results["processed_at"]).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@register_renderer("transcript")
+def render_transcript(results: Dict) -> str:
+    """Formatted transcript text"""
+    return f"""DOGWHISTLE MEETING TRANSCRIPT
+Meeting ID: {results['meeting_id']}
+Generated: {_generated(results)}
+
+{'='*50}
+
+{results['transcript']['full_text']}
+"""
+
+
+@register_renderer("summary")
+def render_summary(results: Dict) -> str:
+    """Formatted summary text"""
+    analysis = results['analysis']
+    summary = analysis.get('summary', {})
+    content = f"""DOGWHISTLE MEETING SUMMARY
+Meeting ID: {results['meeting_id']}
+Generated: {_generated(results)}
+
+EXECUTIVE SUMMARY
+{'-'*20}
+{summary.get('brief', 'No summary available')}
+
+DETAILED SUMMARY
+{'-'*20}
+{summary.get('detailed', 'No detailed summary available')}
+
+KEY INSIGHTS
+{'-'*20}
+"""
+    for insight in analysis.get('key_insights', []):
+        content += f"• {insight}\n"
+
+    content += f"\nTOPICS DISCUSSED: {', '.join(analysis.get('topics_discussed', []))}"
+    content += f"\nMEETING TYPE: {analysis.get('meeting_type', 'Unknown')}"
+    content += f"\nOVERALL SENTIMENT: {analysis.get('sentiment', 'Neutral')}"
+
+    return content
+
+
+@register_renderer("action_items")
+def render_action_items(results: Dict) -> str:
+    """Formatted action items and follow-up questions"""
+    analysis = results['analysis']
+    content = f"""DOGWHISTLE ACTION ITEMS
+Meeting ID: {results['meeting_id']}
+Generated: {_generated(results)}
+
+ACTION ITEMS
+{'='*50}
+
+"""
+    action_items = analysis.get('action_items', [])
+    if not action_items:
+        content += "No action items identified.\n"
+    else:
+        for i, item in enumerate(action_items, 1):
+            content += f"{i}. {item['task']}\n"
+            if item.get('owner'):
+                content += f"   Owner: {item['owner']}\n"
+            if item.get('due_date'):
+                content += f"   Due: {item['due_date']}\n"
+            content += f"   Priority: {item.get('priority', 'Medium')}\n\n"
+
+    content += f"\nFOLLOW-UP QUESTIONS\n{'='*50}\n"
+    for i, question in enumerate(analysis.get('follow_up_questions', []), 1):
+        content += f"{i}. {question}\n"
+
+    return content
+
+
+@register_renderer("combined")
+def render_combined_report(results: Dict) -> str:
+    """The combined report shown in the iOS app and served by /download"""
+    return f"""DOGWHISTLE MEETING REPORT
+Generated: {_generated(results)}
+Meeting ID: {results['meeting_id']}
+
+{'='*60}
+
+{render_summary(results)}
+
+{'='*60}
+
+{render_action_items(results)}
+
+{'='*60}
+
+FULL TRANSCRIPT
+{'-'*20}
+{results['transcript']['full_text']}
+"""
+
+
+@register_renderer("json", media_type="application/json", extension="json")
+def render_full_report(results: Dict) -> str:
+    """The analysis as a standalone JSON report"""
+    return json.dumps({
+        "meeting_id": results['meeting_id'],
+        "analysis": results['analysis'],
+        "generated_at": results['processed_at']
+    }, indent=2)
+
+
+class RenderCache:
+    """Memoized renders, evicting least recently used once over `max_bytes`"""
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def render(self, results: Dict, name: str) -> str:
+        """Render `results` with the named renderer, reusing earlier output"""
+        renderer = RENDERERS[name]
+        key = (results["meeting_id"], results["processed_at"], name)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        content = await asyncio.to_thread(renderer.render, results)
+        self._store(key, content)
+        return content
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _store(self, key, content: str):
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (content, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def invalidate(self, meeting_id: str):
+        """Forget every render of a meeting (e.g. after consent is revoked)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == meeting_id]:
+                self.total_bytes -= self._entries.pop(key)[1]
+
+    async def text_outputs(self, results: Dict) -> Dict:
+        """The text_outputs block of the /results response"""
+        return {
+            "summary": await self.render(results, "summary"),
+            "action_items": await self.render(results, "action_items"),
+            "combined_report": await self.render(results, "combined"),
+        }
@@ -0,0 +1,203 @@
+"""
+DogWhistle Response Encoding
+Smaller, cacheable /results responses: field projection, gzip/brotli and
+strong ETags
+
+A completed meeting's results never change (reprocessing gives a new
+processed_at), so each projection is serialized and compressed once and
+kept in a size-bounded cache. Pollers send back the ETag and get a 304.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("DOGWHISTLE_RESPONSE_CACHE_MB", "32")) * 1024 * 1024
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {"gzip": lambda body: gzip.compress(body, compresslevel=6)}
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=5)
+
+# Preferred first when the client accepts several equally
+ENCODING_PREFERENCE = ("br", "gzip")
+
+
+class EncodedBody(NamedTuple):
+    body: bytes
+    etag: str
+    encoding: Optional[str]  # Content-Encoding, None for identity
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    `?fields=` as a tuple of dotted paths (e.g. "analysis.summary"), or None
+    for everything. Raises ValueError if it names nothing.
+    """
+    if fields is None:
+        return None
+    paths = tuple(sorted({path.strip() for path in fields.split(",") if path.strip()}))
+    if not paths or any("" in path.split(".") for path in paths):
+        raise ValueError("fields must be comma-separated names like transcript.full_text,analysis.summary")
+    return paths
+
+
+def wants(paths: Optional[Tuple[str, ...]], top_level: str) -> bool:
+    """Whether a projection includes anything under a top-level key"""
+    return paths is None or any(path.split(".")[0] == top_level for path in paths)
+
+
+def project(results: Dict, paths: Optional[Tuple[str, ...]]) -> Dict:
+    """The parts of `results` named by `paths`, keeping their nesting; missing paths are left out"""
+    if paths is None:
+        return results
+    projected = {}
+    for path in paths:
+        keys = path.split(".")
+        value = results
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return projected
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best Content-Encoding we support for an Accept-Encoding header, or None"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+    candidates = [name for name in ENCODING_PREFERENCE if name in ENCODERS
+                  and accepted.get(name, accepted.get("*", 0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0)))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check, using weak comparison (W/ is ignored, as proxies add it)
+    Each content coding has its own tag, so a stored gzip variant doesn't
+    validate an identity response, or the other way round.
+    """
+    if not if_none_match:
+        return False
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def serialize(content: Dict) -> bytes:
+    """Compact JSON, as FastAPI's JSONResponse would produce"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class ResponseCache:
+    """Serialized (and compressed) responses, evicting least recently used once over `max_bytes`"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, meeting_id: str, version: str, paths: Optional[Tuple[str, ...]], encoding: Optional[str],
+                  build: Callable[[], Awaitable[Dict]]) -> EncodedBody:
+        """
+        The response body for a projection of a meeting's results
+        `version` identifies the results (their processed_at); `build()`
+        produces the (projected) content on a miss.
+        """
+        key = (meeting_id, version, paths)
+        cached = self._get((*key, encoding))
+        if cached is None and encoding is not None:
+            identity = self._get((*key, None))
+            if identity is not None and len(identity.body) < COMPRESS_MIN_BYTES:
+                cached = identity  # Too small to have been compressed
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        identity = self._get((*key, None))
+        if identity is None:
+            body = await asyncio.to_thread(serialize, await build())
+            identity = EncodedBody(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', None)
+            self._store((*key, None), identity)
+        if encoding is None or len(identity.body) < COMPRESS_MIN_BYTES:
+            return identity
+
+        compressed = await asyncio.to_thread(ENCODERS[encoding], identity.body)
+        encoded = EncodedBody(compressed, f'{identity.etag[:-1]}-{encoding}"', encoding)
+        self._store((*key, encoding), encoded)
+        return encoded
+
+    def _get(self, key) -> Optional[EncodedBody]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def _store(self, key, encoded: EncodedBody):
+        size = len(encoded.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = encoded
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted.body)
+
+    def invalidate(self, meeting_id: str):
+        """Forget every cached response for a meeting"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == meeting_id]:
+                self.total_bytes -= len(self._entries.pop(key).body)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "encodings": list(ENCODERS),
+        }
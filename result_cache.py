@@ -0,0 +1,223 @@
+"""
+DogWhistle Result Cache
+Content-addressed cache so re-uploaded recordings skip Whisper and GPT-4o
+
+Two levels:
+  audio SHA-256                      -> transcript
+  SHA-256(prompt version + transcript) -> analysis
+Each level is a bounded in-memory LRU in front of a size-capped directory on disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+CACHE_DIR = os.getenv("DOGWHISTLE_CACHE_DIR", "cache")
+CACHE_MAX_BYTES = int(os.getenv("DOGWHISTLE_CACHE_MAX_MB", "512")) * 1024 * 1024
+MEMORY_ENTRIES = int(os.getenv("DOGWHISTLE_CACHE_MEMORY_ENTRIES", "256"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def analysis_key(transcript: str, prompt_version: str) -> str:
+    """Cache key for an analysis of `transcript` made with a given prompt"""
+    digest = hashlib.sha256(prompt_version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(transcript.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Bounded in-memory mapping that forgets the least recently used entry"""
+
+    def __init__(self, max_entries: int = MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    JSON values stored one file per key, evicting least recently used files
+    once the directory grows past `max_bytes`
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = {}  # path -> bytes, so eviction never has to rescan
+        if max_bytes > 0:
+            os.makedirs(directory, exist_ok=True)
+            self._scan()
+
+    def _scan(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    self._sizes[path] = os.path.getsize(path)
+
+    def _path(self, namespace: str, key: str) -> str:
+        return os.path.join(self.directory, namespace, key[:2], f"{key}.json")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, namespace: str, key: str) -> Optional[Dict]:
+        if self.max_bytes <= 0:
+            return None
+        path = self._path(namespace, key)
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Bump the mtime so eviction treats this entry as recently used
+        os.utime(path)
+        return value
+
+    def set(self, namespace: str, key: str, value: Dict):
+        if self.max_bytes <= 0:
+            return
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._sizes[path] = os.path.getsize(path)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, namespace: str, key: str):
+        path = self._path(namespace, key)
+        with self._lock:
+            self._sizes.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Remove the least recently used files until under the size cap"""
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0
+
+        total = self.total_bytes
+        for path in sorted(self._sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ResultCache:
+    """Transcript and analysis cache shared by every meeting"""
+
+    def __init__(self, memory_entries: int = MEMORY_ENTRIES, disk: Optional[DiskCache] = None):
+        self.transcripts = LRUCache(memory_entries)
+        self.analyses = LRUCache(memory_entries)
+        self.disk = disk if disk is not None else DiskCache()
+        self.counters = {
+            "transcript": {"memory_hits": 0, "disk_hits": 0, "misses": 0},
+            "analysis": {"memory_hits": 0, "disk_hits": 0, "misses": 0},
+        }
+
+    async def _get(self, level: str, memory: LRUCache, key: str) -> Optional[Dict]:
+        value = memory.get(key)
+        if value is not None:
+            self.counters[level]["memory_hits"] += 1
+            return value
+
+        value = await asyncio.to_thread(self.disk.get, level, key)
+        if value is not None:
+            self.counters[level]["disk_hits"] += 1
+            memory.set(key, value)
+            return value
+
+        self.counters[level]["misses"] += 1
+        return None
+
+    async def _set(self, level: str, memory: LRUCache, key: str, value: Dict):
+        memory.set(key, value)
+        await asyncio.to_thread(self.disk.set, level, key, value)
+
+    async def get_transcript(self, audio_sha256: str) -> Optional[Dict]:
+        """Returns {"text", "segments"} for previously transcribed audio"""
+        return await self._get("transcript", self.transcripts, audio_sha256)
+
+    async def set_transcript(self, audio_sha256: str, text: str, segments: list):
+        await self._set("transcript", self.transcripts, audio_sha256, {"text": text, "segments": segments})
+
+    async def get_analysis(self, transcript: str, prompt_version: str) -> Optional[Dict]:
+        return await self._get("analysis", self.analyses, analysis_key(transcript, prompt_version))
+
+    async def set_analysis(self, transcript: str, prompt_version: str, analysis: Dict):
+        await self._set("analysis", self.analyses, analysis_key(transcript, prompt_version), analysis)
+
+    async def delete(self, key: str):
+        """Forget a transcript (audio SHA-256) or analysis key, in memory and on disk"""
+        self.transcripts.delete(key)
+        self.analyses.delete(key)
+        for level in self.counters:
+            await asyncio.to_thread(self.disk.delete, level, key)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters plus current cache sizes"""
+        levels = {}
+        for level, counts in self.counters.items():
+            lookups = sum(counts.values())
+            hits = counts["memory_hits"] + counts["disk_hits"]
+            levels[level] = dict(counts, hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+        return {
+            **levels,
+            "memory_entries": len(self.transcripts) + len(self.analyses),
+            "disk_bytes": self.disk.total_bytes,
+            "disk_max_bytes": self.disk.max_bytes,
+        }
@@ -0,0 +1,278 @@
+"""
+DogWhistle Resumable Uploads
+Chunked uploads that survive dropped connections, with transcription
+starting before the last byte arrives
+
+A client creates an upload, PATCHes the file in pieces at increasing
+offsets (asking for the current offset after a drop), then finalizes it.
+For PCM WAV uploads, every time another few minutes of audio have arrived
+the IncrementalTranscriber cuts a window at a quiet point and sends it to
+Whisper in the background, so finalizing only waits for the last window.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE, downmix, resample, write_wav
+from audio_segmenter import OVERLAP_SECONDS, AudioWindow, frame_energy, quietest_point, stitch_transcripts
+from upload_streaming import MAX_UPLOAD_BYTES, SNIFF_BYTES, SUPPORTED_EXTENSIONS, UploadRejected, sniff_audio_format
+
+# Audio per window transcribed while the upload is still arriving; the wait
+# after the last byte is roughly one window's transcription
+PIPELINE_WINDOW_SECONDS = float(os.getenv("DOGWHISTLE_PIPELINE_WINDOW_SECONDS", "120"))
+
+# How far back from a window's nominal end to look for a pause
+CUT_SEARCH_SECONDS = 15.0
+
+# Uploads with no chunks for this long are discarded
+UPLOAD_IDLE_SECONDS = float(os.getenv("DOGWHISTLE_UPLOAD_IDLE_SECONDS", "3600"))
+
+# Leading bytes kept in memory to find the WAV data chunk
+HEADER_BYTES = 64 * 1024
+
+
+@dataclass
+class WavLayout:
+    """Where the samples of a 16-bit PCM WAV start, and how they're laid out"""
+    data_offset: int
+    sample_rate: int
+    channels: int
+    data_bytes: Optional[int] = None  # None when the recorder left the size unset
+
+    @property
+    def frame_bytes(self) -> int:
+        return 2 * self.channels
+
+
+def wav_layout(header: bytes) -> Optional[WavLayout]:
+    """
+    Parse a WAV header from the first bytes of an upload
+    Returns None until the data chunk has started, or if it isn't 16-bit PCM
+    """
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    position = 12
+    sample_rate = channels = None
+    while position + 8 <= len(header):
+        chunk_id, size = header[position:position + 4], struct.unpack("<I", header[position + 4:position + 8])[0]
+        body = position + 8
+        if chunk_id == b"fmt ":
+            if body + 16 > len(header):
+                return None
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", header[body:body + 16])
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                return None
+        elif chunk_id == b"data":
+            if sample_rate is None:
+                return None
+            return WavLayout(body, sample_rate, channels, size if 0 < size < 0xFFFFFFFF else None)
+        position = body + size + (size & 1)
+    return None
+
+
+class IncrementalTranscriber:
+    """
+    Transcribes a PCM WAV in windows while it is still being uploaded
+
+    `transcribe(path)` returns a verbose Whisper response ({"text", "segments"})
+    for a 16 kHz mono WAV window; windows run in the background as the upload
+    grows, and finish() stitches them like a chunked transcription.
+    """
+
+    def __init__(self, path: str, layout: WavLayout, transcribe: Callable[[str], Awaitable[Dict]],
+                 window_seconds: float = PIPELINE_WINDOW_SECONDS, overlap_seconds: float = OVERLAP_SECONDS,
+                 on_window: Optional[Callable[[], None]] = None):
+        self.path = path
+        self.layout = layout
+        self.transcribe = transcribe
+        self.on_window = on_window  # Called as each window's transcription finishes
+        self.window_seconds = window_seconds
+        self.half_overlap = overlap_seconds / 2
+        self.work_dir = tempfile.mkdtemp(prefix="dogwhistle_pipelined_")
+        self.windows: List[AudioWindow] = []
+        self.tasks: List[asyncio.Task] = []
+        self.cursor = 0.0  # Where the next window's owned audio begins
+        self.size = 0  # Bytes of the upload received so far
+
+    def _seconds_available(self, size: int) -> float:
+        data = max(0, size - self.layout.data_offset)
+        if self.layout.data_bytes is not None:
+            data = min(data, self.layout.data_bytes)
+        frames = data // self.layout.frame_bytes
+        return frames / float(self.layout.sample_rate)
+
+    def _read(self, start: float, end: float) -> np.ndarray:
+        """16 kHz mono samples between two times, read from the growing file"""
+        first = int(start * self.layout.sample_rate)
+        count = int(end * self.layout.sample_rate) - first
+        with open(self.path, "rb") as f:
+            f.seek(self.layout.data_offset + first * self.layout.frame_bytes)
+            raw = f.read(count * self.layout.frame_bytes)
+        raw = raw[:len(raw) // self.layout.frame_bytes * self.layout.frame_bytes]
+        mono = resample(downmix(np.frombuffer(raw, dtype="<i2"), self.layout.channels),
+                        self.layout.sample_rate, SPEECH_SAMPLE_RATE)
+        return np.clip(np.round(mono), -32768, 32767).astype(np.int16)
+
+    def _cut_window(self, keep_until: Optional[float], available: float) -> AudioWindow:
+        """Write the next window; keep_until=None takes everything that's left"""
+        start = max(0.0, self.cursor - self.half_overlap)
+        if keep_until is None:
+            end = keep_until = available
+        else:
+            end = keep_until + self.half_overlap
+        window = AudioWindow(len(self.windows), start, end, self.cursor, keep_until)
+        window.path = write_wav(os.path.join(self.work_dir, f"window_{window.index:03d}.wav"),
+                                self._read(start, end))
+        self.cursor = keep_until
+        return window
+
+    def _plan_cut(self) -> float:
+        """A quiet point shortly before the current window's nominal end"""
+        target = self.cursor + self.window_seconds
+        earliest = max(self.cursor + self.window_seconds / 2, target - CUT_SEARCH_SECONDS)
+        samples = self._read(earliest, target)
+        cut = quietest_point(frame_energy(samples, SPEECH_SAMPLE_RATE), 0.0, target - earliest)
+        return earliest + cut
+
+    async def on_upload_progress(self, size: int):
+        """Start transcribing every window the first `size` bytes now cover"""
+        self.size = size
+        available = self._seconds_available(size)
+        while available >= self.cursor + self.window_seconds + self.half_overlap:
+            cut = await asyncio.to_thread(self._plan_cut)
+            window = await asyncio.to_thread(self._cut_window, cut, available)
+            self._start(window)
+
+    def _start(self, window: AudioWindow):
+        self.windows.append(window)
+        task = asyncio.create_task(self.transcribe(window.path))
+        if self.on_window is not None:
+            task.add_done_callback(lambda _: self.on_window())
+        self.tasks.append(task)
+
+    def transcript_so_far(self) -> str:
+        """Stitched text of the leading windows that have finished"""
+        done = 0
+        while done < len(self.tasks) and self.tasks[done].done() and not self.tasks[done].cancelled() \
+                and self.tasks[done].exception() is None:
+            done += 1
+        if not done:
+            return ""
+        text, _ = stitch_transcripts(self.windows[:done], [task.result() for task in self.tasks[:done]])
+        return text
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio received so far"""
+        return self._seconds_available(self.size)
+
+    @property
+    def windows_started(self) -> int:
+        return len(self.windows)
+
+    async def finish(self) -> Tuple[str, List[Dict]]:
+        """Transcribe the tail, wait for every window and stitch the transcript"""
+        try:
+            available = self.duration
+            if available > self.cursor or not self.windows:
+                self._start(await asyncio.to_thread(self._cut_window, None, available))
+            responses = await asyncio.gather(*self.tasks)
+            return stitch_transcripts(self.windows, responses)
+        finally:
+            self.close()
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+@dataclass
+class ResumableUpload:
+    """An upload in progress, held by the worker that receives its chunks"""
+    upload_id: str
+    path: str
+    filename: str
+    length: Optional[int]  # Total bytes, when the client declared it
+    offset: int = 0
+    digest: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    header: bytes = b""
+    audio_format: Optional[str] = None
+    # Transcribes a 16 kHz window file; None uploads are only processed once finalized
+    transcribe: Optional[Callable[[str], Awaitable[Dict]]] = None
+    transcriber: Optional[IncrementalTranscriber] = None
+    trace: Any = None  # The meeting's MeetingTrace, so pipelined windows are attributed to it
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    created: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+
+    @property
+    def complete(self) -> bool:
+        return self.length is None or self.offset == self.length
+
+    async def advance(self):
+        """Start transcribing any windows the bytes so far complete"""
+        if self.transcribe is None:
+            return
+        if self.transcriber is None:
+            layout = wav_layout(self.header) if self.audio_format == "wav" else None
+            if layout is None:
+                # Not PCM WAV, or the header hasn't all arrived yet
+                if self.audio_format not in (None, "wav") or len(self.header) >= HEADER_BYTES:
+                    self.transcribe = None
+                return
+            self.transcriber = IncrementalTranscriber(self.path, layout, self.transcribe)
+        await self.transcriber.on_upload_progress(self.offset)
+
+    def discard(self):
+        if self.transcriber is not None:
+            self.transcriber.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def validate_filename(filename: str) -> str:
+    filename = os.path.basename(filename or "")
+    if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise UploadRejected(400, "Invalid audio format. Supported: mp3, m4a, wav, ogg, webm")
+    return filename
+
+
+async def append_chunk(upload: ResumableUpload, chunks, offset: int, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Append a PATCH body to the upload at `offset` (call with upload.lock held)
+    Each chunk is committed as it arrives, so a dropped connection keeps what
+    made it and the client resumes from the new offset
+    """
+    if offset != upload.offset:
+        raise UploadRejected(409, f"Upload is at offset {upload.offset}, not {offset}")
+    limit = min(max_bytes, upload.length) if upload.length is not None else max_bytes
+
+    async with aiofiles.open(upload.path, "r+b" if upload.offset else "wb") as f:
+        await f.seek(upload.offset)
+        async for chunk in chunks:
+            if upload.offset + len(chunk) > limit:
+                raise UploadRejected(413, "Upload is larger than its declared or maximum length")
+            if len(upload.header) < HEADER_BYTES:
+                upload.header += chunk[:HEADER_BYTES - len(upload.header)]
+            if upload.audio_format is None and len(upload.header) >= SNIFF_BYTES:
+                upload.audio_format = sniff_audio_format(upload.header[:SNIFF_BYTES])
+                if upload.audio_format is None:
+                    raise UploadRejected(400, "File content is not a supported audio format")
+            await f.write(chunk)
+            await f.flush()  # The transcriber reads the file from another handle
+            upload.digest.update(chunk)
+            upload.offset += len(chunk)
+            upload.last_active = time.monotonic()
+            await upload.advance()
+    return upload.offset
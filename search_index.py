@@ -0,0 +1,283 @@
+"""
+DogWhistle Search Index
+Full-text search over processed meetings (SQLite FTS5)
+
+Each meeting is indexed once, when its results are stored, and removed when
+it is deleted, its consent is revoked or it expires, so the index never has
+to be rebuilt. Meetings are ranked with BM25, weighting the summary and
+action items above the raw transcript. Action items are also indexed one per
+row so they can be filtered by owner and due date.
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+SEARCH_DB_PATH = os.getenv("DOGWHISTLE_SEARCH_DB", "dogwhistle_search.db")
+
+# Searchable fields, in FTS column order, with their BM25 weights
+FIELDS = {
+    "summary": 4.0,
+    "action_items": 3.0,
+    "topics": 3.0,
+    "meeting_type": 2.0,
+    "owners": 2.0,
+    "due_dates": 1.0,
+    "transcript": 1.0,
+}
+
+# Words of context on each side of a snippet's match
+SNIPPET_TOKENS = 12
+
+MAX_RESULTS = 100
+
+
+def _as_text(value) -> str:
+    if isinstance(value, dict):
+        return " ".join(_as_text(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(_as_text(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def _action_items(analysis: Dict) -> List[Dict]:
+    items = []
+    for item in analysis.get("action_items") or []:
+        if isinstance(item, dict):
+            items.append({key: _as_text(item.get(key)) for key in ("task", "owner", "due_date", "priority")})
+        else:
+            items.append({"task": _as_text(item), "owner": "", "due_date": "", "priority": ""})
+    return items
+
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Turn a user query into an FTS5 MATCH expression
+    Words are ANDed, "quoted phrases" match in order and a trailing * matches
+    a prefix; everything else is taken literally, so FTS syntax can't leak in.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if phrase.strip():
+            terms.append(_phrase(phrase))
+        elif word:
+            prefix = word.endswith("*")
+            word = word.rstrip("*")
+            if re.search(r"\w", word):
+                terms.append(_phrase(word) + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+class SearchIndex:
+    """
+    Inverted index of meetings in a SQLite FTS5 database shared by all workers
+    Like the job store, blocking work runs on a worker thread.
+    """
+
+    def __init__(self, path: str = SEARCH_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS meetings (
+                id INTEGER PRIMARY KEY,
+                meeting_id TEXT UNIQUE NOT NULL,
+                processed_at TEXT,
+                meeting_type TEXT,
+                brief TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS meetings_indexed_at ON meetings (indexed_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+                {", ".join(FIELDS)}, tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS action_items_fts USING fts5(
+                task, owner, due_date, priority UNINDEXED, meeting UNINDEXED,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+            """
+        )
+        # ORDER BY rank uses the weighted BM25
+        weights = ", ".join(str(weight) for weight in FIELDS.values())
+        self._conn.execute("INSERT INTO meetings_fts (meetings_fts, rank) VALUES ('rank', ?)", (f"bm25({weights})",))
+
+    # -- synchronous helpers, run on a worker thread --
+
+    def _delete(self, meeting_id: str) -> bool:
+        rows = self._conn.execute("SELECT id FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchall()
+        if not rows:
+            return False
+        row_id = rows[0][0]
+        self._conn.execute("DELETE FROM meetings_fts WHERE rowid = ?", (row_id,))
+        self._conn.execute("DELETE FROM action_items_fts WHERE meeting = ?", (row_id,))
+        self._conn.execute("DELETE FROM meetings WHERE id = ?", (row_id,))
+        return True
+
+    def _add(self, meeting_id: str, results: Dict):
+        analysis = results.get("analysis") or {}
+        summary = analysis.get("summary") or {}
+        items = _action_items(analysis)
+        meeting_type = _as_text(analysis.get("meeting_type"))
+        fields = {
+            "summary": _as_text(summary),
+            "action_items": " ".join(item["task"] for item in items),
+            "topics": _as_text(analysis.get("topics_discussed")),
+            "meeting_type": meeting_type,
+            "owners": " ".join(item["owner"] for item in items),
+            "due_dates": " ".join(item["due_date"] for item in items),
+            "transcript": _as_text((results.get("transcript") or {}).get("full_text")),
+        }
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(meeting_id)  # Reprocessing replaces the old entry
+                row_id = self._conn.execute(
+                    "INSERT INTO meetings (meeting_id, processed_at, meeting_type, brief, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (meeting_id, results.get("processed_at"), meeting_type.lower(),
+                     _as_text(summary.get("brief") if isinstance(summary, dict) else summary), time.time()),
+                ).lastrowid
+                self._conn.execute(
+                    f"INSERT INTO meetings_fts (rowid, {', '.join(FIELDS)}) VALUES (?{', ?' * len(FIELDS)})",
+                    (row_id, *fields.values()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO action_items_fts (task, owner, due_date, priority, meeting) VALUES (?, ?, ?, ?, ?)",
+                    [(item["task"], item["owner"], item["due_date"], item["priority"], row_id) for item in items],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _remove(self, meeting_ids: List[str]) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = sum(self._delete(meeting_id) for meeting_id in meeting_ids)
+                self._conn.execute("COMMIT")
+                return removed
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _search(self, query: Optional[str], fields: Optional[List[str]], owner: Optional[str],
+                due_date: Optional[str], meeting_type: Optional[str], limit: int, offset: int) -> Dict:
+        expression = match_expression(query or "")
+        if query and expression is None:
+            return {"results": [], "has_more": False}
+        if expression and fields:
+            expression = f"{{{' '.join(fields)}}} : ({expression})"
+
+        # Filters are column constraints in the same MATCH, so FTS intersects
+        # their postings with the query's rather than checking each matching row
+        filters = {"owners": owner, "due_dates": due_date, "meeting_type": meeting_type}
+        if any(value and match_expression(value) is None for value in filters.values()):
+            return {"results": [], "has_more": False}
+        constraints = [f"{column} : ({match_expression(value)})" for column, value in filters.items() if value]
+        match = " AND ".join(([f"({expression})"] if expression else []) + constraints)
+        item_match = " AND ".join(f"{column} : ({match_expression(value)})"
+                                  for column, value in (("owner", owner), ("due_date", due_date)) if value)
+
+        snippet = f"snippet(meetings_fts, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})"
+        if expression:
+            # With filters, snippets are taken below from the query's matches alone
+            sql = (f"SELECT rowid, -rank, {'NULL' if constraints else snippet} "
+                   f"FROM meetings_fts WHERE meetings_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?")
+            params = (match, limit + 1, offset)
+        else:
+            # Filters only: most recently indexed first
+            sql = "SELECT rowid, NULL, NULL FROM meetings_fts WHERE meetings_fts MATCH ? ORDER BY rowid DESC LIMIT ? OFFSET ?"
+            params = (match, limit + 1, offset)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            hits = rows[:limit]
+            ids = [row[0] for row in hits]
+            placeholders = ", ".join("?" * len(ids))
+            meetings = {row[0]: row[1:] for row in self._conn.execute(
+                f"SELECT id, meeting_id, processed_at, meeting_type, brief FROM meetings WHERE id IN ({placeholders})",
+                ids)}
+            if expression and constraints:
+                hits = [(row_id, score, self._conn.execute(
+                    f"SELECT {snippet} FROM meetings_fts WHERE meetings_fts MATCH ? AND rowid = ?",
+                    (expression, row_id)).fetchone()[0]) for row_id, score, _ in hits]
+            items = {}
+            if item_match and ids:
+                for meeting, *item in self._conn.execute(
+                        f"SELECT meeting, task, owner, due_date, priority FROM action_items_fts "
+                        f"WHERE action_items_fts MATCH ? AND meeting IN ({placeholders})", [item_match, *ids]):
+                    items.setdefault(meeting, []).append(dict(zip(("task", "owner", "due_date", "priority"), item)))
+
+        results = []
+        for row_id, score, snippet in hits:
+            meeting_id, processed_at, kind, brief = meetings[row_id]
+            hit = {
+                "meeting_id": meeting_id,
+                "score": round(score, 4) if score is not None else None,
+                "processed_at": processed_at,
+                "meeting_type": kind or None,
+                "summary": brief or None,
+                "snippet": snippet,
+            }
+            if item_match:
+                hit["action_items"] = items.get(row_id, [])
+            results.append(hit)
+        return {"results": results, "has_more": len(rows) > limit}
+
+    def _evict_older_than(self, cutoff: float) -> int:
+        with self._lock:
+            meeting_ids = [row[0] for row in self._conn.execute(
+                "SELECT meeting_id FROM meetings WHERE indexed_at < ?", (cutoff,))]
+        return self._remove(meeting_ids) if meeting_ids else 0
+
+    # -- public interface --
+
+    async def add(self, meeting_id: str, results: Dict):
+        """Index (or re-index) a processed meeting"""
+        await asyncio.to_thread(self._add, meeting_id, results)
+
+    async def remove(self, meeting_id: str) -> bool:
+        """Drop a meeting from the index"""
+        return await asyncio.to_thread(self._remove, [meeting_id]) > 0
+
+    async def search(self, query: Optional[str] = None, fields: Optional[List[str]] = None,
+                     owner: Optional[str] = None, due_date: Optional[str] = None,
+                     meeting_type: Optional[str] = None, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Ranked meetings matching `query` (optionally only in `fields`) and the filters
+        With an owner or due_date filter, each hit lists its matching action items.
+        Raises ValueError for unknown fields or a search with nothing to match.
+        """
+        unknown = set(fields or ()) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search fields: {', '.join(sorted(unknown))}. Available: {', '.join(FIELDS)}")
+        if not any((query, owner, due_date, meeting_type)):
+            raise ValueError("Give a query or at least one filter")
+        limit = max(1, min(limit, MAX_RESULTS))
+        return await asyncio.to_thread(self._search, query, fields, owner, due_date, meeting_type, limit,
+                                       max(0, offset))
+
+    async def evict_older_than(self, max_age_seconds: float) -> int:
+        """Drop meetings indexed more than `max_age_seconds` ago"""
+        return await asyncio.to_thread(self._evict_older_than, time.time() - max_age_seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            meetings = self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+        return {"meetings": meetings}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,89 @@
+/**
+ * DogWhistle meeting progress
+ * Listens to /api/meetings/{id}/events (Server-Sent Events) and falls back
+ * to polling /status if the browser or a proxy can't keep the stream open.
+ */
+
+const STAGE_LABELS = {
+    recording: 'Recording...',
+    uploading: 'Uploading...',
+    collecting: 'Waiting for the other phones...',
+    queued: 'Waiting in queue...',
+    aligning: 'Lining up recordings...',
+    transcribing: 'Transcribing audio...',
+    analyzing: 'Analyzing with AI...',
+    formatting: 'Preparing report...',
+    completed: 'Processing complete!'
+};
+
+function watchMeeting(meetingId, { baseUrl = '', onProgress = () => {}, onComplete, onError }) {
+    let finished = false;
+    const finish = (callback, value) => {
+        if (!finished) {
+            finished = true;
+            callback(value);
+        }
+    };
+
+    async function fetchResults() {
+        const response = await fetch(`${baseUrl}/api/meetings/${meetingId}/results`);
+        if (!response.ok) {
+            throw new Error(`Could not load results (${response.status})`);
+        }
+        return response.json();
+    }
+
+    function poll() {
+        const checkStatus = async () => {
+            if (finished) return;
+            try {
+                const response = await fetch(`${baseUrl}/api/meetings/${meetingId}/status`);
+                const data = await response.json();
+
+                if (data.status === 'completed') {
+                    finish(onComplete, await fetchResults());
+                } else if (data.status === 'failed') {
+                    finish(onError, new Error(data.message || 'Processing failed'));
+                } else {
+                    onProgress(data);
+                    setTimeout(checkStatus, 2000);
+                }
+            } catch (error) {
+                finish(onError, error);
+            }
+        };
+
+        checkStatus();
+    }
+
+    if (!window.EventSource) {
+        poll();
+        return;
+    }
+
+    const source = new EventSource(`${baseUrl}/api/meetings/${meetingId}/events`);
+
+    source.addEventListener('progress', event => onProgress(JSON.parse(event.data)));
+
+    source.addEventListener('completed', async event => {
+        source.close();
+        const data = JSON.parse(event.data);
+        try {
+            finish(onComplete, data.results || await fetchResults());
+        } catch (error) {
+            finish(onError, error);
+        }
+    });
+
+    source.addEventListener('failed', event => {
+        source.close();
+        finish(onError, new Error(JSON.parse(event.data).message || 'Processing failed'));
+    });
+
+    // Stream dropped before the meeting finished: poll instead
+    source.onerror = () => {
+        if (finished) return;
+        source.close();
+        poll();
+    };
+}
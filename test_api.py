@@ -34,12 +34,28 @@ def test_api():
     print(f"   Meeting ID: {meeting_id}")
     print(f"   Status: {upload_data['status']}")
     
-    # 3. Check processing status
-    print("\n3. Checking processing status...")
+    # 3. Follow processing progress (pushed as Server-Sent Events)
+    print("\n3. Following processing progress...")
+    status = None
+    status_data = {}
+    try:
+        with requests.get(f"{BASE_URL}/api/meetings/{meeting_id}/events", stream=True, timeout=300) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                status_data = json.loads(line[len("data: "):])
+                status = status_data["status"]
+                print(f"   Stage: {status_data['stage']} ({status_data.get('progress') or 0}%)", end="\r")
+                if status in ("completed", "failed"):
+                    break
+    except requests.RequestException as e:
+        print(f"   Event stream unavailable ({e}), falling back to polling")
+    
+    # Fallback: poll the status endpoint
     max_attempts = 60  # Wait up to 5 minutes
     attempt = 0
     
-    while attempt < max_attempts:
+    while status not in ("completed", "failed") and attempt < max_attempts:
         response = requests.get(f"{BASE_URL}/api/meetings/{meeting_id}/status")
         status_data = response.json()
         
@@ -48,16 +64,18 @@ def test_api():
         
         print(f"   Status: {status} ({progress}%)", end="\r")
         
-        if status == "completed":
-            print(f"\n   ✅ Processing completed!")
+        if status in ("completed", "failed"):
             break
-        elif status == "failed":
-            print(f"\n   ❌ Processing failed: {status_data.get('message')}")
-            return
         
         time.sleep(5)  # Check every 5 seconds
         attempt += 1
     
+    if status == "completed":
+        print(f"\n   ✅ Processing completed!")
+    elif status == "failed":
+        print(f"\n   ❌ Processing failed: {status_data.get('message')}")
+        return
+    
     # 4. Get results
     print("\n4. Getting results...")
     response = requests.get(f"{BASE_URL}/api/meetings/{meeting_id}/results")
@@ -0,0 +1,284 @@
+"""
+In-process tests of the API, through httpx's ASGI transport with a stubbed OpenAI client
+"""
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai.types.audio import Transcription
+from starlette.websockets import WebSocketDisconnect
+
+import app
+from dogwhistle_ai_processor import DogWhistleProcessor
+from job_store import SQLiteJobStore
+from progress_events import transcript_event
+from related_meetings import RelatedMeetingsIndex
+from result_cache import DiskCache, ResultCache
+from search_index import SearchIndex
+from test_report_renderers import make_results
+
+WAV = b"RIFF\x00\x00\x00\x00WAVEfmt " + bytes(range(256)) * 8
+
+
+def stub_client(calls):
+    async def transcribe(**kwargs):
+        calls["transcribe"] += 1
+        return Transcription(text="Dana will ship the migration by Friday.")
+
+    async def complete(**kwargs):
+        calls["complete"] += 1
+        message = SimpleNamespace(content=json.dumps(make_results("x")["analysis"]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    return SimpleNamespace(
+        audio=SimpleNamespace(transcriptions=SimpleNamespace(create=transcribe)),
+        chat=SimpleNamespace(completions=SimpleNamespace(create=complete)),
+    )
+
+
+async def start_app(tmp_path, monkeypatch, calls=None):
+    """Start the app on stores under tmp_path; returns an HTTP client for it"""
+    use_temp_stores(tmp_path, monkeypatch)
+    await app.startup_event()
+    use_stub_processor(tmp_path, monkeypatch, calls)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test")
+
+
+def use_temp_stores(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(app, "WARM_ON_STARTUP", False)
+    monkeypatch.setattr(app, "job_store", SQLiteJobStore(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(app, "search_index", SearchIndex(str(tmp_path / "search.db")))
+    monkeypatch.setattr(app, "related_index", RelatedMeetingsIndex(str(tmp_path / "related")))
+
+
+def use_stub_processor(tmp_path, monkeypatch, calls=None):
+    """Replace the processor the startup event built with one on a stub client"""
+    cache = ResultCache(disk=DiskCache(str(tmp_path / "cache")))
+    client = stub_client(calls if calls is not None else {"transcribe": 0, "complete": 0})
+    monkeypatch.setattr(app, "processor", DogWhistleProcessor(cache=cache, stream_analysis=False, client=client))
+
+
+async def stop_app(client):
+    await client.aclose()
+    for task in list(app.background_tasks):
+        task.cancel()
+    await app.scheduler.stop()
+
+
+async def wait_until_finished(client, meeting_id: str) -> dict:
+    for _ in range(200):
+        status = (await client.get(f"/api/meetings/{meeting_id}/status")).json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        await asyncio.sleep(0.02)
+    raise AssertionError("Meeting never finished")
+
+
+async def upload(client) -> str:
+    response = await client.post("/api/meetings/upload", files={"audio_file": ("standup.wav", WAV, "audio/wav")})
+    assert response.status_code == 200
+    return response.json()["meeting_id"]
+
+
+async def wait_for_listeners(meeting_id: str, count: int):
+    for _ in range(200):
+        if app.progress_broker.listener_count(meeting_id) == count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Expected {count} listeners for {meeting_id}")
+
+
+def parse_sse(body: str):
+    """(event name, data) for each message, and the number of keepalive comments"""
+    messages, keepalives = [], 0
+    for block in body.split("\n\n"):
+        if block.startswith(": keepalive"):
+            keepalives += 1
+        elif block:
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            messages.append((fields["event"], json.loads(fields["data"])))
+    return messages, keepalives
+
+
+def cached_files(tmp_path):
+    return [name for _, _, files in os.walk(tmp_path / "cache") for name in files if name.endswith(".json")]
+
+
+@pytest.mark.asyncio
+async def test_revoking_consent_leaves_nothing_behind(tmp_path, monkeypatch):
+    calls = {"transcribe": 0, "complete": 0}
+    client = await start_app(tmp_path, monkeypatch, calls)
+    try:
+        meeting_id = await upload(client)
+        assert (await wait_until_finished(client, meeting_id))["status"] == "completed"
+        report = tmp_path / "reports" / f"{meeting_id}_full_report.json"
+        assert report.exists() and len(cached_files(tmp_path)) == 2
+        assert (await client.get("/api/search", params={"q": "migration"})).json()["results"]
+
+        response = await client.post(f"/api/meetings/{meeting_id}/consent-check", params={"consent_given": False})
+        assert response.status_code == 200
+
+        assert (await client.get(f"/api/meetings/{meeting_id}/status")).status_code == 404
+        assert (await client.get(f"/api/meetings/{meeting_id}/results")).status_code == 404
+        assert (await client.get(f"/api/meetings/{meeting_id}/related")).status_code == 404
+        assert (await client.get("/api/search", params={"q": "migration"})).json()["results"] == []
+        assert await app.job_store.get_results(meeting_id) is None
+        assert not report.exists()
+        assert cached_files(tmp_path) == []
+        assert len(app.processor.cache.transcripts) == len(app.processor.cache.analyses) == 0
+
+        # The same audio uploaded again is transcribed and analyzed afresh
+        again = await upload(client)
+        assert (await wait_until_finished(client, again))["status"] == "completed"
+        assert calls == {"transcribe": 2, "complete": 2}
+    finally:
+        await stop_app(client)
+
+
+@pytest.mark.asyncio
+async def test_event_stream_follows_a_meeting_until_it_finishes(tmp_path, monkeypatch):
+    client = await start_app(tmp_path, monkeypatch)
+    monkeypatch.setattr(app, "EVENT_REFRESH_SECONDS", 0.02)
+    try:
+        await app.job_store.create("m1", status="pending", stage="recording", progress=0)
+        await app.job_store.append_live_text("m1", 0, "Okay so")
+        # The transport hands over the body once the stream ends
+        stream = asyncio.create_task(client.get("/api/meetings/m1/events"))
+        await wait_for_listeners("m1", 1)
+
+        app.progress_broker.publish("m1", transcript_event("m1", 7, " let's start."))
+        await asyncio.sleep(0.1)  # Nothing new: keepalives
+        await app.report_progress("m1", "transcribing", 30)
+        await app.report_progress("m1", "transcribing", 30)  # Repeats aren't sent twice
+        await app.job_store.set_results("m1", make_results("m1"))
+        await app.report_progress("m1", "completed", 100)
+        response = await asyncio.wait_for(stream, 5)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        messages, keepalives = parse_sse(response.text)
+        assert [name for name, _ in messages] == ["transcript", "progress", "transcript", "progress", "completed"]
+        assert messages[0][1]["text"] == "Okay so" and messages[2][1]["offset"] == 7
+        assert [event.get("stage") for _, event in messages[1::2]] == ["recording", "transcribing"]
+        assert messages[-1][1]["results"]["meeting_id"] == "m1"
+        assert keepalives >= 1
+        assert app.progress_broker.listener_count("m1") == 0
+    finally:
+        await stop_app(client)
+
+
+@pytest.mark.asyncio
+async def test_event_stream_unsubscribes_when_the_client_leaves(tmp_path, monkeypatch):
+    client = await start_app(tmp_path, monkeypatch)
+    try:
+        await app.job_store.create("m2", status="pending", stage="queued", progress=0)
+        stream = asyncio.create_task(client.get("/api/meetings/m2/events"))
+        await wait_for_listeners("m2", 1)
+
+        stream.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await stream
+        assert app.progress_broker.listener_count() == 0
+
+        # A server sees a disconnect message rather than a cancellation
+        requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+        sent = []
+
+        async def receive():
+            return next(requests, {"type": "http.disconnect"})
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/meetings/m2/events", "raw_path": b"",
+                 "root_path": "", "query_string": b"", "headers": [], "scheme": "http", "server": ("test", 80)}
+        await asyncio.wait_for(app.app(scope, receive, send), 5)
+        assert sent[0]["status"] == 200
+        assert app.progress_broker.listener_count() == 0
+        assert (await client.get("/api/meetings/unknown/events")).status_code == 404
+    finally:
+        await stop_app(client)
+
+
+def wait_for_status(client, meeting_id: str, statuses=("completed", "failed")) -> dict:
+    for _ in range(200):
+        status = client.get(f"/api/meetings/{meeting_id}/status").json()
+        if status["status"] in statuses:
+            return status
+        time.sleep(0.02)
+    raise AssertionError("Meeting never finished")
+
+
+def test_live_recording_stops_only_on_a_stop_message(tmp_path, monkeypatch):
+    use_temp_stores(tmp_path, monkeypatch)
+    with TestClient(app.app) as client:
+        use_stub_processor(tmp_path, monkeypatch)
+        with client.websocket_connect("/api/meetings/live?filename=rec.wav") as socket:
+            meeting_id = socket.receive_json()["meeting_id"]
+            socket.send_text("nonstop")
+            socket.send_text(json.dumps({"type": "ping", "note": "stop"}))
+            socket.send_bytes(WAV)
+            socket.send_text(json.dumps({"type": "stop"}))
+            assert socket.receive_json() == {"type": "finalized", "meeting_id": meeting_id}
+
+        # Had either earlier frame stopped it, nothing would have been recorded
+        assert wait_for_status(client, meeting_id)["status"] == "completed"
+
+
+def test_live_recording_that_fails_is_cleaned_up(tmp_path, monkeypatch):
+    async def disk_full(self, chunk):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(app.LiveSession, "add_chunk", disk_full)
+    use_temp_stores(tmp_path, monkeypatch)
+    with TestClient(app.app) as client:
+        use_stub_processor(tmp_path, monkeypatch)
+        with client.websocket_connect("/api/meetings/live?filename=rec.wav") as socket:
+            meeting_id = socket.receive_json()["meeting_id"]
+            path = app.live_sessions[meeting_id].path
+            socket.send_bytes(WAV)
+            with pytest.raises(WebSocketDisconnect) as closed:
+                socket.receive_json()
+
+        assert closed.value.code == 1011
+        status = wait_for_status(client, meeting_id)
+        assert status["status"] == "failed" and "No space left" in status["message"]
+        assert meeting_id not in app.live_sessions
+        assert not os.path.exists(path)
+
+
+def test_live_recording_too_short_to_identify_fails(tmp_path, monkeypatch):
+    use_temp_stores(tmp_path, monkeypatch)
+    with TestClient(app.app) as client:
+        use_stub_processor(tmp_path, monkeypatch)
+        with client.websocket_connect("/api/meetings/live?filename=rec.wav") as socket:
+            meeting_id = socket.receive_json()["meeting_id"]
+            socket.send_bytes(b"RIFF")
+            socket.send_text(json.dumps({"type": "stop"}))
+            socket.receive_json()
+
+        status = wait_for_status(client, meeting_id)
+        assert status["status"] == "failed" and "not a supported audio format" in status["message"]
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_too_short_to_identify_is_rejected(tmp_path, monkeypatch):
+    client = await start_app(tmp_path, monkeypatch)
+    try:
+        created = await client.post("/api/uploads", params={"filename": "tiny.wav", "length": 4})
+        meeting_id = created.json()["meeting_id"]
+        await client.patch(f"/api/uploads/{meeting_id}", content=b"RIFF", headers={"Upload-Offset": "0"})
+
+        response = await client.post(f"/api/uploads/{meeting_id}/finalize")
+        assert response.status_code == 400
+        assert meeting_id not in app.resumable_uploads
+        assert (await client.get(f"/api/meetings/{meeting_id}/status")).json()["status"] == "failed"
+    finally:
+        await stop_app(client)
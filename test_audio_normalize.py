@@ -0,0 +1,56 @@
+"""
+Tests for shrinking audio before transcription
+"""
+import wave
+
+import numpy as np
+import pytest
+
+import audio_normalize
+from audio_io import ffmpeg_available, probe_duration, read_wav, write_wav
+from audio_normalize import normalize_for_whisper
+
+
+def write_stereo_wav(path, seconds=2.0, rate=44100):
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.column_stack([tone, tone]).tobytes())
+
+
+def test_numpy_path_downmixes_and_resamples(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_normalize, "ffmpeg_available", lambda: False)
+    source = tmp_path / "meeting.wav"
+    write_stereo_wav(source)
+
+    speech = normalize_for_whisper(str(source), str(tmp_path))
+
+    assert speech.codec == "pcm_s16le"
+    samples, rate, channels = read_wav(speech.path)
+    assert (rate, channels) == (16000, 1)
+    assert abs(probe_duration(speech.path) - 2.0) < 0.01
+    assert speech.size_bytes < speech.original_bytes / 5
+
+
+def test_leaves_files_it_cannot_shrink(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_normalize, "ffmpeg_available", lambda: False)
+    compressed = tmp_path / "meeting.m4a"
+    compressed.write_bytes(b"\0\0\0\x20ftypM4A " + bytes(100))
+    speech_rate = write_wav(str(tmp_path / "window.wav"), np.zeros(16000, dtype=np.int16))
+
+    assert normalize_for_whisper(str(compressed), str(tmp_path)).path == str(compressed)
+    assert normalize_for_whisper(speech_rate, str(tmp_path)).codec == "original"
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+def test_ffmpeg_path_encodes_opus(tmp_path):
+    source = tmp_path / "meeting.wav"
+    write_stereo_wav(source, seconds=5.0)
+
+    speech = normalize_for_whisper(str(source), str(tmp_path))
+
+    assert speech.codec == "opus" and speech.path.endswith(".ogg")
+    assert speech.size_bytes < speech.original_bytes / 20
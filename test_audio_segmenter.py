@@ -0,0 +1,77 @@
+"""
+Tests for splitting long recordings and stitching window transcripts
+"""
+import numpy as np
+
+from audio_io import read_wav, write_wav
+from audio_segmenter import AudioWindow, merge_overlapping_text, plan_windows, split_audio, stitch_transcripts
+
+RATE = 16000
+
+
+def speech_with_pauses(seconds: int, pause_every: int) -> np.ndarray:
+    """Loud noise with one second of silence every `pause_every` seconds"""
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(seconds * RATE) * 3000).astype(np.int16)
+    for start in range(pause_every, seconds, pause_every):
+        samples[start * RATE:(start + 1) * RATE] = 0
+    return samples
+
+
+def test_short_recording_is_one_window():
+    windows = plan_windows(np.zeros(30 * RATE, dtype=np.int16), RATE, window_seconds=60)
+    assert len(windows) == 1
+    assert windows[0].keep_until == 30
+
+
+def test_windows_cover_recording_and_cut_in_pauses():
+    samples = speech_with_pauses(300, pause_every=25)
+    windows = plan_windows(samples, RATE, window_seconds=60, overlap_seconds=2, search_seconds=20)
+
+    assert windows[0].keep_from == 0
+    assert windows[-1].keep_until == 300
+    for previous, following in zip(windows, windows[1:]):
+        assert previous.keep_until == following.keep_from
+        # Cuts should land inside one of the silent seconds
+        assert int(previous.keep_until) % 25 == 0
+    for window in windows:
+        assert window.end - window.start <= 60
+
+
+def test_split_audio_writes_the_planned_windows(tmp_path):
+    # Longer than one decoding block, so windows span block boundaries
+    samples = speech_with_pauses(300, pause_every=25)
+    source = write_wav(str(tmp_path / "meeting.wav"), samples)
+
+    windows = split_audio(source, str(tmp_path / "windows"), window_seconds=60, overlap_seconds=2)
+
+    planned = plan_windows(samples, RATE, window_seconds=60, overlap_seconds=2)
+    assert [(w.start, w.end) for w in windows] == [(w.start, w.end) for w in planned]
+    for window in windows:
+        written, rate, _ = read_wav(window.path)
+        assert rate == RATE
+        assert np.array_equal(written, samples[int(window.start * RATE):int(window.end * RATE)])
+
+
+def test_stitch_keeps_each_segment_once():
+    windows = [AudioWindow(0, 0.0, 11.0, 0.0, 10.0), AudioWindow(1, 9.0, 20.0, 10.0, 20.0)]
+    responses = [
+        {"text": "", "segments": [
+            {"start": 0.0, "end": 5.0, "text": " Hello everyone."},
+            {"start": 9.5, "end": 11.0, "text": " Next item."},
+        ]},
+        {"text": "", "segments": [
+            {"start": 0.5, "end": 2.0, "text": " Next item."},
+            {"start": 3.0, "end": 8.0, "text": " Dana owns the migration."},
+        ]},
+    ]
+
+    text, segments = stitch_transcripts(windows, responses)
+
+    assert text == "Hello everyone. Next item. Dana owns the migration."
+    assert [s["start"] for s in segments] == [0.0, 9.5, 12.0]
+
+
+def test_text_fallback_removes_duplicated_overlap():
+    merged = merge_overlapping_text("We should ship it on Friday.", "ship it on Friday. Any objections?")
+    assert merged == "We should ship it on Friday. Any objections?"
@@ -0,0 +1,120 @@
+"""
+Tests for batch uploads and batch result archives
+"""
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from starlette.requests import Request
+
+from batch_upload import extract_archive, stream_results_archive, summarize_batch
+from test_report_renderers import make_results
+from test_upload_streaming import BOUNDARY
+from upload_streaming import UploadRejected, stream_uploads_to_disk
+
+WAV = b"RIFF\x00\x00\x00\x00WAVEfmt "
+
+
+def multipart_files(parts) -> Request:
+    body = b""
+    for field, filename, data in parts:
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n\r\n'
+        ).encode() + data + b"\r\n"
+    body += f"--{BOUNDARY}--\r\n".encode()
+    pieces = [body[i:i + 1024] for i in range(0, len(body), 1024)]
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+
+    async def receive():
+        chunk = pieces.pop(0) if pieces else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(pieces)}
+
+    return Request(scope, receive)
+
+
+@pytest.mark.asyncio
+async def test_streams_every_file_and_archive(tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("inner.wav", WAV + os.urandom(100))
+    request = multipart_files([
+        ("audio_files", "a.wav", WAV + os.urandom(5000)),
+        ("audio_files", "b.wav", WAV + os.urandom(3000)),
+        ("archive", "more.zip", archive.getvalue()),
+    ])
+
+    uploads = await stream_uploads_to_disk(request, lambda name: str(tmp_path / name),
+                                           field_names=("audio_files", "archive"), max_files=5,
+                                           allow_archives=True, chunk_size=4096)
+
+    assert [(u.filename, u.audio_format) for u in uploads] == [("a.wav", "wav"), ("b.wav", "wav"),
+                                                               ("more.zip", "zip")]
+    assert uploads[1].size == len(WAV) + 3000
+
+
+@pytest.mark.asyncio
+async def test_rejects_too_many_files(tmp_path):
+    request = multipart_files([("audio_files", f"{i}.wav", WAV + b"\x00" * 10) for i in range(3)])
+
+    with pytest.raises(UploadRejected) as exc:
+        await stream_uploads_to_disk(request, lambda name: str(tmp_path / name),
+                                     field_names=("audio_files",), max_files=2)
+
+    assert exc.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_extract_archive_skips_non_audio_and_limits_inflated_size(tmp_path):
+    archive = tmp_path / "set.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr("meetings/monday.wav", WAV + b"\x00" * 1000)
+        z.writestr("meetings/readme.txt", "notes")
+        z.writestr("meetings/fake.wav", b"<html>not audio</html>")
+        z.writestr("__MACOSX/meetings/._monday.wav", WAV)
+    out = tmp_path / "out"
+    out.mkdir()
+    spool = lambda name: str(out / name)
+
+    uploads, skipped = extract_archive(str(archive), spool)
+
+    assert [u.filename for u in uploads] == ["monday.wav"]
+    assert uploads[0].size == len(WAV) + 1000
+    assert sorted(skipped) == ["meetings/fake.wav", "meetings/readme.txt"]
+    assert sorted(os.listdir(out)) == ["monday.wav"]
+
+    retry = tmp_path / "retry"
+    retry.mkdir()
+    with pytest.raises(UploadRejected) as exc:
+        # Compresses far below 500 bytes, but inflates past it
+        extract_archive(str(archive), lambda name: str(retry / name), max_total_bytes=500)
+    assert exc.value.status_code == 413
+    assert os.listdir(retry) == []
+
+
+@pytest.mark.asyncio
+async def test_results_archive_has_a_folder_per_finished_meeting():
+    meetings = [
+        {"meeting_id": "m1", "filename": "Monday standup.m4a", "status": "completed", "progress": 100},
+        {"meeting_id": "m2", "filename": "b.wav", "status": "processing", "progress": 40},
+    ]
+    results = make_results("m1")
+
+    async def load_results(meeting_id):
+        return results if meeting_id == "m1" else None
+
+    summary = summarize_batch(meetings)
+    data = b"".join([chunk async for chunk in stream_results_archive(meetings, load_results, summary)])
+
+    names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+    assert "001_Monday_standup/combined.txt" in names
+    assert not any(name.startswith("002") for name in names)
+    manifest = json.loads(zipfile.ZipFile(io.BytesIO(data)).read("batch.json"))
+    assert (manifest["status"], manifest["progress"], manifest["finished"]) == ("processing", 70, 1)
+    assert manifest["meetings"][0]["folder"] == "001_Monday_standup"
@@ -0,0 +1,93 @@
+"""
+Tests for the durable job store
+"""
+import asyncio
+import json
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    await store.create("m1", status="pending", progress=0)
+    await store.update("m1", status="completed", progress=100)
+    await store.set_results("m1", {"transcript": {"full_text": "hello"}})
+
+    assert (await store.get("m1"))["status"] == "completed"
+    assert (await store.get_results("m1"))["transcript"]["full_text"] == "hello"
+
+    assert await store.delete("m1")
+    assert await store.get("m1") is None
+    assert await store.get_results("m1") is None
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_database(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    uploader = SQLiteJobStore(path, hot_ttl_seconds=0)
+    poller = SQLiteJobStore(path, hot_ttl_seconds=0)
+
+    await uploader.create("m1", status="pending", progress=0)
+    assert (await poller.get("m1"))["status"] == "pending"
+
+    await uploader.update("m1", status="processing", progress=20)
+    assert (await poller.get("m1"))["progress"] == 20
+
+
+@pytest.mark.asyncio
+async def test_appends_from_several_workers_are_all_kept(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    workers = [SQLiteJobStore(path, hot_ttl_seconds=0) for _ in range(4)]
+    await workers[0].create("g1", status="pending", stage="collecting", recordings=[])
+
+    added = await asyncio.gather(*(
+        workers[i % 4].append("g1", "recordings", f"phone{i}.wav", max_length=6, expected={"stage": "collecting"})
+        for i in range(8)
+    ))
+
+    assert sum(record is not None for record in added) == 6
+    assert len((await workers[1].get("g1"))["recordings"]) == 6
+
+    # Closing the group wins once; later appends are refused
+    assert await workers[2].update_if("g1", {"stage": "collecting"}, stage="queued") is not None
+    assert await workers[3].update_if("g1", {"stage": "collecting"}, stage="queued") is None
+    await workers[0].update("g1", recordings=[])
+    assert await workers[0].append("g1", "recordings", "late.wav", expected={"stage": "collecting"}) is None
+    assert await workers[0].append("missing", "recordings", "late.wav") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_store_append_checks_limits():
+    store = MemoryJobStore()
+    await store.create("g1", stage="collecting", recordings=[])
+    assert (await store.append("g1", "recordings", "a.wav", max_length=1))["recordings"] == ["a.wav"]
+    assert await store.append("g1", "recordings", "b.wav", max_length=1) is None
+    assert await store.append("g1", "recordings", "b.wav", expected={"stage": "queued"}) is None
+
+
+@pytest.mark.asyncio
+async def test_live_text_is_kept_out_of_the_status_record(tmp_path):
+    for store in (SQLiteJobStore(str(tmp_path / "jobs.db")), MemoryJobStore()):
+        await store.create("m1", status="pending", stage="recording")
+        await store.append_live_text("m1", 0, "Okay so")
+        await store.append_live_text("m1", 7, " let's start.")
+        await store.append_live_text("m1", 14, "start. Dana?")
+
+        assert await store.get_live_text("m1") == "Okay so let's start. Dana?"
+        assert "live" not in json.dumps(await store.get("m1"))
+        await store.delete("m1")
+        assert await store.get_live_text("m1") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_meetings_are_evicted(tmp_path):
+    for store in (SQLiteJobStore(str(tmp_path / "jobs.db"), ttl_seconds=-1, hot_ttl_seconds=0),
+                  MemoryJobStore(ttl_seconds=-1)):
+        await store.create("old", status="completed")
+        await store.set_results("old", {"analysis": {}})
+
+        assert await store.get("old") is None
+        assert await store.evict_expired() == 1
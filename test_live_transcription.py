@@ -0,0 +1,100 @@
+"""
+Tests for live transcription of streamed recordings
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import live_transcription
+from live_transcription import LiveSession, StreamDecoder, streaming_wav_header
+from test_resumable_upload import speech_with_pauses, wav_bytes
+from upload_streaming import UploadRejected
+
+
+async def fake_transcribe(path):
+    await asyncio.sleep(0)
+    return {"text": f"window {path[-7:-4]}", "segments": []}
+
+
+@pytest.mark.asyncio
+async def test_transcribes_wav_stream_while_recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(live_transcription, "LIVE_WINDOW_SECONDS", 10)
+    data = wav_bytes(speech_with_pauses(45))
+    updates = []
+    session = LiveSession("m", str(tmp_path / "m.wav"), fake_transcribe,
+                          lambda offset, text: updates.append((offset, text)))
+
+    for start in range(0, len(data), 16000):  # Half-second chunks
+        await session.add_chunk(data[start:start + 16000])
+        await asyncio.sleep(0)
+    transcriber = await session.stop()
+
+    # Each update is only the new window's text; applied in order they give the running transcript
+    transcript = ""
+    for offset, text in updates:
+        assert text.count("window") <= 1
+        transcript = transcript[:offset] + text
+    assert len(updates) >= 2 and transcript.startswith("window 000")
+    assert transcript == session.transcript == transcriber.transcript_so_far()
+    assert transcriber.windows_started >= 3
+    text, _ = await transcriber.finish()
+    assert text.count("window") == transcriber.windows_started
+    assert (tmp_path / "m.wav").read_bytes() == data
+    session.discard()
+
+
+@pytest.mark.asyncio
+async def test_compressed_stream_without_ffmpeg_is_kept_for_later(tmp_path, monkeypatch):
+    monkeypatch.setattr(live_transcription, "ffmpeg_available", lambda: False)
+    chunks = [b"\x1a\x45\xdf\xa3" + bytes(100), bytes(200)]
+    session = LiveSession("m", str(tmp_path / "m.webm"), fake_transcribe, lambda offset, text: None)
+
+    for chunk in chunks:
+        await session.add_chunk(chunk)
+
+    assert await session.stop() is None
+    assert (tmp_path / "m.webm").read_bytes() == b"".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_rejects_stream_that_is_not_audio(tmp_path):
+    session = LiveSession("m", str(tmp_path / "m.webm"), fake_transcribe, lambda offset, text: None)
+
+    with pytest.raises(UploadRejected) as exc:
+        await session.add_chunk(b"<html><body>hello</body></html>")
+
+    assert exc.value.status_code == 400
+    session.discard()
+    assert not (tmp_path / "m.webm").exists()
+
+
+@pytest.mark.asyncio
+async def test_decoded_audio_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    threaded = []
+    to_thread = asyncio.to_thread
+
+    async def recording_to_thread(func, *args):
+        threaded.append(getattr(func, "__name__", repr(func)))
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", recording_to_thread)
+    sizes = []
+
+    async def on_audio(size):
+        sizes.append(size)
+
+    decoder = StreamDecoder(str(tmp_path / "live.wav"), on_audio)
+    stdout = asyncio.StreamReader()
+    decoder.process = SimpleNamespace(stdout=stdout)
+    reader = asyncio.create_task(decoder._read())
+    stdout.feed_data(b"\x01\x00" * 100)
+    await asyncio.sleep(0.05)
+    stdout.feed_data(b"\x02\x00" * 50)
+    stdout.feed_eof()
+    await reader
+
+    header = streaming_wav_header()
+    assert (tmp_path / "live.wav").read_bytes() == header + b"\x01\x00" * 100 + b"\x02\x00" * 50
+    assert sizes == [len(header) + 200, len(header) + 300]
+    assert threaded == ["open", "_append", "_append", "_append", "close"]
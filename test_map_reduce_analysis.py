@@ -0,0 +1,61 @@
+"""
+Tests for chunked analysis of long transcripts
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from dogwhistle_ai_processor import DogWhistleProcessor
+from map_reduce_analysis import merge_action_items, needs_map_reduce, split_transcript
+
+
+def test_split_respects_budget_and_keeps_text():
+    transcript = " ".join(f"Sentence number {i} is about the roadmap." for i in range(500))
+    chunks = split_transcript(transcript, chunk_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 * 4 for chunk in chunks)
+    assert " ".join(chunks) == transcript
+    assert needs_map_reduce(transcript, threshold_tokens=1000)
+    assert not needs_map_reduce("short meeting", threshold_tokens=1000)
+
+
+def test_merge_deduplicates_and_reconciles():
+    merged = merge_action_items([
+        [{"task": "Send the budget to finance", "owner": "", "due_date": "", "priority": "medium"},
+         {"task": "Book the offsite venue", "owner": "Lee", "due_date": "", "priority": "low"}],
+        [{"task": "Send budget to finance team", "owner": "Ana", "due_date": "Friday", "priority": "high"}],
+        [{"task": "send the budget to Finance", "owner": "Ana", "due_date": "Monday", "priority": "low"}],
+    ])
+
+    assert merged == [
+        {"task": "Send budget to finance team", "owner": "Ana", "due_date": "Monday", "priority": "high"},
+        {"task": "Book the offsite venue", "owner": "Lee", "due_date": "", "priority": "low"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_uses_map_reduce(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr("dogwhistle_ai_processor.split_transcript", lambda transcript: transcript.split("|"))
+    prompts = []
+
+    async def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        prompts.append(prompt)
+        if "TRANSCRIPT PART" in prompt:
+            note = {"summary": "part", "action_items": [{"task": "Write the launch plan", "owner": "Kim"}]}
+        else:
+            note = {"summary": {"brief": "b", "detailed": "d"}, "follow_up_questions": ["q"],
+                    "key_insights": [], "topics_discussed": ["launch"], "sentiment": "positive", "meeting_type": "planning"}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(note)))])
+
+    processor = DogWhistleProcessor(cache=SimpleNamespace())
+    processor.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    analysis = await processor.analyze_transcript_map_reduce("first half|second half")
+
+    assert len(prompts) == 3
+    assert list(analysis) == ["summary", "action_items", "follow_up_questions", "key_insights",
+                              "topics_discussed", "sentiment", "meeting_type"]
+    assert analysis["action_items"] == [{"task": "Write the launch plan", "owner": "Kim", "due_date": "", "priority": "medium"}]
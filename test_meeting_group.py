@@ -0,0 +1,69 @@
+"""
+Tests for aligning and merging multi-phone meeting recordings
+"""
+import numpy as np
+
+from audio_io import read_wav, write_wav
+from meeting_group import combine_device_scans, find_offset, merge_recordings
+
+RATE = 16000
+
+
+def talk(seconds, rng):
+    """Speech-like bursts with irregular pauses, so alignment is unambiguous"""
+    count = int(seconds * RATE)
+    gate = np.repeat(rng.random(count // 4000 + 1) > 0.4, 4000)[:count]
+    return rng.standard_normal(count) * gate * 3000
+
+
+def phone(meeting, start, level, noise, rng):
+    audio = meeting[int(start * RATE):] * level
+    audio = audio + rng.normal(0, noise, len(audio))
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def test_finds_offset_to_the_sample():
+    rng = np.random.default_rng(0)
+    meeting = talk(60, rng)
+    reference = phone(meeting, 0, 1.0, 50, rng)
+    late = phone(meeting, 2.3457, 0.4, 150, rng)
+
+    assert find_offset(reference, late) == int(2.3457 * RATE)
+    assert find_offset(late, reference) == -int(2.3457 * RATE)
+
+
+def test_merge_aligns_and_prefers_the_clearest_phone(tmp_path):
+    rng = np.random.default_rng(1)
+    meeting = talk(120, rng)
+    near = phone(meeting, 1.5, 1.0, 30, rng)
+    far = phone(meeting, 0, 0.3, 300, rng)
+    paths = [str(tmp_path / "near.wav"), str(tmp_path / "far.wav")]
+    write_wav(paths[0], near)
+    write_wav(paths[1], far)
+
+    merged = merge_recordings(paths, str(tmp_path / "merged.wav"))
+
+    assert merged.offsets == [1.5, 0.0]
+    assert abs(merged.duration - len(far) / RATE) < 0.01
+    # The far phone is only used before the near one started recording
+    assert merged.sources_used[0] > 110
+    assert merged.sources_used.get(1, 0) <= 2
+    samples, rate, _ = read_wav(merged.path)
+    assert rate == RATE and len(samples) == len(far)
+
+
+def test_device_scans_are_combined_on_the_group_timeline():
+    scans = [
+        [{"device_code": "1F4", "frequency": 17500.0, "first_seen": 0.0, "last_seen": 10.0,
+          "total_seconds": 10.0, "intervals": [{"start": 0.0, "end": 10.0}]}],
+        [{"device_code": "1F4", "frequency": 17500.0, "first_seen": 5.0, "last_seen": 20.0,
+          "total_seconds": 15.0, "intervals": [{"start": 5.0, "end": 20.0}]}],
+        None,
+    ]
+
+    devices = combine_device_scans(scans, [0.0, 2.0, 1.0])
+
+    assert len(devices) == 1
+    assert devices[0]["intervals"] == [{"start": 0.0, "end": 22.0}]
+    assert devices[0]["total_seconds"] == 22.0
+    assert combine_device_scans([None, None], [0.0, 1.0]) is None
@@ -0,0 +1,84 @@
+import json
+import os
+
+import httpx
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+
+from audio_io import write_wav
+from dogwhistle_ai_processor import DogWhistleProcessor
+from fake_openai import create_fake_openai
+from offline_batch import find_recordings, load_checkpoint, run_batch
+from openai_limiter import RateLimitedClient
+from result_cache import DiskCache, ResultCache
+
+
+def make_recording(path, seed, seconds=2.0, rate=16000):
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return write_wav(str(path), (rng.standard_normal(int(seconds * rate)) * 0.1).astype(np.float32), rate)
+
+
+def build_processor(tmp_path):
+    processor = DogWhistleProcessor(cache=ResultCache(disk=DiskCache(str(tmp_path / "cache"))))
+    processor.client = RateLimitedClient(AsyncOpenAI(
+        api_key="fake",
+        base_url="http://fake-openai/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_fake_openai())),
+        max_retries=0,
+    ))
+    return processor
+
+
+def test_find_recordings_walks_directory_and_reads_manifest(tmp_path):
+    make_recording(tmp_path / "calls" / "monday.wav", 1)
+    make_recording(tmp_path / "calls" / "team" / "standup.wav", 2)
+    (tmp_path / "calls" / "notes.txt").write_text("not audio")
+
+    found = find_recordings(str(tmp_path / "calls"))
+    assert [r.meeting_id for r in found] == ["monday", "team__standup"]
+    assert all(os.path.isabs(r.path) for r in found)
+
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# nightly backfill\ncalls/monday.wav\tweekly-sync\ncalls/team/standup.wav\n")
+    found = find_recordings(str(manifest))
+    assert [r.meeting_id for r in found] == ["weekly-sync", "standup"]
+    assert found[0].path == str(tmp_path / "calls" / "monday.wav")
+
+    manifest.write_text("calls/monday.wav\tsame\ncalls/team/standup.wav\tsame\n")
+    with pytest.raises(ValueError):
+        find_recordings(str(manifest))
+
+
+@pytest.mark.asyncio
+async def test_run_batch_writes_reports_and_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for index in range(3):
+        make_recording(tmp_path / "in" / f"meeting{index}.wav", index)
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("in/meeting0.wav\nin/meeting1.wav\nin/missing.wav\n")
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    processor = build_processor(tmp_path)
+
+    summary = await run_batch(find_recordings(str(manifest)), workers=2, concurrency=2,
+                              checkpoint_path=checkpoint, processor=processor)
+    assert summary == {"total": 3, "skipped": 0, "completed": 2, "failed": 1}
+    entries = load_checkpoint(checkpoint)
+    assert entries["missing"]["status"] == "failed"
+    with open("reports/meeting0_full_report.json") as f:
+        report = json.load(f)
+    assert report["meeting_id"] == "meeting0"
+    assert report["analysis"]["meeting_type"] == "planning"
+
+    # An interrupted run leaves a torn last line; it's ignored on resume
+    with open(checkpoint, "a") as f:
+        f.write('{"meeting_id": "meet')
+    summary = await run_batch(find_recordings(str(tmp_path / "in")), workers=2, concurrency=2,
+                              checkpoint_path=checkpoint, processor=processor)
+    assert summary == {"total": 3, "skipped": 2, "completed": 1, "failed": 0}
+    assert os.path.exists("reports/meeting2_full_report.json")
+
+    summary = await run_batch(find_recordings(str(manifest)), checkpoint_path=checkpoint,
+                              retry_failed=True, processor=processor)
+    assert summary == {"total": 3, "skipped": 2, "completed": 0, "failed": 1}
@@ -0,0 +1,168 @@
+"""
+Tests for the rate limiting layer, run against the local fake OpenAI server
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError, InternalServerError
+
+from fake_openai import DEFAULT_ANALYSIS, create_fake_openai
+from openai_limiter import CircuitOpenError, RateLimitedClient, TokenBucket
+
+
+def fake_client(fake, **limits):
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+    openai_client = AsyncOpenAI(api_key="fake", base_url="http://fake-openai/v1",
+                                http_client=http_client, max_retries=0)
+    return RateLimitedClient(openai_client, **limits)
+
+
+async def analyze(client, **kwargs):
+    return await client.chat.completions.create(
+        model="gpt-4o", messages=[{"role": "user", "content": "hi"}], max_tokens=100, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    bucket = TokenBucket(per_minute=600, capacity=1)  # 10 per second
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    assert 0.35 < time.monotonic() - started < 0.8
+
+
+@pytest.mark.asyncio
+async def test_recovers_from_throttling():
+    # The fake allows 10 requests a second; the client believes it has 10x that
+    fake = create_fake_openai(requests_per_minute=600, latency=lambda: 0.02, seed=1)
+    fake_limits = fake.state
+    client = fake_client(fake, chat_rpm=6000)
+
+    responses = await asyncio.gather(*(analyze(client) for _ in range(30)))
+
+    assert all(r.choices[0].message.content for r in responses)
+    chat = client.stats()["chat"]
+    assert chat["succeeded"] == 30 and chat["failed"] == 0
+    assert chat["throttled"] > 0
+    assert chat["concurrency_limit"] < 16
+    assert fake_limits.stats["accepted"] == 30
+
+
+@pytest.mark.asyncio
+async def test_streams_hold_a_slot_until_finished():
+    fake = create_fake_openai()
+    client = fake_client(fake)
+
+    stream = await analyze(client, stream=True)
+    assert client.stats()["chat"]["in_flight"] == 1
+    content = "".join([chunk.choices[0].delta.content or "" async for chunk in stream])
+
+    assert content.startswith('{"summary"') and DEFAULT_ANALYSIS["summary"]["brief"] in content
+    assert client.stats()["chat"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_gives_its_slot_back():
+    fake = create_fake_openai(latency=lambda: 5.0)
+    client = fake_client(fake)
+
+    call = asyncio.create_task(analyze(client))
+    await asyncio.sleep(0.1)
+    assert client.stats()["chat"]["in_flight"] == 1
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert client.stats()["chat"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_repeated_server_errors(monkeypatch):
+    monkeypatch.setattr("openai_limiter.BACKOFF_BASE_SECONDS", 0.001)
+    fake = create_fake_openai(error_rate=1.0)
+    client = fake_client(fake, deadline_seconds=5)
+
+    with pytest.raises((InternalServerError, CircuitOpenError)):
+        await analyze(client)
+    assert client.stats()["chat"]["breaker"] == "open"
+
+    # Fails fast without reaching the server
+    requests_before = fake.state.stats["requests"]
+    with pytest.raises(CircuitOpenError):
+        await analyze(client)
+    assert fake.state.stats["requests"] == requests_before
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_always_settles():
+    outcomes = []
+
+    async def create(**kwargs):
+        outcome = outcomes.pop(0)
+        if outcome == "hang":
+            await asyncio.sleep(10)
+        if outcome == "bad_request":
+            response = httpx.Response(400, request=httpx.Request("POST", "http://fake-openai/v1/chat/completions"))
+            raise BadRequestError("bad request", response=response, body=None)
+        return SimpleNamespace(usage=None)
+
+    client = RateLimitedClient(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    breaker = client.endpoints["chat"].breaker
+
+    def half_open():
+        breaker.opened_at = time.monotonic() - breaker.reset_seconds - 1
+        assert breaker.state == "half_open"
+
+    # A cancelled trial reaches no verdict, but the next call may try again
+    half_open()
+    outcomes[:] = ["hang", "ok"]
+    trial = asyncio.create_task(analyze(client))
+    await asyncio.sleep(0.05)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert breaker.state == "half_open"
+    await analyze(client)
+    assert breaker.state == "closed"
+
+    # A request the API rejects still shows it's reachable
+    half_open()
+    outcomes[:] = ["bad_request", "ok"]
+    with pytest.raises(BadRequestError):
+        await analyze(client)
+    assert breaker.state == "closed"
+    await analyze(client)
+    assert client.stats()["chat"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fake_transcript_can_vary_per_request():
+    counter = iter(range(100))
+    fake = create_fake_openai(transcript=lambda: f"meeting {next(counter)}")
+    client = fake_client(fake)
+
+    texts = [(await client.audio.transcriptions.create(model="whisper-1", file=("a.wav", b"RIFF"))).text
+             for _ in range(2)]
+
+    assert texts == ["meeting 0", "meeting 1"]
+
+
+@pytest.mark.asyncio
+async def test_streams_left_unread_give_their_slot_back():
+    fake = create_fake_openai()
+    client = fake_client(fake)
+
+    stream = await analyze(client, stream=True)
+    assert client.stats()["chat"]["in_flight"] == 1
+    await stream.aclose()
+    await stream.aclose()  # Closing twice gives back one slot
+    assert client.stats()["chat"]["in_flight"] == 0
+    assert [chunk async for chunk in stream] == []
+
+    stream = await analyze(client, stream=True)
+    assert client.stats()["chat"]["in_flight"] == 1
+    del stream  # Dropped without ever being read
+    assert client.stats()["chat"]["in_flight"] == 0
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import openai_pool
+from dogwhistle_ai_processor import DogWhistleProcessor
+
+
+@pytest.fixture
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(openai_pool, "_client", None)
+    monkeypatch.setattr(openai_pool, "_http_client", None)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+
+def test_importing_the_app_is_cheap(tmp_path):
+    env = dict(os.environ, DOGWHISTLE_JOB_DB=str(tmp_path / "jobs.db"),
+               DOGWHISTLE_SEARCH_DB=str(tmp_path / "search.db"),
+               DOGWHISTLE_RELATED_DIR=str(tmp_path / "related"), DOGWHISTLE_CACHE_DIR=str(tmp_path / "cache"))
+    loaded = subprocess.run(
+        [sys.executable, "-c", "import sys, app; print(sorted({'openai', 'httpx', 'aiohttp'} & set(sys.modules)))"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip().splitlines()[-1] == "[]"
+    # Stores are opened by the startup event, not on import
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_processors_share_one_client_built_on_first_use(fresh_pool):
+    first, second = DogWhistleProcessor(), DogWhistleProcessor()
+    assert openai_pool.stats()["built"] is False
+    assert first.client is second.client is openai_pool.shared_client()
+    assert openai_pool.stats()["built"] is True
+
+    stub = object()
+    first.client = stub
+    assert first.client is stub and second.client is not stub
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_failures_instead_of_raising(fresh_pool, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")  # Nothing listens on the discard port
+    try:
+        result = await openai_pool.warm_up(connections=2, timeout=5)
+        assert "error" in result and result["connections"] == 2
+        assert openai_pool.stats()["last_warmup"]["error"] == result["error"]
+    finally:
+        await openai_pool.close()
@@ -0,0 +1,83 @@
+"""
+Tests for incremental parsing of the streamed analysis
+"""
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from dogwhistle_ai_processor import DogWhistleProcessor
+from partial_json import IncrementalJSONParser, apply_partial
+
+ANALYSIS = {
+    "summary": {"brief": "Planned the \"v2\" launch, {roughly}.", "detailed": "Line one\nline two \\ done"},
+    "action_items": [
+        {"task": "Ship it", "owner": "Sam", "due_date": None, "priority": "high"},
+        {"task": "Write notes", "owner": "", "due_date": "Friday", "priority": "low"},
+    ],
+    "follow_up_questions": ["Who owns QA?", "When is the retro?"],
+    "key_insights": [],
+    "topics_discussed": ["launch"],
+    "sentiment": "positive",
+    "meeting_type": "planning",
+    "attendees": 4,
+}
+
+
+def chunks(text, seed):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        yield text[i:i + size]
+        i += size
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_reports_fields_as_they_complete(indent):
+    text = json.dumps(ANALYSIS, indent=indent)
+    for seed in range(20):
+        parser = IncrementalJSONParser()
+        partial = {}
+        paths = []
+        for chunk in chunks(text, seed):
+            for path, value in parser.feed(chunk):
+                paths.append(path)
+                apply_partial(partial, path, value)
+
+        assert parser.result() == ANALYSIS
+        assert partial == ANALYSIS
+        # The brief summary is available before any other field
+        assert paths[0] == ("summary", "brief")
+        assert paths.index(("action_items", 0)) < paths.index(("action_items",))
+
+
+@pytest.mark.asyncio
+async def test_streaming_matches_non_streaming(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    content = json.dumps(ANALYSIS)
+
+    async def token_stream():
+        for chunk in chunks(content, seed=1):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+    async def create(stream=False, **kwargs):
+        if stream:
+            return token_stream()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    processor = DogWhistleProcessor(cache=SimpleNamespace())
+    processor.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    updates = []
+
+    async def on_progress(stage, progress, **details):
+        updates.append((progress, details["partial_analysis"]))
+
+    streamed = await processor.analyze_transcript_streaming("transcript", on_progress)
+    buffered = await processor.analyze_transcript("transcript")
+
+    assert json.dumps(streamed) == json.dumps(buffered)
+    assert updates[0][1] == {"summary": {"brief": ANALYSIS["summary"]["brief"]}}
+    assert [progress for progress, _ in updates] == sorted(progress for progress, _ in updates)
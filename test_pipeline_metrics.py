@@ -0,0 +1,52 @@
+"""
+Tests for pipeline stage timing and the Prometheus exposition
+"""
+import asyncio
+
+import pytest
+
+from pipeline_metrics import Histogram, MeetingTrace, record, render_metrics, span, traced
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test durations", buckets=(0.1, 1), labels=("stage",))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, stage="whisper")
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="whisper",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="whisper",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="whisper",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="whisper"} 3' in lines
+    assert 'test_seconds_sum{stage="whisper"} 5.55' in lines
+
+
+@pytest.mark.asyncio
+async def test_spans_and_counts_reach_the_current_meeting():
+    trace = MeetingTrace("m1")
+
+    async def window():
+        # Runs in its own task, like concurrent Whisper windows
+        record(whisper_bytes=100, openai_retries=1)
+
+    with traced(trace):
+        with span("transcribing"):
+            await asyncio.gather(window(), window())
+            await asyncio.sleep(0.01)
+
+    breakdown = trace.breakdown()
+    assert breakdown["stages"]["transcribing"] >= 0.01
+    assert breakdown["whisper_bytes"] == 200
+    assert breakdown["openai_retries"] == 2
+
+    # Outside the meeting nothing is attributed to it
+    record(whisper_bytes=1)
+    assert trace.breakdown()["whisper_bytes"] == 200
+
+
+def test_metrics_include_gauges():
+    text = render_metrics({"dogwhistle_queue_depth": 3})
+
+    assert "# TYPE dogwhistle_stage_seconds histogram" in text
+    assert "dogwhistle_queue_depth 3" in text
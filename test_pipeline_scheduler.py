@@ -0,0 +1,148 @@
+"""
+Tests for the bounded processing scheduler
+"""
+import asyncio
+
+import pytest
+
+from pipeline_scheduler import PipelineScheduler, QueueFull
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrency_and_rejects_overflow():
+    scheduler = PipelineScheduler(pipeline_slots=2, queue_size=3)
+    await scheduler.start()
+    running = []
+    peak = []
+
+    async def job(queue_wait_seconds=None):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+
+    for i in range(3):
+        scheduler.submit(f"job-{i}", job)
+    with pytest.raises(QueueFull) as exc:
+        scheduler.submit("job-overflow", job)
+    assert exc.value.retry_after >= 1
+
+    while scheduler.completed < 3:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert max(peak) == 2
+    assert scheduler.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reports_queue_position():
+    scheduler = PipelineScheduler(pipeline_slots=1, queue_size=5)
+    await scheduler.start()
+    release = asyncio.Event()
+
+    async def job(queue_wait_seconds=None):
+        await release.wait()
+
+    for i in range(3):
+        scheduler.submit(f"job-{i}", job)
+    await asyncio.sleep(0.01)
+
+    # job-0 is running, the rest are waiting in order
+    assert scheduler.queue_info("job-0") is None
+    assert scheduler.queue_info("job-2")["queue_position"] == 2
+    assert scheduler.queue_info("job-2")["queue_depth"] == 2
+
+    release.set()
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_batch_lane_yields_to_interactive_jobs():
+    scheduler = PipelineScheduler(pipeline_slots=2, queue_size=5, batch_slots=1, batch_queue_size=10)
+    await scheduler.start()
+    started = []
+    release = asyncio.Event()
+
+    async def job(name, queue_wait_seconds=None):
+        started.append(name)
+        await release.wait()
+
+    for i in range(3):
+        scheduler.submit_batch("batch-a", f"a-{i}", job, f"a-{i}")
+    await asyncio.sleep(0.01)
+    scheduler.submit("upload", job, "upload")
+    await asyncio.sleep(0.01)
+
+    # One batch slot, so the second worker stayed free for the upload
+    assert started == ["a-0", "upload"]
+    assert scheduler.stats()["batch_running"] == 1
+    assert scheduler.batch_info("a-2")["queue_depth"] == 2
+
+    release.set()
+    while scheduler.completed < 4:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_batches_take_turns():
+    scheduler = PipelineScheduler(pipeline_slots=1, queue_size=5, batch_slots=1, batch_queue_size=10)
+    await scheduler.start()
+    started = []
+
+    async def job(name, queue_wait_seconds=None):
+        started.append(name)
+        await asyncio.sleep(0)
+
+    for i in range(3):
+        scheduler.submit_batch("batch-a", f"a-{i}", job, f"a-{i}")
+    for i in range(2):
+        scheduler.submit_batch("batch-b", f"b-{i}", job, f"b-{i}")
+    with pytest.raises(QueueFull):
+        scheduler.ensure_batch_capacity(6)
+
+    while scheduler.completed < 5:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert started == ["a-0", "b-0", "a-1", "b-1", "a-2"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_batch_drops_waiting_jobs():
+    scheduler = PipelineScheduler(pipeline_slots=1, queue_size=5, batch_slots=1, batch_queue_size=10)
+    await scheduler.start()
+    release = asyncio.Event()
+
+    async def job(queue_wait_seconds=None):
+        await release.wait()
+
+    for i in range(3):
+        scheduler.submit_batch("batch-a", f"a-{i}", job)
+    await asyncio.sleep(0.01)
+
+    assert scheduler.cancel_batch("batch-a") == ["a-1", "a-2"]
+    assert scheduler.batch_depth == 0
+
+    release.set()
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_wakeups_are_held_until_they_finish():
+    scheduler = PipelineScheduler(pipeline_slots=1, queue_size=5)
+    await scheduler.start()
+    done = []
+
+    async def job(queue_wait_seconds=None):
+        done.append(1)
+
+    for i in range(3):
+        scheduler.submit(f"job-{i}", job)
+    assert len(scheduler._wakeups) == 3
+
+    while scheduler.completed < 3:
+        await asyncio.sleep(0.01)
+    assert scheduler._wakeups == set()
+    await scheduler.stop()
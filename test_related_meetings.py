@@ -0,0 +1,73 @@
+"""
+Tests for the related-meetings similarity index
+"""
+import numpy as np
+import pytest
+
+import related_meetings
+from related_meetings import RelatedMeetingsIndex, hashed_vector, meeting_features
+
+
+def meeting(transcript, topics=(), meeting_type="planning"):
+    return {
+        "processed_at": "2026-10-01T10:00:00",
+        "transcript": {"full_text": transcript},
+        "analysis": {
+            "summary": {"brief": transcript[:30], "detailed": ""},
+            "topics_discussed": list(topics),
+            "key_insights": [],
+            "meeting_type": meeting_type,
+        },
+    }
+
+
+MEETINGS = {
+    "db1": meeting("We planned the postgres database migration and the replica failover.", ["Database migration"]),
+    "db2": meeting("Status of the postgres migration: replica lag and failover testing.", ["database migration"]),
+    "hiring": meeting("Interview loop for the designer candidates and the recruiter budget.", ["Hiring"]),
+    "offsite": meeting("Booking the venue, catering and flights for the offsite.", ["Offsite"], "social"),
+}
+
+
+def test_vectors_are_stable_and_normalized():
+    features = meeting_features(MEETINGS["db1"])
+    vector = hashed_vector(features, 256)
+
+    assert features["topic:database migration"] == related_meetings.ANALYSIS_WEIGHT
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    assert np.array_equal(vector, hashed_vector(meeting_features(MEETINGS["db1"]), 256))
+
+
+@pytest.mark.asyncio
+async def test_finds_similar_meetings_first(tmp_path):
+    index = RelatedMeetingsIndex(str(tmp_path), dimensions=256)
+    for meeting_id, results in MEETINGS.items():
+        await index.add(meeting_id, results)
+
+    related = await index.related("db1", limit=2)
+
+    assert related[0]["meeting_id"] == "db2"
+    assert related[0]["shared_topics"] == ["database migration"]
+    assert 0 < related[0]["score"] <= 1
+    assert all(hit["meeting_id"] != "db1" for hit in related)
+    assert await index.related("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_rows_grow_are_reused_and_shared_between_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(related_meetings, "GROW_ROWS", 2)
+    writer = RelatedMeetingsIndex(str(tmp_path), dimensions=256)
+    reader = RelatedMeetingsIndex(str(tmp_path), dimensions=256)  # Another worker process
+    for meeting_id, results in MEETINGS.items():
+        await writer.add(meeting_id, results)
+    assert writer.stats() == {"meetings": 4, "rows": 4, "dimensions": 256}
+
+    assert (await reader.related("db2", limit=1))[0]["meeting_id"] == "db1"
+
+    assert await writer.remove("db1")
+    assert "db1" not in [hit["meeting_id"] for hit in await reader.related("db2")]
+    await writer.add("db3", meeting("Postgres replica failover drill after the migration.", ["Database migration"]))
+    assert writer.stats()["rows"] == 4  # Took db1's freed row
+    assert (await reader.related("db2", limit=1))[0]["meeting_id"] == "db3"
+    # Document frequencies still count exactly the stored vectors
+    assert np.array_equal(np.asarray(writer._df), (np.asarray(writer._vectors) != 0).sum(axis=0))
@@ -0,0 +1,126 @@
+"""
+Tests for on-demand report rendering
+"""
+import asyncio
+import builtins
+import threading
+
+import pytest
+
+from dogwhistle_ai_processor import DogWhistleProcessor, report_path
+from report_renderers import RENDERERS, RenderCache, register_renderer
+
+
+def make_results(meeting_id="m1", text="hello world"):
+    return {
+        "meeting_id": meeting_id,
+        "processed_at": "2025-07-26T13:31:05.123456",
+        "transcript": {"full_text": text, "word_count": 2, "duration_estimate": "0 minutes"},
+        "analysis": {
+            "summary": {"brief": "Short sync.", "detailed": "Talked."},
+            "action_items": [{"task": "Send notes", "owner": "Sam", "priority": "high"}],
+            "follow_up_questions": ["When next?"],
+        },
+    }
+
+
+def test_renderers_use_processing_time():
+    results = make_results()
+    combined = RENDERERS["combined"].render(results)
+
+    assert "Generated: 2025-07-26 13:31:05" in combined
+    assert "1. Send notes" in combined
+    assert combined.rstrip().endswith("hello world")
+    assert RENDERERS["json"].media_type == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_cache_memoizes_and_evicts_by_size():
+    cache = RenderCache(max_bytes=300)
+    first = make_results("m1", "a" * 100)
+    second = make_results("m2", "b" * 100)
+
+    assert await cache.render(first, "transcript") == await cache.render(first, "transcript")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    await cache.render(second, "transcript")
+    assert cache.total_bytes <= 300
+    assert cache.stats()["entries"] == 1
+
+    cache.invalidate("m2")
+    assert cache.stats() == {"entries": 0, "bytes": 0, "max_bytes": 300, "hits": 1, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_by_bytes():
+    transcript_bytes = len(RENDERERS["transcript"].render(make_results("m1", "é" * 100)).encode("utf-8"))
+    cache = RenderCache(max_bytes=transcript_bytes * 2)
+    first, second, third = (make_results(m, "é" * 100) for m in ("m1", "m2", "m3"))
+
+    await cache.render(first, "transcript")
+    await cache.render(second, "transcript")
+    # Sized in UTF-8 bytes, not characters
+    assert cache.total_bytes == transcript_bytes * 2
+    await cache.render(first, "transcript")  # m1 is now the most recent
+
+    await cache.render(third, "transcript")
+    assert cache.stats()["entries"] == 2 and cache.total_bytes == transcript_bytes * 2
+    misses = cache.misses
+    await cache.render(first, "transcript")
+    await cache.render(third, "transcript")
+    assert cache.misses == misses
+    await cache.render(second, "transcript")  # Was evicted
+    assert cache.misses == misses + 1
+
+    # A render bigger than the whole cache is returned but not kept
+    huge = make_results("m4", "x" * transcript_bytes * 2)
+    assert (await cache.render(huge, "transcript")).endswith("x\n")
+    assert all(key[0] != "m4" for key in cache._entries)
+    assert cache.total_bytes <= cache.max_bytes
+
+
+@pytest.mark.asyncio
+async def test_reports_are_rendered_on_first_use_only(monkeypatch):
+    calls = []
+    monkeypatch.setitem(RENDERERS, "probe", None)
+
+    @register_renderer("probe")
+    def render_probe(results):
+        calls.append(results["meeting_id"])
+        return "probe"
+
+    cache = RenderCache()
+    results = make_results()
+    assert calls == []  # Registering renders nothing
+    await cache.text_outputs(results)
+    assert calls == []  # Only the formats asked for are rendered
+
+    assert await cache.render(results, "probe") == await cache.render(results, "probe") == "probe"
+    assert calls == ["m1"]
+
+
+@pytest.mark.asyncio
+async def test_format_results_writes_the_report_off_the_loop_without_rereading(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    loop_thread = threading.get_ident()
+    offloaded, opened = [], []
+    to_thread, real_open = asyncio.to_thread, builtins.open
+
+    def recording_to_thread(func, *args, **kwargs):
+        offloaded.append(func.__name__)
+        return to_thread(func, *args, **kwargs)
+
+    def recording_open(file, mode="r", *args, **kwargs):
+        opened.append((str(file), mode, threading.get_ident() == loop_thread))
+        return real_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(asyncio, "to_thread", recording_to_thread)
+    monkeypatch.setattr(builtins, "open", recording_open)
+    analysis = make_results()["analysis"]
+    results = await DogWhistleProcessor(client=object()).format_results("hello world", analysis, "m1")
+
+    assert "write_text_files" in offloaded
+    path = report_path("m1")
+    assert [(mode, on_loop) for file, mode, on_loop in opened if file == path] == [("w", False)]
+    with real_open(path) as f:
+        assert f.read() == RENDERERS["json"].render(results)
@@ -0,0 +1,82 @@
+"""
+Tests for /results projection, compression and ETags
+"""
+import gzip
+import json
+
+import pytest
+
+from response_encoding import (COMPRESS_MIN_BYTES, ResponseCache, etag_matches, negotiate_encoding, parse_fields,
+                               project)
+
+RESULTS = {
+    "meeting_id": "m1",
+    "transcript": {"full_text": "hello world " * 500, "word_count": 1000},
+    "analysis": {"summary": {"brief": "Short sync.", "detailed": "Talked."}, "sentiment": "positive"},
+}
+
+
+def test_projection_keeps_nesting_and_skips_missing_paths():
+    paths = parse_fields("analysis.summary.brief, transcript.word_count,nope.x")
+
+    assert project(RESULTS, paths) == {"analysis": {"summary": {"brief": "Short sync."}},
+                                       "transcript": {"word_count": 1000}}
+    assert project(RESULTS, None) is RESULTS
+    with pytest.raises(ValueError):
+        parse_fields(" , ")
+    with pytest.raises(ValueError):
+        parse_fields("analysis..summary")
+
+
+def test_negotiates_supported_encodings():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+
+
+def test_etags_match_only_the_same_content_coding():
+    assert etag_matches('"abc-gzip"', '"abc-gzip"')
+    assert etag_matches('W/"abc-br", "other"', '"abc-br"')
+    assert etag_matches('W/"abc"', '"abc"')
+    # A cached gzip body must not be revalidated against an identity response
+    assert not etag_matches('"abc-gzip"', '"abc"')
+    assert not etag_matches('"abc"', '"abc-br"')
+    assert not etag_matches('"abc-gzip"', '"abc-br"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_cache_serializes_and_compresses_once():
+    cache = ResponseCache()
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return RESULTS
+
+    plain = await cache.get("m1", "v1", None, None, build)
+    zipped = await cache.get("m1", "v1", None, "gzip", build)
+    again = await cache.get("m1", "v1", None, "gzip", build)
+
+    assert len(builds) == 1
+    assert json.loads(gzip.decompress(zipped.body)) == json.loads(plain.body) == RESULTS
+    assert again is zipped and zipped.encoding == "gzip"
+    assert zipped.etag == plain.etag[:-1] + '-gzip"'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    paths = ("analysis.sentiment",)
+
+    async def build_small():
+        builds.append(1)
+        return project(RESULTS, paths)
+
+    small = await cache.get("m1", "v1", paths, "gzip", build_small)
+    assert small.encoding is None and len(small.body) < COMPRESS_MIN_BYTES
+
+    cache.invalidate("m1")
+    await cache.get("m1", "v1", None, None, build)
+    assert len(builds) == 3
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,60 @@
+"""
+Tests for the content-addressed result cache
+"""
+import pytest
+
+from result_cache import DiskCache, LRUCache, ResultCache, analysis_key
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_disk_cache_stays_under_size_cap(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=2500)
+    for i in range(10):
+        disk.set("transcript", f"{i:064x}", {"text": "x" * 1000})
+
+    assert disk.total_bytes <= 2500
+    assert disk.get("transcript", f"{9:064x}") == {"text": "x" * 1000}
+    assert disk.get("transcript", f"{0:064x}") is None
+
+
+@pytest.mark.asyncio
+async def test_hits_survive_a_cold_memory_layer(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    await ResultCache(disk=disk).set_transcript("abc123", "hello there", [])
+
+    # A fresh process only has the disk layer
+    cache = ResultCache(disk=disk)
+    assert (await cache.get_transcript("abc123"))["text"] == "hello there"
+    assert (await cache.get_transcript("abc123"))["text"] == "hello there"
+    assert await cache.get_analysis("hello there", "v1") is None
+
+    stats = cache.stats()
+    assert stats["transcript"]["disk_hits"] == 1
+    assert stats["transcript"]["memory_hits"] == 1
+    assert stats["analysis"]["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_clears_memory_and_disk(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    cache = ResultCache(disk=disk)
+    await cache.set_transcript("abc123", "hello there", [])
+    await cache.set_analysis("hello there", "v1", {"summary": "hi"})
+
+    await cache.delete("abc123")
+    await cache.delete(analysis_key("hello there", "v1"))
+
+    assert await cache.get_transcript("abc123") is None
+    assert await cache.get_analysis("hello there", "v1") is None
+    assert disk.total_bytes == 0
@@ -0,0 +1,114 @@
+"""
+Tests for resumable uploads and pipelined transcription
+"""
+import hashlib
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from audio_io import read_wav
+from resumable_upload import IncrementalTranscriber, ResumableUpload, append_chunk, wav_layout
+from upload_streaming import UploadRejected
+
+
+def wav_bytes(samples: np.ndarray, sample_rate: int = 16000, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def speech_with_pauses(seconds: float, sample_rate: int = 16000) -> np.ndarray:
+    """Tone bursts with a quiet second every five seconds"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = (t % 5) < 4
+    return (np.sin(2 * np.pi * 220 * t) * 8000 * voiced).astype(np.int16)
+
+
+async def pieces(data: bytes, size: int, fail_after: int = None):
+    for i, start in enumerate(range(0, len(data), size)):
+        if fail_after is not None and i == fail_after:
+            raise ConnectionError("connection dropped")
+        yield data[start:start + size]
+
+
+def test_wav_layout_finds_data_after_other_chunks():
+    audio = wav_bytes(np.zeros(100, dtype=np.int16), sample_rate=44100, channels=2)
+    # Insert a LIST chunk between fmt and data, as many recorders do
+    fmt_end = 12 + 8 + 16
+    with_list = audio[:fmt_end] + b"LIST" + struct.pack("<I", 5) + b"INFOx\x00" + audio[fmt_end:]
+
+    layout = wav_layout(with_list)
+
+    assert (layout.sample_rate, layout.channels, layout.data_bytes) == (44100, 2, 200)
+    assert with_list[layout.data_offset - 8:layout.data_offset - 4] == b"data"
+    assert wav_layout(with_list[:fmt_end]) is None  # Data chunk hasn't arrived yet
+
+
+@pytest.mark.asyncio
+async def test_resumes_after_dropped_chunk(tmp_path):
+    data = wav_bytes(speech_with_pauses(2))
+    upload = ResumableUpload("m", str(tmp_path / "m.wav"), "m.wav", length=len(data))
+
+    with pytest.raises(ConnectionError):
+        await append_chunk(upload, pieces(data, 4096, fail_after=3), 0)
+    assert upload.offset == 3 * 4096  # Everything before the drop was kept
+
+    with pytest.raises(UploadRejected) as exc:
+        await append_chunk(upload, pieces(data[:10], 10), 0)
+    assert exc.value.status_code == 409
+
+    await append_chunk(upload, pieces(data[upload.offset:], 4096), upload.offset)
+
+    assert upload.complete
+    assert (tmp_path / "m.wav").read_bytes() == data
+    assert upload.digest.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_rejects_bytes_past_declared_length(tmp_path):
+    data = wav_bytes(speech_with_pauses(1))
+    upload = ResumableUpload("m", str(tmp_path / "m.wav"), "m.wav", length=len(data) - 1)
+
+    with pytest.raises(UploadRejected) as exc:
+        await append_chunk(upload, pieces(data, 4096), 0)
+
+    assert exc.value.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_transcribes_windows_while_uploading(tmp_path):
+    data = wav_bytes(speech_with_pauses(50))
+    transcribed = []
+
+    async def transcribe(path):
+        samples, rate, _ = read_wav(path)
+        duration = len(samples) / rate
+        transcribed.append(duration)
+        # One segment per second of window audio
+        return {"text": "", "segments": [{"start": s, "end": s + 1, "text": "w"} for s in range(int(duration))]}
+
+    upload = ResumableUpload("m", str(tmp_path / "m.wav"), "m.wav", length=len(data))
+    await append_chunk(upload, pieces(data, 64 * 1024), 0)
+    transcriber = IncrementalTranscriber(upload.path, wav_layout(upload.header), transcribe, window_seconds=20)
+    for received in range(0, len(data) // 2, 64 * 1024):
+        await transcriber.on_upload_progress(received)
+
+    assert transcriber.windows_started == 1  # Started before the second half arrived
+    await transcriber.on_upload_progress(len(data))
+    text, segments = await transcriber.finish()
+
+    assert len(transcribed) == transcriber.windows_started > 2
+    # Windows are cut in the pauses
+    assert all(window.keep_until % 5 >= 3.9 for window in transcriber.windows[:-1])
+    starts = [segment["start"] for segment in segments]
+    assert starts == sorted(starts)
+    # Overlaps are kept once; the whole recording is covered
+    assert len(segments) == pytest.approx(50, abs=len(transcribed))
+    assert segments[-1]["end"] == pytest.approx(50, abs=1.5)
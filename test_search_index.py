@@ -0,0 +1,79 @@
+"""
+Tests for the meeting search index
+"""
+import pytest
+
+from search_index import SearchIndex, match_expression
+
+
+def meeting(transcript, brief, action_items, meeting_type="planning", topics=()):
+    return {
+        "processed_at": "2026-10-01T10:00:00",
+        "transcript": {"full_text": transcript},
+        "analysis": {
+            "summary": {"brief": brief, "detailed": ""},
+            "action_items": action_items,
+            "topics_discussed": list(topics),
+            "meeting_type": meeting_type,
+        },
+    }
+
+
+async def build_index(tmp_path) -> SearchIndex:
+    index = SearchIndex(str(tmp_path / "search.db"))
+    await index.add("m1", meeting(
+        "We should move the billing database next quarter.", "Roadmap review.",
+        [{"task": "Plan the database migration", "owner": "Dana", "due_date": "Friday", "priority": "high"},
+         {"task": "Book the offsite", "owner": "Lee", "due_date": "Monday", "priority": "low"}],
+        topics=["roadmap"]))
+    await index.add("m2", meeting(
+        "Dana mentioned the migration briefly.", "Standup.",
+        [{"task": "Fix login bug", "owner": "Sam", "due_date": "Friday", "priority": "medium"}],
+        meeting_type="standup"))
+    await index.add("m3", meeting("Budget talk only.", "Budget.", ["Send the budget"]))
+    return index
+
+
+def test_match_expression_quotes_user_input():
+    assert match_expression('migration "billing database" data*') == '"migration" "billing database" "data"*'
+    assert match_expression('NEAR(a b) OR "x') == '"NEAR(a" "b)" "OR" """x"'
+    assert match_expression("  - ") is None
+
+
+@pytest.mark.asyncio
+async def test_ranks_action_items_above_transcript_mentions(tmp_path):
+    index = await build_index(tmp_path)
+    found = await index.search("migration")
+
+    assert [hit["meeting_id"] for hit in found["results"]] == ["m1", "m2"]
+    assert "<mark>migration</mark>" in found["results"][0]["snippet"]
+    assert found["results"][0]["summary"] == "Roadmap review."
+
+
+@pytest.mark.asyncio
+async def test_filters_by_owner_field_and_meeting_type(tmp_path):
+    index = await build_index(tmp_path)
+    found = await index.search("migration", owner="dana")
+    assert [hit["meeting_id"] for hit in found["results"]] == ["m1"]
+    assert found["results"][0]["action_items"] == [
+        {"task": "Plan the database migration", "owner": "Dana", "due_date": "Friday", "priority": "high"}]
+
+    assert [hit["meeting_id"] for hit in (await index.search("dana", fields=["transcript"]))["results"]] == ["m2"]
+    assert [hit["meeting_id"] for hit in (await index.search(due_date="friday", meeting_type="standup"))["results"]] == ["m2"]
+
+    with pytest.raises(ValueError):
+        await index.search("x", fields=["nope"])
+
+
+@pytest.mark.asyncio
+async def test_reindex_and_remove(tmp_path):
+    index = await build_index(tmp_path)
+    await index.add("m3", meeting("Now about the migration.", "Redo.", []))
+    assert {hit["meeting_id"] for hit in (await index.search("migration"))["results"]} == {"m1", "m2", "m3"}
+    assert (await index.search("budget"))["results"] == []
+
+    assert await index.remove("m1")
+    assert not await index.remove("m1")
+    assert {hit["meeting_id"] for hit in (await index.search("migration"))["results"]} == {"m2", "m3"}
+    assert (await index.search(owner="lee"))["results"] == []
+    assert index.stats() == {"meetings": 2}
@@ -0,0 +1,64 @@
+"""
+Tests for server-side detection of device pairing tones
+"""
+import numpy as np
+
+from audio_io import write_wav
+from ultrasonic_detector import detect_devices, device_code, scan_recording
+
+RATE = 48000
+
+
+def device_tone(code, lfo_hz, amplitude, start, end, seconds):
+    """The tone ultrasonic-demo.html plays: 17000 + code Hz with +/-50 Hz LFO wobble"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    frequency = 17000 + code + 50 * np.sin(2 * np.pi * lfo_hz * t)
+    tone = amplitude * np.sin(2 * np.pi * np.cumsum(frequency) / RATE)
+    tone[(t < start) | (t >= end)] = 0
+    return tone
+
+
+def room(seconds, rng):
+    """Background hiss plus a loud voice-band signal"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    return 30 * rng.standard_normal(len(t)) + 3000 * np.sin(2 * np.pi * 300 * t) * (np.sin(2 * np.pi * 3 * t) > 0)
+
+
+def test_finds_devices_and_when_they_were_present():
+    rng = np.random.default_rng(0)
+    audio = room(60, rng) + device_tone(0x1F4, 25, 150, 5, 40, 60) + device_tone(0x3A, 12, 60, 20, 60, 60)
+
+    devices = detect_devices(np.clip(audio, -32768, 32767).astype(np.int16), RATE)
+
+    assert [d.device_code for d in devices] == ["1F4", "3A"]
+    assert devices[0].intervals == [{"start": 5.0, "end": 40.0}]
+    assert devices[1].intervals == [{"start": 20.0, "end": 60.0}]
+
+
+def test_ignores_rooms_without_devices():
+    rng = np.random.default_rng(1)
+    audio = np.clip(room(20, rng), -32768, 32767).astype(np.int16)
+    assert detect_devices(audio, RATE) == []
+    # 16 kHz audio can't contain the band at all
+    assert detect_devices(audio[::3], 16000) == []
+
+
+def test_scans_uploaded_wav(tmp_path):
+    audio = device_tone(0x2BC, 40, 200, 1, 4, 5).astype(np.int16)
+    path = write_wav(str(tmp_path / "meeting.wav"), audio, RATE)
+
+    [device] = scan_recording(path)
+
+    assert device["device_code"] == "2BC" == device_code(17700)
+    assert (device["first_seen"], device["last_seen"]) == (1.0, 4.0)
+
+
+def test_scan_decodes_in_pieces_without_changing_the_result(tmp_path):
+    rng = np.random.default_rng(2)
+    # Longer than one decoded piece (BATCH_BLOCKS of 100 ms), with a tone across the seam
+    audio = np.clip(room(75, rng) + device_tone(0x1F4, 25, 150, 50, 70, 75), -32768, 32767).astype(np.int16)
+    path = write_wav(str(tmp_path / "meeting.wav"), audio, RATE)
+
+    assert scan_recording(path) == [device.to_dict() for device in detect_devices(audio, RATE)]
+    [device] = scan_recording(path)
+    assert device["intervals"] == [{"start": 50.0, "end": 70.0}]
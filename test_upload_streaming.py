@@ -0,0 +1,79 @@
+"""
+Tests for streaming audio uploads
+"""
+import os
+
+import pytest
+from starlette.requests import Request
+
+from upload_streaming import UploadRejected, sniff_audio_format, stream_upload_to_disk
+
+BOUNDARY = "testboundary"
+
+
+def multipart_request(filename: str, audio: bytes, piece: int = 1024) -> Request:
+    body = (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="audio_file"; filename="{filename}"\r\n\r\n'
+    ).encode() + audio + f"\r\n--{BOUNDARY}--\r\n".encode()
+    pieces = [body[i:i + piece] for i in range(0, len(body), piece)]
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+
+    async def receive():
+        chunk = pieces.pop(0) if pieces else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(pieces)}
+
+    return Request(scope, receive)
+
+
+def test_sniff_audio_format():
+    assert sniff_audio_format(b"RIFF\x00\x00\x00\x00WAVEfmt ") == "wav"
+    assert sniff_audio_format(b"\x00\x00\x00\x20ftypM4A ") == "m4a"
+    assert sniff_audio_format(b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81") == "webm"
+    assert sniff_audio_format(b"OggS\x00\x02") == "ogg"
+    assert sniff_audio_format(b"ID3\x04\x00") == "mp3"
+    assert sniff_audio_format(b"<html><body>") is None
+
+
+@pytest.mark.asyncio
+async def test_streams_audio_to_disk(tmp_path):
+    audio = b"RIFF\x00\x00\x00\x00WAVEfmt " + os.urandom(50_000)
+    dest = tmp_path / "meeting.wav"
+
+    upload = await stream_upload_to_disk(
+        multipart_request("meeting.wav", audio), spool_path_for=lambda name: str(dest), chunk_size=4096
+    )
+
+    assert upload.size == len(audio)
+    assert upload.audio_format == "wav"
+    assert dest.read_bytes() == audio
+
+
+@pytest.mark.asyncio
+async def test_rejects_oversized_upload_early(tmp_path):
+    audio = b"RIFF\x00\x00\x00\x00WAVEfmt " + b"\x00" * 100_000
+    dest = tmp_path / "meeting.wav"
+    request = multipart_request("meeting.wav", audio)
+
+    with pytest.raises(UploadRejected) as exc:
+        await stream_upload_to_disk(request, spool_path_for=lambda name: str(dest), max_bytes=10_000, chunk_size=4096)
+
+    assert exc.value.status_code == 413
+    assert not dest.exists()
+
+
+@pytest.mark.asyncio
+async def test_rejects_content_that_is_not_audio(tmp_path):
+    dest = tmp_path / "meeting.m4a"
+
+    with pytest.raises(UploadRejected) as exc:
+        await stream_upload_to_disk(
+            multipart_request("meeting.m4a", b"<html>not really audio</html>"), spool_path_for=lambda name: str(dest)
+        )
+
+    assert exc.value.status_code == 400
+    assert not dest.exists()
@@ -0,0 +1,111 @@
+"""
+Tests for voice activity detection and silence trimming
+"""
+import tracemalloc
+import wave
+
+import numpy as np
+
+from vad import detect_speech, trim_audio_file, trim_silence
+from audio_io import load_pcm, read_wav, write_wav
+
+RATE = 16000
+
+
+def speech(seconds, rng):
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t) + 0.5, 0, None)
+    voice = np.convolve(rng.standard_normal(len(t)), np.ones(6) / 6, mode="same")
+    return (5000 * envelope * voice).astype(np.int16)
+
+
+def silence(seconds, rng):
+    return (20 * rng.standard_normal(int(seconds * RATE))).astype(np.int16)
+
+
+def meeting(rng):
+    # 30s dead air, speech with a short pause, a long pause, more speech, 40s dead air
+    return np.concatenate([
+        silence(30, rng), speech(10, rng), silence(0.8, rng), speech(5, rng),
+        silence(20, rng), speech(7, rng), silence(40, rng),
+    ])
+
+
+def test_trims_dead_air_and_keeps_short_pauses():
+    rng = np.random.default_rng(0)
+    trimmed, offsets = trim_silence(meeting(rng), RATE)
+
+    assert len(offsets.lengths) == 2  # The 0.8s pause is not a cut
+    assert 22 < len(trimmed) / RATE < 25
+    assert abs(offsets.original_starts[0] - 30) < 0.5
+    assert abs(offsets.original_starts[1] - 65.8) < 0.5
+    assert offsets.original_seconds == 112.8
+
+
+def test_offset_map_restores_meeting_time():
+    rng = np.random.default_rng(1)
+    _, offsets = trim_silence(meeting(rng), RATE)
+    second_span = offsets.output_starts[1]
+
+    segments = offsets.map_segments([
+        {"start": 1.0, "end": 3.5, "text": "first"},
+        {"start": second_span + 2.0, "end": second_span + 4.0, "text": "second"},
+    ])
+
+    assert segments[0]["start"] == round(offsets.original_starts[0] + 1.0, 2)
+    assert segments[1]["start"] == round(offsets.original_starts[1] + 2.0, 2)
+    assert segments[1]["text"] == "second"
+
+
+def test_silence_only_has_no_speech(tmp_path):
+    rng = np.random.default_rng(2)
+    quiet = silence(10, rng)
+    assert not detect_speech(quiet, RATE).any()
+    assert trim_audio_file(write_wav(str(tmp_path / "quiet.wav"), quiet), str(tmp_path)) is None
+
+
+def test_trim_audio_file_writes_voiced_wav(tmp_path):
+    rng = np.random.default_rng(3)
+    source = write_wav(str(tmp_path / "meeting.wav"), meeting(rng))
+
+    trimmed = trim_audio_file(source, str(tmp_path))
+
+    samples, rate, channels = read_wav(trimmed.path)
+    assert (rate, channels) == (RATE, 1)
+    assert len(samples) / RATE == trimmed.offsets.kept_seconds
+
+
+def test_trim_audio_file_matches_in_memory_trim(tmp_path):
+    # 44.1 kHz stereo, so resampling runs across block boundaries too
+    samples = meeting(np.random.default_rng(4))
+    positions = np.arange(len(samples) * 44100 // RATE) * RATE / 44100
+    mono = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+    source = str(tmp_path / "stereo.wav")
+    with wave.open(source, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(44100)
+        wav.writeframes(np.repeat(mono, 2).astype("<i2").tobytes())
+
+    trimmed = trim_audio_file(source, str(tmp_path))
+    expected, offsets = trim_silence(load_pcm(source, RATE), RATE)
+
+    assert np.array_equal(read_wav(trimmed.path)[0], expected)
+    assert np.array_equal(trimmed.offsets.original_starts, offsets.original_starts)
+
+
+def test_trimming_memory_does_not_grow_with_length(tmp_path):
+    rng = np.random.default_rng(5)
+    samples = np.concatenate([meeting(rng) for _ in range(11)])  # About 20 minutes
+    source = write_wav(str(tmp_path / "long.wav"), samples)
+    decoded_bytes = samples.nbytes
+    del samples
+
+    tracemalloc.start()
+    try:
+        assert trim_audio_file(source, str(tmp_path)) is not None
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Decoding the whole recording would take more than this on its own
+    assert peak < decoded_bytes
@@ -0,0 +1,181 @@
+"""
+DogWhistle Ultrasonic Detector
+Finds the pairing tones of DogWhistle devices in an uploaded recording
+
+Each device in static/ultrasonic-demo.html transmits a tone at
+17000 + code Hz (code 0-999, shown in hex), wobbled +/-50 Hz by a slow LFO.
+Instead of a full-spectrum FFT, every 100 ms block is correlated with a
+bank of Goertzel-equivalent filters covering only 17-18 kHz (one batched
+matrix multiply), so an hour of 48 kHz audio takes about a second.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from audio_io import ffmpeg_available, is_pcm_wav, native_sample_rate, pcm_blocks
+
+DETECT_DEVICES = os.getenv("DOGWHISTLE_DETECT_DEVICES", "1") == "1"
+
+BAND_START_HZ = 17000
+BAND_END_HZ = 18000
+
+# 100 ms blocks give filters exactly 10 Hz apart
+BLOCK_SECONDS = 0.1
+BIN_SPACING_HZ = 10
+
+# Blocks correlated per matrix multiply
+BATCH_BLOCKS = 600
+
+# A bin holds a tone when it is this many times the band's median power...
+TONE_TO_NOISE = 20.0
+# ...and the tone's amplitude is at least this (int16 units, about -70 dB)
+MIN_TONE_AMPLITUDE = 10.0
+
+# The demo's LFO moves a device's tone +/-50 Hz at up to 60 Hz, so its energy
+# spreads this far either side of the carrier (Carson's rule). Devices closer
+# together than this are reported as one.
+TONE_SPREAD_HZ = 50 + 60
+
+# Gaps shorter than this don't end an appearance; shorter appearances are ignored
+MAX_GAP_SECONDS = 1.0
+MIN_APPEARANCE_SECONDS = 0.5
+
+
+@dataclass
+class DeviceAppearance:
+    """One device heard in a recording"""
+    device_code: str  # Hex, as shown in the pairing demo
+    frequency: float
+    intervals: List[Dict] = field(default_factory=list)  # [{"start", "end"}] in seconds
+
+    @property
+    def total_seconds(self) -> float:
+        return round(sum(span["end"] - span["start"] for span in self.intervals), 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "device_code": self.device_code,
+            "frequency": round(self.frequency, 1),
+            "first_seen": self.intervals[0]["start"],
+            "last_seen": self.intervals[-1]["end"],
+            "total_seconds": self.total_seconds,
+            "intervals": self.intervals,
+        }
+
+
+def device_code(frequency: float) -> str:
+    """Same derivation as the pairing demo: hex of (frequency - 17000)"""
+    return format(int(round(frequency - BAND_START_HZ)), "X")
+
+
+def filter_bank(sample_rate: int, block: int) -> np.ndarray:
+    """Hann-windowed cosine and sine columns for every bin in the band"""
+    frequencies = np.arange(BAND_START_HZ, BAND_END_HZ + 1, BIN_SPACING_HZ, dtype=np.float64)
+    phase = 2 * np.pi * np.outer(np.arange(block), frequencies) / sample_rate
+    window = np.hanning(block)[:, None]
+    return np.concatenate([np.cos(phase) * window, np.sin(phase) * window], axis=1).astype(np.float32)
+
+
+def band_power(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Power of each 17-18 kHz bin in each block, shape (blocks, bins)"""
+    block = int(round(sample_rate * BLOCK_SECONDS))
+    count = len(samples) // block
+    bank = filter_bank(sample_rate, block)
+    bins = bank.shape[1] // 2
+    frames = samples[:count * block].reshape(count, block)
+    power = np.empty((count, bins), dtype=np.float32)
+
+    for first in range(0, count, BATCH_BLOCKS):
+        correlated = frames[first:first + BATCH_BLOCKS].astype(np.float32) @ bank
+        power[first:first + BATCH_BLOCKS] = correlated[:, :bins] ** 2 + correlated[:, bins:] ** 2
+    return power
+
+
+def _intervals(present: np.ndarray) -> List[Dict]:
+    """Turn per-block presence into merged [start, end) intervals in seconds"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], present.view(np.int8), [0]))))
+    spans = []
+    for start, end in zip(edges[0::2] * BLOCK_SECONDS, edges[1::2] * BLOCK_SECONDS):
+        if spans and start - spans[-1][1] <= MAX_GAP_SECONDS:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [{"start": round(float(s), 2), "end": round(float(e), 2)}
+            for s, e in spans if e - s >= MIN_APPEARANCE_SECONDS]
+
+
+def block_tones(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Which bins hold a tone in each block, and each tone's power (zero elsewhere)"""
+    power = band_power(samples, sample_rate)
+    block = int(round(sample_rate * BLOCK_SECONDS))
+    # A Hann-windowed sinusoid of amplitude A peaks at (A * block / 4)^2
+    floor = (MIN_TONE_AMPLITUDE * block / 4) ** 2
+    noise = np.median(power, axis=1, keepdims=True)
+    return np.where((power > TONE_TO_NOISE * noise) & (power > floor), power, 0)
+
+
+def detect_devices(samples: np.ndarray, sample_rate: int) -> List[DeviceAppearance]:
+    """Find device tones and when each was audible"""
+    return detect_devices_in_blocks([samples], sample_rate)
+
+
+def detect_devices_in_blocks(blocks: Iterable[np.ndarray], sample_rate: int) -> List[DeviceAppearance]:
+    """
+    detect_devices over a recording decoded piecewise, each piece whole 100 ms blocks
+    Only the per-block tone mask is kept, about 1 KB per second of audio
+    """
+    if sample_rate < 2 * BAND_END_HZ:
+        return []  # The band isn't in the recording
+    masks = []
+    profile = None
+    for samples in blocks:
+        tone_power = block_tones(samples, sample_rate)
+        masks.append(tone_power > 0)
+        # Carriers are the peaks of the tone energy summed over the whole recording
+        summed = tone_power.sum(axis=0)
+        profile = summed if profile is None else profile + summed
+    if profile is None or not profile.any():
+        return []
+    tones = np.concatenate(masks)
+
+    frequencies = np.arange(BAND_START_HZ, BAND_END_HZ + 1, BIN_SPACING_HZ, dtype=np.float64)
+    reach = TONE_SPREAD_HZ // BIN_SPACING_HZ
+    devices = []
+    remaining = profile.copy()
+    while remaining.max() > 0:
+        # Sinusoidal FM peaks at the edges of its swing, so re-centre on the
+        # energy centroid until the window is balanced around the carrier
+        centre = int(np.argmax(remaining))
+        for _ in range(4):
+            lo, hi = max(0, centre - reach), min(len(profile), centre + reach + 1)
+            carrier = float(np.average(frequencies[lo:hi], weights=remaining[lo:hi] + 1e-12))
+            centre = int(round((carrier - BAND_START_HZ) / BIN_SPACING_HZ))
+        lo, hi = max(0, centre - reach), min(len(profile), centre + reach + 1)
+        remaining[lo:hi] = 0
+
+        present = tones[:, lo:hi].any(axis=1)
+        intervals = _intervals(present)
+        if intervals:
+            devices.append(DeviceAppearance(device_code(carrier), carrier, intervals))
+
+    return sorted(devices, key=lambda device: device.intervals[0]["start"])
+
+
+def scan_recording(audio_file_path: str) -> Optional[List[Dict]]:
+    """
+    Devices heard in an uploaded recording, as dicts for the meeting results
+    Returns None when the recording can't be decoded here
+    """
+    if not DETECT_DEVICES or not (is_pcm_wav(audio_file_path) or ffmpeg_available()):
+        return None
+    sample_rate = native_sample_rate(audio_file_path)
+    block = int(round(sample_rate * BLOCK_SECONDS))
+    try:
+        devices = detect_devices_in_blocks(pcm_blocks(audio_file_path, sample_rate, block * BATCH_BLOCKS), sample_rate)
+    except RuntimeError as e:
+        print(f"Device scan skipped: {e}")
+        return None
+    return [device.to_dict() for device in devices]
@@ -0,0 +1,309 @@
+"""
+DogWhistle Streaming Uploads
+Parses multipart audio uploads as they arrive and spools them straight to disk
+in fixed-size chunks, rejecting bad or oversized files before the body finishes
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import aiofiles
+from multipart.multipart import MultipartParser, parse_options_header
+
+# Long recordings are split before transcription, so uploads can exceed
+# Whisper's 25MB single-request limit. Trimming, splitting and the device scan
+# decode in fixed-size blocks, so memory doesn't grow with the recording.
+MAX_UPLOAD_BYTES = int(os.getenv("DOGWHISTLE_MAX_UPLOAD_MB", "500")) * 1024 * 1024
+
+# Merging a meeting group still decodes every phone's recording whole, so
+# each stays at the single-request size
+MAX_GROUP_UPLOAD_BYTES = int(os.getenv("DOGWHISTLE_MAX_GROUP_UPLOAD_MB", "25")) * 1024 * 1024
+
+# Bytes buffered in memory before each write to the spool file
+CHUNK_SIZE = 1024 * 1024
+
+# Multipart framing (boundaries, part headers) on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+SUPPORTED_EXTENSIONS = ('.mp3', '.m4a', '.wav', '.ogg', '.webm')
+
+# Archives of recordings accepted by the batch API
+ARCHIVE_EXTENSIONS = ('.zip',)
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Enough leading bytes to recognise every supported container
+SNIFF_BYTES = 12
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused part way through"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class SpooledUpload:
+    """An audio upload that has been fully written to disk"""
+    path: str
+    filename: str
+    size: int
+    audio_format: str
+    sha256: str  # Content hash, used as the result cache key
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    Identify the audio container from its magic bytes
+    Returns None when the bytes don't look like a supported format
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if header[:3] == b"ID3":
+        return "mp3"
+    if len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0:
+        return "mp3"
+    return None
+
+
+class _UploadPart:
+    """One file part of a multipart upload, as it is spooled"""
+
+    def __init__(self, filename: str, path: str):
+        self.filename = filename
+        self.path = path
+        self.buffer = bytearray()
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.audio_format = None
+        self.finished = False
+        self.spool = None
+        self.closed = False
+
+
+class _AudioPartWriter:
+    """Multipart callbacks that route the audio parts into bounded buffers"""
+
+    def __init__(self, field_names: Tuple[str, ...], spool_path_for, max_bytes: int, max_files: int = 1,
+                 max_total_bytes: Optional[int] = None, allow_archives: bool = False):
+        self.field_names = field_names
+        self.spool_path_for = spool_path_for
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.allow_archives = allow_archives
+
+        self.parts: List[_UploadPart] = []
+        self.current: Optional[_UploadPart] = None
+        self.total_bytes = 0
+        self.error = None
+
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self.current = None
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("latin-1")
+        if name not in self.field_names or self.error:
+            return
+        if len(self.parts) >= self.max_files:
+            if self.max_files > 1:
+                self.error = UploadRejected(400, f"Too many files. Maximum: {self.max_files}")
+            return
+
+        filename = os.path.basename(options.get(b"filename", b"").decode("utf-8", "replace"))
+        extensions = SUPPORTED_EXTENSIONS + (ARCHIVE_EXTENSIONS if self.allow_archives else ())
+        if not filename.lower().endswith(extensions):
+            self.error = UploadRejected(400, "Invalid audio format. Supported: mp3, m4a, wav, ogg, webm")
+            return
+
+        self.current = _UploadPart(filename, self.spool_path_for(filename))
+        self.parts.append(self.current)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        part = self.current
+        if part is None or self.error:
+            return
+
+        part.size += end - start
+        self.total_bytes += end - start
+        if part.size > self.max_bytes:
+            self.error = UploadRejected(
+                413, f"File too large. Maximum size: {self.max_bytes // (1024 * 1024)}MB"
+            )
+            return
+        if self.max_total_bytes is not None and self.total_bytes > self.max_total_bytes:
+            self.error = UploadRejected(
+                413, f"Upload too large. Maximum total size: {self.max_total_bytes // (1024 * 1024)}MB"
+            )
+            return
+        part.buffer += data[start:end]
+
+        # Check the magic bytes as soon as we have enough of them
+        if part.audio_format is None and part.size >= SNIFF_BYTES:
+            self._sniff(part)
+
+    def on_part_end(self):
+        part = self.current
+        if part is None:
+            return
+        self.current = None
+        if part.audio_format is None and not self.error:
+            self._sniff(part)
+        part.finished = True
+
+    def _sniff(self, part: _UploadPart):
+        header = bytes(part.buffer[:SNIFF_BYTES])
+        part.audio_format = sniff_audio_format(header)
+        if part.audio_format is None and self.allow_archives and header.startswith(ZIP_MAGIC):
+            part.audio_format = "zip"
+        if part.audio_format is None:
+            self.error = UploadRejected(400, "File content is not a supported audio format")
+
+
+async def stream_upload_to_disk(
+    request,
+    spool_path_for,
+    field_name: str = "audio_file",
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Stream the audio part of a multipart request to disk
+
+    `spool_path_for(filename)` returns where the file should be written.
+    At most roughly `chunk_size` bytes of audio are held in memory at once, and
+    the request is abandoned as soon as it breaks the size or format rules.
+    """
+    # Refuse declared-oversized bodies before reading a single byte
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadRejected(413, f"File too large. Maximum size: {max_bytes // (1024 * 1024)}MB")
+
+    uploads = await stream_uploads_to_disk(request, spool_path_for, (field_name,), max_bytes=max_bytes,
+                                           chunk_size=chunk_size)
+    return uploads[0]
+
+
+async def stream_uploads_to_disk(
+    request,
+    spool_path_for,
+    field_names: Tuple[str, ...] = ("audio_file",),
+    max_files: int = 1,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_total_bytes: Optional[int] = None,
+    allow_archives: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[SpooledUpload]:
+    """
+    Stream up to `max_files` audio parts of a multipart request to disk
+    Parts in any of `field_names` are kept; with allow_archives, .zip parts are
+    accepted too (audio_format "zip"). Each part is limited to `max_bytes`.
+    """
+    content_type = request.headers.get("content-type", "")
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not content_type.startswith("multipart/form-data") or not boundary:
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if (max_total_bytes is not None and content_length and content_length.isdigit()
+            and int(content_length) > max_total_bytes + MULTIPART_OVERHEAD * max_files):
+        raise UploadRejected(413, f"Upload too large. Maximum total size: {max_total_bytes // (1024 * 1024)}MB")
+
+    writer = _AudioPartWriter(field_names, spool_path_for, max_bytes, max_files, max_total_bytes, allow_archives)
+    parser = MultipartParser(boundary, writer.callbacks())
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if writer.error:
+                raise writer.error
+
+            for part in writer.parts:
+                # Only write once the format has been confirmed
+                if part.buffer and part.audio_format and (len(part.buffer) >= chunk_size or part.finished):
+                    if part.spool is None:
+                        part.spool = await aiofiles.open(part.path, "wb")
+                    chunk_bytes = bytes(part.buffer)
+                    part.digest.update(chunk_bytes)
+                    await part.spool.write(chunk_bytes)
+                    part.buffer.clear()
+                if part.finished and part.spool is not None and not part.closed:
+                    await part.spool.close()
+                    part.closed = True
+
+            if max_files == 1 and writer.parts and writer.parts[0].finished:
+                break
+
+        if not writer.parts:
+            raise UploadRejected(400, f"Missing '{field_names[0]}' file in upload")
+        if not all(part.finished for part in writer.parts):
+            raise UploadRejected(400, "Upload ended before the audio file was complete")
+
+        if any(part.spool is None for part in writer.parts):
+            # Empty file part
+            raise UploadRejected(400, "Uploaded audio file is empty")
+
+        return [
+            SpooledUpload(
+                path=part.path,
+                filename=part.filename,
+                size=part.size,
+                audio_format=part.audio_format,
+                sha256=part.digest.hexdigest(),
+            )
+            for part in writer.parts
+        ]
+
+    except BaseException:
+        # Never leave half-written files behind in the spool directory
+        for part in writer.parts:
+            if part.spool is not None:
+                await part.spool.close()
+            if os.path.exists(part.path):
+                os.remove(part.path)
+        raise
+
+    finally:
+        for part in writer.parts:
+            if part.spool is not None:
+                await part.spool.close()
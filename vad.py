@@ -0,0 +1,222 @@
+"""
+DogWhistle Voice Activity Detection
+Finds the speech in a recording so dead air isn't sent to Whisper (and paid for)
+
+Frames are classified with vectorized NumPy: energy against an adaptive
+noise floor, with zero-crossing rate to keep quiet fricatives, and
+hysteresis so a region starts on clear speech and ends only when the audio
+falls back to the floor. Long silences are compressed to a short gap, and
+an OffsetMap converts trimmed-audio timestamps back to meeting time.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_io import SPEECH_SAMPLE_RATE, ffmpeg_available, is_pcm_wav, pcm_blocks, write_wav_ranges
+
+TRIM_SILENCE = os.getenv("DOGWHISTLE_TRIM_SILENCE", "1") == "1"
+
+# Silences longer than this are compressed; shorter pauses are left alone
+MIN_SILENCE_SECONDS = float(os.getenv("DOGWHISTLE_MIN_SILENCE_SECONDS", "1.5"))
+
+# Audio kept around each stretch of speech, so a compressed silence becomes
+# a gap of twice this
+PAD_SECONDS = 0.25
+
+FRAME_SECONDS = 0.02
+
+# Frames analyzed per block, bounding the float copy of a long recording
+BLOCK_FRAMES = 30000
+
+# RMS below which nothing counts as speech (about -50 dBFS)
+MIN_SPEECH_ENERGY = 100.0
+
+# Fraction of sign changes typical of unvoiced consonants (s, f, sh)
+FRICATIVE_ZCR = 0.25
+
+# Don't bother re-encoding unless at least this much audio is removed
+MIN_SAVING = 0.05
+
+
+@dataclass
+class OffsetMap:
+    """Where each kept span of the trimmed audio came from, in seconds"""
+    output_starts: np.ndarray
+    original_starts: np.ndarray
+    lengths: np.ndarray
+    original_seconds: float
+
+    @property
+    def kept_seconds(self) -> float:
+        return float(self.lengths.sum())
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """Map a time in the trimmed audio to the original recording"""
+        side = "left" if is_end else "right"
+        span = max(0, int(np.searchsorted(self.output_starts, seconds, side=side)) - 1)
+        offset = min(max(0.0, seconds - self.output_starts[span]), self.lengths[span])
+        return float(self.original_starts[span] + offset)
+
+    def map_segments(self, segments: List[Dict]) -> List[Dict]:
+        return [
+            dict(segment,
+                 start=round(self.to_original(segment["start"]), 2),
+                 end=round(self.to_original(segment["end"], is_end=True), 2))
+            for segment in segments
+        ]
+
+
+@dataclass
+class TrimmedAudio:
+    path: str
+    offsets: OffsetMap
+
+
+def frame_features(samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE,
+                   frame_seconds: float = FRAME_SECONDS) -> Tuple[np.ndarray, np.ndarray]:
+    """RMS energy and zero-crossing rate of consecutive non-overlapping frames"""
+    frame = max(2, int(sample_rate * frame_seconds))
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    energy = np.empty(count, dtype=np.float32)
+    zcr = np.empty(count, dtype=np.float32)
+
+    for first in range(0, count, BLOCK_FRAMES):
+        block = frames[first:first + BLOCK_FRAMES]
+        as_float = block.astype(np.float32)
+        energy[first:first + len(block)] = np.sqrt(np.einsum("ij,ij->i", as_float, as_float) / frame)
+        signs = np.signbit(block)
+        zcr[first:first + len(block)] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return energy, zcr
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indices of each run of True"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+
+def hysteresis(active: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """Keep each run of `active` frames that contains at least one seed frame"""
+    active = active | seeds
+    starts = active & ~np.concatenate(([False], active[:-1]))
+    run_ids = np.cumsum(starts) * active
+    seeded = np.bincount(run_ids, weights=seeds, minlength=int(run_ids.max()) + 1) > 0
+    seeded[0] = False
+    return seeded[run_ids]
+
+
+def _dilate(mask: np.ndarray, frames: int) -> np.ndarray:
+    """Grow every True run by `frames` on each side"""
+    if frames <= 0 or len(mask) == 0:
+        return mask
+    totals = np.concatenate(([0], np.cumsum(mask)))
+    index = np.arange(len(mask))
+    low = np.clip(index - frames, 0, len(mask))
+    high = np.clip(index + frames + 1, 0, len(mask))
+    return (totals[high] - totals[low]) > 0
+
+
+def classify_frames(energy: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+    """Per-frame speech mask from frame_features output"""
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+
+    floor = float(np.percentile(energy, 10))
+    peak = float(np.percentile(energy, 95))
+    high = max(floor * 4, floor + (peak - floor) * 0.15, MIN_SPEECH_ENERGY)
+    low = max(floor * 2, floor + (peak - floor) * 0.05, MIN_SPEECH_ENERGY / 2)
+
+    seeds = energy > high
+    # Quiet but hissy frames continue speech (fricatives) but can't start it
+    active = (energy > low) | ((energy > max(floor * 1.5, MIN_SPEECH_ENERGY / 4)) & (zcr > FRICATIVE_ZCR))
+    return hysteresis(active, seeds)
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE,
+                  frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """Per-frame speech mask (before padding and gap filling)"""
+    return classify_frames(*frame_features(samples, sample_rate, frame_seconds))
+
+
+def spans_from_mask(speech: np.ndarray, total_samples: int, sample_rate: int = SPEECH_SAMPLE_RATE,
+                    min_silence: float = MIN_SILENCE_SECONDS, pad: float = PAD_SECONDS,
+                    frame_seconds: float = FRAME_SECONDS) -> List[Tuple[int, int]]:
+    """Sample ranges to keep for a speech mask over `total_samples` of audio"""
+    speech = _dilate(speech, int(round(pad / frame_seconds)))
+    starts, ends = _runs(speech)
+    if len(starts) == 0:
+        return []
+
+    # Join runs separated by a short pause
+    keep_gap = (starts[1:] - ends[:-1]) * frame_seconds >= min_silence
+    starts = np.concatenate(([starts[0]], starts[1:][keep_gap]))
+    ends = np.concatenate((ends[:-1][keep_gap], [ends[-1]]))
+
+    frame = int(sample_rate * frame_seconds)
+    return [(int(s * frame), min(total_samples, int(e * frame)) if e < len(speech) else total_samples)
+            for s, e in zip(starts, ends)]
+
+
+def speech_spans(samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE,
+                 min_silence: float = MIN_SILENCE_SECONDS, pad: float = PAD_SECONDS,
+                 frame_seconds: float = FRAME_SECONDS) -> List[Tuple[int, int]]:
+    """Sample ranges to keep: padded speech, with pauses under `min_silence` kept whole"""
+    speech = detect_speech(samples, sample_rate, frame_seconds)
+    return spans_from_mask(speech, len(samples), sample_rate, min_silence, pad, frame_seconds)
+
+
+def offset_map(spans: List[Tuple[int, int]], total_samples: int, sample_rate: int = SPEECH_SAMPLE_RATE) -> OffsetMap:
+    """Where each kept span lands in the trimmed audio"""
+    original_seconds = total_samples / float(sample_rate)
+    if not spans:
+        empty = np.zeros(0)
+        return OffsetMap(empty, empty, empty, original_seconds)
+    original_starts = np.array([start for start, _ in spans], dtype=np.float64) / sample_rate
+    lengths = np.array([end - start for start, end in spans], dtype=np.float64) / sample_rate
+    output_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    return OffsetMap(output_starts, original_starts, lengths, original_seconds)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int = SPEECH_SAMPLE_RATE,
+                 min_silence: float = MIN_SILENCE_SECONDS) -> Tuple[np.ndarray, OffsetMap]:
+    """Drop leading/trailing silence and compress long pauses"""
+    spans = speech_spans(samples, sample_rate, min_silence)
+    offsets = offset_map(spans, len(samples), sample_rate)
+    if not spans:
+        return samples[:0], offsets
+    return np.concatenate([samples[start:end] for start, end in spans]), offsets
+
+
+def trim_audio_file(audio_file_path: str, output_dir: str) -> Optional[TrimmedAudio]:
+    """
+    Write a silence-trimmed 16 kHz mono copy of a recording
+    Returns None when the file can't be decoded here, has no detectable
+    speech, or trimming would save too little to be worth it
+    """
+    if not TRIM_SILENCE or not (is_pcm_wav(audio_file_path) or ffmpeg_available()):
+        return None
+
+    # Features are gathered a block at a time (blocks are whole frames), then
+    # the kept spans are copied out in a second pass, so memory stays flat
+    features = []
+    total_samples = 0
+    for block in pcm_blocks(audio_file_path, SPEECH_SAMPLE_RATE):
+        features.append(frame_features(block, SPEECH_SAMPLE_RATE))
+        total_samples += len(block)
+    if not features:
+        return None
+    speech = classify_frames(np.concatenate([energy for energy, _ in features]),
+                             np.concatenate([zcr for _, zcr in features]))
+    spans = spans_from_mask(speech, total_samples, SPEECH_SAMPLE_RATE)
+    offsets = offset_map(spans, total_samples, SPEECH_SAMPLE_RATE)
+    if not spans or offsets.kept_seconds > offsets.original_seconds * (1 - MIN_SAVING):
+        return None
+
+    stem = os.path.splitext(os.path.basename(audio_file_path))[0]
+    path = os.path.join(output_dir, f"{stem}_voiced.wav")
+    write_wav_ranges(audio_file_path, [(start, end, path) for start, end in spans], SPEECH_SAMPLE_RATE)
+    return TrimmedAudio(path, offsets)